@@ -0,0 +1,141 @@
+"""
+Teste de carga da API local: latência do /api/v1/extract e do /health com extrações concorrentes.
+
+Cada cenário sobe um uvicorn novo (storage em diretório temporário, cache
+desligado para toda requisição extrair de fato). --clientes threads enviam o
+mesmo PDF sintético sem pausa durante --segundos, enquanto outra thread chama
+o /health a cada 50 ms. Respostas 503 (controle de admissão) são contadas à
+parte, com o Retry-After recebido; o cliente não espera por ele antes de tentar de novo.
+
+Cenários:
+- sem_controle: extração na thread da requisição e admissão desligada
+  (EXTRACT_PROCESSES=0, ADMISSION_MAX_RUNNING=0), como antes do controle;
+- com_controle: a configuração padrão (pool de extração e admissão).
+
+Uso: python benchmarks/bench_carga.py [--clientes N] [--segundos S] [--linhas N] [--cenarios ...] [--porta P]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import sintetico
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CENARIOS = {
+    "sem_controle": dict(EXTRACT_PROCESSES="0", ADMISSION_MAX_RUNNING="0"),
+    "com_controle": {},
+}
+
+
+def percentil(valores, p: float) -> float:
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def subir(porta: int, storage: str, ambiente: dict) -> subprocess.Popen:
+    env = dict(os.environ, **ambiente,
+               STORAGE_UPLOADS=os.path.join(storage, "uploads"),
+               STORAGE_EXPORTS=os.path.join(storage, "exports"),
+               STORAGE_CACHE=os.path.join(storage, "cache"),
+               STORAGE_LEDGERS=os.path.join(storage, "ledgers"),
+               CACHE_MAX_BYTES="0")
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", os.path.join(RAIZ, "src"),
+         "--port", str(porta), "--log-level", "warning"],
+        env=env, cwd=storage, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    while True:
+        if processo.poll() is not None:
+            raise RuntimeError(f"uvicorn terminou com código {processo.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{porta}/health", timeout=1) as resposta:
+                resposta.read()
+            return processo
+        except OSError:
+            time.sleep(0.01)
+
+
+def cenario(porta: int, pdf: bytes, ambiente: dict, clientes: int, segundos: float) -> dict:
+    with tempfile.TemporaryDirectory() as storage:
+        processo = subir(porta, storage, ambiente)
+        base = f"http://127.0.0.1:{porta}"
+        extract, health, recusas, retry_after, erros = [], [], [], [], []
+        fim = time.perf_counter() + segundos
+
+        def cliente():
+            corpo, tipo = sintetico.multipart({"bank_code": "999", "save_xlsx": "false"}, pdf)
+            while time.perf_counter() < fim:
+                pedido = urllib.request.Request(base + "/api/v1/extract", data=corpo, headers={"Content-Type": tipo})
+                inicio = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(pedido, timeout=300) as resposta:
+                        resposta.read()
+                    extract.append(time.perf_counter() - inicio)
+                except urllib.error.HTTPError as e:
+                    if e.code != 503:
+                        erros.append(e.code)
+                        continue
+                    recusas.append(time.perf_counter() - inicio)
+                    retry_after.append(int(e.headers.get("Retry-After", "0")))
+                    # Sem pausa nenhuma o cliente só mediria a recusa; espera pouco e tenta de novo
+                    time.sleep(0.05)
+                except OSError as e:
+                    erros.append(str(e))
+
+        def sonda():
+            while time.perf_counter() < fim:
+                inicio = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(base + "/health", timeout=60) as resposta:
+                        resposta.read()
+                    health.append(time.perf_counter() - inicio)
+                except OSError as e:
+                    erros.append(str(e))
+                time.sleep(0.05)
+
+        try:
+            threads = [threading.Thread(target=cliente) for _ in range(clientes)] + [threading.Thread(target=sonda)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            processo.terminate()
+            processo.wait()
+    return dict(extract=extract, health=health, recusas=recusas, retry_after=retry_after, erros=erros)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--segundos", type=float, default=20)
+    parser.add_argument("--linhas", type=int, default=3000)
+    parser.add_argument("--cenarios", nargs="+", choices=tuple(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--porta", type=int, default=8766)
+    args = parser.parse_args()
+
+    pdf = sintetico.pdf(sintetico.gerar(args.linhas))
+    print(f"{args.clientes} clientes, {args.segundos:g} s, PDF de {len(pdf) / 1024:.0f} KiB, {os.cpu_count()} CPUs")
+    print(f"{'cenário':<14} {'extrações':>9} {'503':>5} {'p50 (s)':>8} {'p99 (s)':>8} {'503 p99':>8} "
+          f"{'health p50':>11} {'health p99':>11} {'health máx':>11} {'erros':>6}")
+    for nome in args.cenarios:
+        r = cenario(args.porta, pdf, CENARIOS[nome], args.clientes, args.segundos)
+        print(f"{nome:<14} {len(r['extract']):>9} {len(r['recusas']):>5} {percentil(r['extract'], 50):>8.2f} "
+              f"{percentil(r['extract'], 99):>8.2f} {percentil(r['recusas'], 99):>8.2f} "
+              f"{percentil(r['health'], 50):>11.3f} {percentil(r['health'], 99):>11.3f} "
+              f"{max(r['health'], default=float('nan')):>11.3f} {len(r['erros']):>6}")
+        if r["retry_after"]:
+            print(f"{'':<14} Retry-After entre {min(r['retry_after'])} e {max(r['retry_after'])} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Mede a subida da API: tempo até o primeiro /health e até a primeira extração.
+
+Cada rodada sobe um uvicorn novo (storage em diretório temporário, cache vazio),
+espera o /health responder e envia um PDF sintético para /api/v1/extract.
+
+Uso: python benchmarks/bench_cold_start.py [--rodadas N] [--linhas N] [--porta P] [--pdf ARQUIVO]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import sintetico
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def rodada(porta: int, pdf: bytes, storage: str) -> dict:
+    env = dict(os.environ,
+               STORAGE_UPLOADS=os.path.join(storage, "uploads"),
+               STORAGE_EXPORTS=os.path.join(storage, "exports"),
+               STORAGE_CACHE=os.path.join(storage, "cache"))
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", os.path.join(RAIZ, "src"),
+         "--port", str(porta), "--log-level", "warning"],
+        env=env, cwd=storage,
+    )
+    base = f"http://127.0.0.1:{porta}"
+    try:
+        while True:
+            if processo.poll() is not None:
+                raise RuntimeError(f"uvicorn terminou com código {processo.returncode}")
+            try:
+                with urllib.request.urlopen(base + "/health", timeout=1) as resposta:
+                    resposta.read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        t_health = time.perf_counter() - inicio
+
+        corpo, tipo = sintetico.multipart({"bank_code": "999", "save_xlsx": "false"}, pdf)
+        pedido = urllib.request.Request(base + "/api/v1/extract", data=corpo, headers={"Content-Type": tipo})
+        inicio_extract = time.perf_counter()
+        with urllib.request.urlopen(pedido, timeout=120) as resposta:
+            lancamentos = json.loads(resposta.read())["total_lancamentos"]
+        agora = time.perf_counter()
+        return dict(health_s=t_health, primeiro_extract_s=agora - inicio_extract,
+                    ate_primeiro_extract_s=agora - inicio, lancamentos=lancamentos)
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rodadas", type=int, default=5)
+    parser.add_argument("--linhas", type=int, default=300)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--pdf", help="PDF a enviar no lugar do sintético")
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as arquivo:
+            pdf = arquivo.read()
+    else:
+        pdf = sintetico.pdf(sintetico.gerar(args.linhas))
+
+    print(f"{'rodada':>6} {'/health (s)':>12} {'1º extract (s)':>15} {'até extract (s)':>16} {'lanç.':>6}")
+    resultados = []
+    for i in range(args.rodadas):
+        with tempfile.TemporaryDirectory() as storage:
+            r = rodada(args.porta, pdf, storage)
+        resultados.append(r)
+        print(f"{i + 1:>6} {r['health_s']:>12.3f} {r['primeiro_extract_s']:>15.3f} "
+              f"{r['ate_primeiro_extract_s']:>16.3f} {r['lancamentos']:>6}")
+    melhor = min(resultados, key=lambda r: r["ate_primeiro_extract_s"])
+    print(f"{'melhor':>6} {melhor['health_s']:>12.3f} {melhor['primeiro_extract_s']:>15.3f} "
+          f"{melhor['ate_primeiro_extract_s']:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
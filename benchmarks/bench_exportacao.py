@@ -0,0 +1,152 @@
+"""
+Vazão da exportação (linhas/s) e pico de memória alocada na escrita, no checkout e em outros commits.
+
+Grava os mesmos lançamentos como XLSX (salvar_planilha) e CSV
+(salvar_exportacao, onde existir), a partir da lista de dicts e da
+TabelaLancamentos (onde existir). O pico é o que a escrita aloca além dos
+lançamentos já em memória. Para o antes/depois da exportação em lotes,
+passe o commit anterior a ela:
+
+    python benchmarks/bench_exportacao.py --antes <commit>
+
+Uso: python benchmarks/bench_exportacao.py [--linhas N] [--repeticoes R] [--antes REV ...]
+"""
+import argparse
+import csv
+import gc
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import revisoes
+from conferencia import conferir
+
+HISTORICOS = [
+    "PIX RECEBIDO", "PIX ENVIADO", "TED ENVIADA", "PAGAMENTO BOLETO", "TARIFA BANCARIA", "SAQUE 24H",
+    "RENDIMENTO POUPANCA", "DEB AUTOMATICO LUZ", "CRED SALARIO", "IOF", "JUROS", "COMPRA CARTAO",
+]
+
+
+def lancamentos(quantidade: int, seed: int = 0):
+    """Dicts no formato de _montar_lancamento, com históricos parcialmente repetidos."""
+    r = random.Random(seed)
+    saida = []
+    for _ in range(quantidade):
+        movimento = r.choice(("DÉBITO", "CRÉDITO"))
+        historico = r.choice(HISTORICOS)
+        if r.random() < 0.5:
+            historico += f" {r.randint(1, 10 ** 6)}"
+        centavos = r.randint(1, 10 ** 7)
+        saida.append({
+            'Data': f"{r.randint(1, 28):02d}/{r.randint(1, 12):02d}/2024",
+            'Movimento': movimento,
+            'Historico': historico,
+            'Valor': centavos / 100,
+            'Debito': '001' if movimento == 'CRÉDITO' else '',
+            'Credito': '001' if movimento == 'DÉBITO' else '',
+            'Centavos': centavos,
+        })
+    return saida
+
+
+def melhor_tempo(funcao, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def pico(funcao) -> int:
+    gc.collect()
+    tracemalloc.start()
+    funcao()
+    _, maior = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return maior
+
+
+def conferir_arquivos(extrator, entradas: dict, diretorio: str, quantidade: int) -> None:
+    """Todas as entradas dão a mesma planilha e o mesmo CSV, com uma linha por lançamento."""
+    planilhas, textos = set(), set()
+    for nome, entrada in entradas.items():
+        arquivo = os.path.join(diretorio, f"{nome}.xlsx")
+        extrator.salvar_planilha(entrada, arquivo)
+        with zipfile.ZipFile(arquivo) as planilha:
+            planilhas.add(planilha.read("xl/worksheets/sheet1.xml"))
+        if hasattr(extrator, "salvar_exportacao"):
+            arquivo = os.path.join(diretorio, f"{nome}.csv")
+            extrator.salvar_exportacao(entrada, arquivo, "csv")
+            with open(arquivo, encoding="utf-8", newline="") as arquivo_csv:
+                linhas = list(csv.reader(arquivo_csv))
+            conferir(len(linhas) == quantidade + 1, f"{nome}.csv: {len(linhas) - 1} linhas, esperadas {quantidade}")
+            textos.add(tuple(map(tuple, linhas)))
+    conferir(len(planilhas) == 1, "a planilha muda conforme a entrada (dicts ou tabela)")
+    conferir(len(textos) <= 1, "o CSV muda conforme a entrada (dicts ou tabela)")
+
+
+def medir(args) -> dict:
+    """Linhas/s e pico de memória de cada exportação disponível no src/ em uso."""
+    revisoes.usar_src(args.src)
+    logging.disable(logging.CRITICAL)
+    from app.extrator.extrator_extrato import ExtratorExtratoBancario
+
+    extrator = ExtratorExtratoBancario()
+    entradas = {"dicts": lancamentos(args.linhas)}
+    try:
+        from app.extrator.tabela_lancamentos import TabelaLancamentos
+    except ImportError:
+        pass
+    else:
+        entradas["tabela"] = TabelaLancamentos.de_lancamentos(entradas["dicts"], '001')
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        conferir_arquivos(extrator, entradas, diretorio, args.linhas)
+        for nome, entrada in entradas.items():
+            escritas = {"xlsx": lambda: extrator.salvar_planilha(entrada, os.path.join(diretorio, "saida.xlsx"))}
+            if hasattr(extrator, "salvar_exportacao"):
+                escritas["csv"] = lambda: extrator.salvar_exportacao(entrada, os.path.join(diretorio, "saida.csv"), "csv")
+            for formato, escrever in escritas.items():
+                resultados[f"{nome} {formato}"] = dict(
+                    linhas_por_segundo=args.linhas / melhor_tempo(escrever, args.repeticoes),
+                    pico_mb=pico(escrever) / 2 ** 20,
+                )
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=200000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--antes", nargs="*", default=[], metavar="REV", help="commits a comparar com o checkout")
+    parser.add_argument("--src", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.src:
+        print(json.dumps(medir(args)))
+        return
+
+    repassar = ["--linhas", str(args.linhas), "--repeticoes", str(args.repeticoes)]
+    resultados = {rev: revisoes.medir_revisao(__file__, rev, repassar) for rev in args.antes}
+    resultados["checkout"] = medir(args)
+
+    print(f"{args.linhas:,} linhas; linhas/s e pico de memória da escrita (MB)")
+    print(f"{'':<14}" + "".join(f"{rev:>26}" for rev in resultados))
+    for exportacao in resultados["checkout"]:
+        celulas = []
+        for resultado in resultados.values():
+            medida = resultado.get(exportacao)
+            celulas.append("-" if medida is None else
+                           f"{medida['linhas_por_segundo']:,.0f} / {medida['pico_mb']:,.1f} MB")
+        print(f"{exportacao:<14}" + "".join(f"{celula:>26}" for celula in celulas))
+
+
+if __name__ == "__main__":
+    main()
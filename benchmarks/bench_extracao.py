@@ -0,0 +1,257 @@
+"""
+Benchmarks do pipeline de extração sobre extratos sintéticos (ver sintetico.py).
+
+Mede extrair_texto_pdf, extrair_lancamentos, salvar_planilha e o /api/v1/extract
+de ponta a ponta (TestClient), com vazão e pico de memória (tracemalloc) de cada
+um. Antes de medir, confere que a leitura do texto, a em fluxo e a
+incremental dão os mesmos lançamentos num extrato com históricos que
+continuam na página seguinte, e que o motor de colunas lê um extrato com
+cada célula num Tj. O resultado sai em JSON para comparar commits:
+
+    python benchmarks/bench_extracao.py --saida antes.json
+    (muda o código)
+    python benchmarks/bench_extracao.py --saida depois.json
+    python benchmarks/bench_extracao.py --comparar antes.json depois.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+
+import sintetico  # noqa: E402
+from conferencia import conferir  # noqa: E402
+
+BENCHMARKS = ("texto_pdf", "lancamentos", "planilha", "api")
+
+
+def medir(funcao, repeticoes: int) -> dict:
+    """Melhor tempo entre as repetições e o pico de memória de uma execução à parte."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dict(segundos=melhor, pico_memoria_bytes=pico)
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def conferir_leituras(extrator, args) -> None:
+    """
+    Texto, fluxo e incremental leem igual num extrato com históricos que
+    continuam na página seguinte, e o resultado é o mesmo de quando a
+    continuação está logo abaixo do lançamento, na mesma página. Na mesma
+    página, a linha depois de uma em branco não é continuação.
+    """
+    extrato = sintetico.gerar(2000, args.linhas_por_pagina, args.formato_data, args.indicador, args.seed,
+                              continuacoes=0.5)
+    pdf = sintetico.pdf(extrato)
+    esperado = extrator.extrair_tabela(args.banco, extrator.extrair_texto_pdf(pdf)).para_dicts()
+    conferir(list(extrator.iter_lancamentos(args.banco, pdf)) == esperado, "leitura em fluxo difere da do texto")
+    conferir(extrator.extrair_tabela_incremental(args.banco, pdf).tabela.para_dicts() == esperado,
+             "leitura incremental difere da do texto")
+
+    paginas = [list(pagina) for pagina in extrato.paginas]
+    for anterior, pagina in zip(paginas, paginas[1:]):
+        if pagina[0].endswith("PARCELA UNICA"):
+            anterior.append(pagina.pop(0))
+    mesma_pagina = sintetico.pdf(extrato._replace(paginas=paginas))
+    conferir(extrator.extrair_tabela(args.banco, extrator.extrair_texto_pdf(mesma_pagina)).para_dicts() == esperado,
+             "continuação no topo da página seguinte não foi juntada como na mesma página")
+
+    # Na mesma página, uma linha em branco encerra o histórico (como antes da leitura entre páginas):
+    # com ela antes da continuação, o resultado é o de não haver continuação
+    separadas = [[nova for linha in pagina for nova in (("", linha) if linha.endswith("PARCELA UNICA") else (linha,))]
+                 for pagina in paginas]
+    sem_continuacao = [[linha for linha in pagina if not linha.endswith("PARCELA UNICA")] for pagina in paginas]
+    lidos = extrator.extrair_lancamentos(args.banco, sintetico.texto(extrato._replace(paginas=separadas)))
+    conferir(lidos == extrator.extrair_lancamentos(args.banco, sintetico.texto(extrato._replace(paginas=sem_continuacao))),
+             "linha depois de uma em branco, na mesma página, foi juntada ao histórico")
+    lidos = extrator.extrair_lancamentos(args.banco, "01/02/2024 PIX FULANO 10,00 D\n\nNF 123 PARCELA UNICA\n")
+    conferir([lancamento['Historico'] for lancamento in lidos] == ["PIX FULANO"],
+             "linha depois de uma em branco, na mesma página, foi juntada ao histórico")
+
+
+def conferir_colunas(extrator, args) -> None:
+    """
+    O motor de colunas lê o extrato em que cada célula é um Tj (sintetico.pdf com
+    colunas) pelas colunas, sem cair no motor de texto: cada lançamento gerado
+    vira uma linha com a data, o histórico e o valor das suas células.
+    """
+    from app.extrator.perfis_bancos import obter_perfil
+
+    extrato = sintetico.gerar(2000, args.linhas_por_pagina, args.formato_data, args.indicador, args.seed,
+                              continuacoes=0.5)
+    esperado = [
+        (m.group("data"), m.group("historico"), m.group("valor").lstrip("-"))
+        for pagina in extrato.paginas for m in map(sintetico.LANCAMENTO.fullmatch, pagina) if m
+    ]
+    # Perfil genérico: o layout sintético não é o de um banco
+    linhas = extrator.iter_linhas_colunas_pdf(sintetico.pdf(extrato, colunas=True), obter_perfil("999"))
+    lidos = [(data, historico, valor.lstrip("-")) for data, historico, valor, _ in filter(None, linhas) if data]
+    conferir(len(lidos) == extrato.lancamentos, f"motor de colunas leu {len(lidos)} de {extrato.lancamentos} lançamentos")
+    conferir(lidos == esperado, "motor de colunas separou data, histórico ou valor fora das células")
+
+
+def executar(args, armazenamento: str) -> dict:
+    # Storage temporário e cache desligado antes de importar a aplicação (settings lê o ambiente)
+    for nome in ("UPLOADS", "EXPORTS", "CACHE"):
+        os.environ[f"STORAGE_{nome}"] = os.path.join(armazenamento, nome.lower())
+        os.makedirs(os.environ[f"STORAGE_{nome}"], exist_ok=True)
+    os.environ["CACHE_MAX_BYTES"] = "0"
+    logging.disable(logging.CRITICAL)
+    from app.extrator.extrator_extrato import ExtratorExtratoBancario
+
+    extrato = sintetico.gerar(args.lancamentos, args.linhas_por_pagina, args.formato_data, args.indicador, args.seed)
+    texto = sintetico.texto(extrato)
+    conteudo_pdf = sintetico.pdf(extrato)
+    caminho_pdf = os.path.join(armazenamento, "extrato.pdf")
+    with open(caminho_pdf, "wb") as arquivo:
+        arquivo.write(conteudo_pdf)
+
+    extrator = ExtratorExtratoBancario(processos_pdf=args.processos)
+    conferir_leituras(extrator, args)
+    conferir_colunas(extrator, args)
+    lancamentos = extrator.extrair_lancamentos(args.banco, texto)
+    paginas = len(extrato.paginas)
+    resultados = []
+
+    def registrar(nome, funcao, itens, unidade):
+        r = medir(funcao, args.repeticoes)
+        r.update(nome=nome, itens=itens, unidade=unidade, itens_por_segundo=itens / r["segundos"])
+        resultados.append(r)
+        print(f"{nome:<12} {r['segundos']:>9.4f}s {r['itens_por_segundo']:>12,.0f} {unidade}/s "
+              f"{r['pico_memoria_bytes'] / 2 ** 20:>8.1f} MiB", file=sys.stderr)
+
+    if "texto_pdf" in args.benchmarks:
+        registrar("texto_pdf", lambda: extrator.extrair_texto_pdf(caminho_pdf), paginas, "páginas")
+    if "lancamentos" in args.benchmarks:
+        registrar("lancamentos", lambda: extrator.extrair_lancamentos(args.banco, texto), extrato.linhas, "linhas")
+    if "planilha" in args.benchmarks:
+        saida = os.path.join(armazenamento, "planilha.xlsx")
+        registrar("planilha", lambda: extrator.salvar_planilha(lancamentos, saida), len(lancamentos), "lançamentos")
+    if "api" in args.benchmarks:
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        cliente = TestClient(app)
+
+        def requisicao():
+            resposta = cliente.post(
+                "/api/v1/extract",
+                data={"bank_code": str(args.banco), "save_xlsx": "true"},
+                files={"file": ("extrato.pdf", conteudo_pdf, "application/pdf")},
+            )
+            resposta.raise_for_status()
+
+        registrar("api", requisicao, paginas, "páginas")
+
+    return dict(
+        meta=dict(
+            commit=_commit(),
+            data=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            python=platform.python_version(),
+            plataforma=platform.platform(),
+            cpus=os.cpu_count(),
+        ),
+        parametros=dict(
+            lancamentos=args.lancamentos, linhas_por_pagina=args.linhas_por_pagina, paginas=paginas,
+            linhas=extrato.linhas, formato_data=args.formato_data, indicador=args.indicador, banco=args.banco,
+            seed=args.seed, repeticoes=args.repeticoes, processos=args.processos,
+            lancamentos_extraidos=len(lancamentos),
+        ),
+        resultados=resultados,
+    )
+
+
+def comparar(antes_arquivo: str, depois_arquivo: str, tolerancia: float) -> int:
+    """Imprime a variação de vazão e memória por benchmark; retorna 1 se algum piorou além da tolerância."""
+    with open(antes_arquivo, encoding="utf-8") as arquivo:
+        antes = json.load(arquivo)
+    with open(depois_arquivo, encoding="utf-8") as arquivo:
+        depois = json.load(arquivo)
+    if antes["parametros"] != depois["parametros"]:
+        print("aviso: os parâmetros dos dois resultados são diferentes", file=sys.stderr)
+
+    anteriores = {r["nome"]: r for r in antes["resultados"]}
+    piorou = False
+    print(f"{'benchmark':<12} {'vazão':>8} {'memória':>8}  ({antes['meta']['commit'] or '?'} -> {depois['meta']['commit'] or '?'})")
+    for r in depois["resultados"]:
+        a = anteriores.get(r["nome"])
+        if a is None:
+            continue
+        vazao = r["itens_por_segundo"] / a["itens_por_segundo"] - 1
+        memoria = r["pico_memoria_bytes"] / max(1, a["pico_memoria_bytes"]) - 1
+        marca = ""
+        if vazao < -tolerancia or memoria > tolerancia:
+            piorou = True
+            marca = "  <- regressão"
+        print(f"{r['nome']:<12} {vazao:>+8.1%} {memoria:>+8.1%}{marca}")
+    return 1 if piorou else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lancamentos", type=int, default=5000)
+    parser.add_argument("--linhas-por-pagina", type=int, default=50)
+    parser.add_argument("--paginas", type=int, help="distribui os lançamentos nessa quantidade de páginas")
+    parser.add_argument("--formato-data", choices=list(sintetico.FORMATOS_DATA), default="dd/mm/aaaa")
+    parser.add_argument("--indicador", choices=sintetico.INDICADORES, default="dc")
+    parser.add_argument("--banco", default="999", help="bank_code (sem perfil próprio = leitura genérica)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--processos", type=int, default=1, help="processos_pdf do extrator")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS),
+                        help=f"lista separada por vírgulas entre: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--saida", help="grava o JSON nesse arquivo em vez de imprimir")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"), help="compara dois resultados gravados")
+    parser.add_argument("--tolerancia", type=float, default=0.1, help="piora aceita em --comparar (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    if args.comparar:
+        sys.exit(comparar(*args.comparar, args.tolerancia))
+
+    args.benchmarks = [nome.strip() for nome in args.benchmarks.split(",") if nome.strip()]
+    desconhecidos = set(args.benchmarks) - set(BENCHMARKS)
+    if desconhecidos:
+        parser.error(f"benchmarks desconhecidos: {', '.join(sorted(desconhecidos))}")
+    if args.paginas:
+        # Cada lançamento ocupa ~1,15 linha (ruído e saldos do dia) e cada página tem 5 de cabeçalho
+        args.linhas_por_pagina = 5 + -(-int(args.lancamentos * 1.15) // args.paginas)
+    if args.linhas_por_pagina > sintetico.LINHAS_POR_PAGINA_MAX - 2:
+        print(f"aviso: até {sintetico.LINHAS_POR_PAGINA_MAX - 2} linhas por página; o extrato terá mais páginas",
+              file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as armazenamento:
+        resultado = executar(args, armazenamento)
+
+    saida = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(saida + "\n")
+    else:
+        print(saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+OCR das páginas digitalizadas: confere os lançamentos e mede o custo do OCR e o do caminho sem ele.
+
+O motor de OCR é sintético (MotorSintetico): lê de volta o texto gravado nos
+pixels das páginas digitalizadas de sintetico.pdf e espera --atraso segundos
+por página, no lugar do Tesseract (a espera não ocupa CPU, então mede o
+paralelismo do pool por página, não a disputa por CPU do OCR de verdade).
+
+Conferências: o PDF todo digitalizado (também com imagens /Indexed) e o com
+páginas alternadas dão os mesmos lançamentos do PDF com texto, na extração,
+no streaming e na incremental; só
+as páginas digitalizadas passam pelo OCR; um prazo curto demais e a falta de
+OCR falham com ErroOcr.
+
+Uso: python benchmarks/bench_ocr.py [--linhas N] [--atraso S] [--processos N] [--repeticoes R]
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+
+import sintetico  # noqa: E402
+from conferencia import conferir  # noqa: E402
+from app.extrator.ocr import MotorOcr  # noqa: E402
+
+BANCO = "999"
+
+
+class MotorSintetico(MotorOcr):
+    def __init__(self, atraso: float):
+        self.atraso = atraso
+
+    @property
+    def identificacao(self) -> str:
+        return "sintetico"
+
+    def disponivel(self) -> bool:
+        return True
+
+    def reconhecer(self, imagens, limite=None):
+        from PIL import Image
+        time.sleep(self.atraso)
+        linhas = []
+        for dados in imagens:
+            with Image.open(io.BytesIO(dados)) as imagem:
+                pixels = imagem.tobytes()
+                largura = imagem.width
+            linhas += [pixels[i:i + largura].decode("cp1252").rstrip() for i in range(0, len(pixels), largura)]
+        return "\n".join(linhas)
+
+
+def melhor_tempo(funcao, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def executar(args, armazenamento: str) -> None:
+    # Storage temporário antes de importar a aplicação (settings lê o ambiente)
+    for nome in ("UPLOADS", "EXPORTS", "CACHE", "LEDGERS", "OCR"):
+        os.environ[f"STORAGE_{nome}"] = os.path.join(armazenamento, nome.lower())
+    logging.disable(logging.CRITICAL)
+    from app.extrator.extrator_extrato import ExtratorExtratoBancario
+    from app.extrator.medicao import Medicao
+    from app.extrator.ocr import ErroOcr, FonteOcr, configurar_ocr
+    from app.utils.files import FileStore
+
+    extrato = sintetico.gerar(args.linhas)
+    paginas = len(extrato.paginas)
+    com_texto = sintetico.pdf(extrato)
+    digitalizado = sintetico.pdf(extrato, range(paginas))
+    alternado = sintetico.pdf(extrato, range(0, paginas, 2))
+    indexado = sintetico.pdf(extrato, range(paginas), paleta=True)
+    extrator = ExtratorExtratoBancario()
+
+    def tabela(pdf, medicao=None):
+        return extrator.extrair_tabela(BANCO, extrator.extrair_texto_pdf(pdf, medicao)).para_colunas()
+
+    def fonte(processos: int, prazo: float = 600, cache: bool = True) -> FonteOcr:
+        diretorio = tempfile.mkdtemp(dir=armazenamento)
+        return FonteOcr(MotorSintetico(args.atraso), processos, prazo, FileStore(diretorio, 0, 0) if cache else None)
+
+    esperado = tabela(com_texto)
+    for nome, pdf, ocr in (("digitalizado", digitalizado, paginas), ("alternado", alternado, (paginas + 1) // 2),
+                           ("indexado", indexado, paginas)):
+        # Cache novo por PDF: o indexado tem os mesmos dados codificados (e a mesma impressão) do digitalizado
+        configurar_ocr(fonte(args.processos))
+        medicao = Medicao()
+        conferir(tabela(pdf, medicao) == esperado, f"{nome}: lançamentos diferem dos do PDF com texto")
+        conferir(medicao.paginas_ocr == ocr, f"{nome}: {medicao.paginas_ocr} páginas no OCR, esperadas {ocr}")
+        conferir(list(extrator.iter_lancamentos(BANCO, pdf)) == extrator.extrair_tabela(
+            BANCO, extrator.extrair_texto_pdf(com_texto)).para_dicts(), f"{nome}: streaming difere do PDF com texto")
+        conferir(extrator.extrair_tabela_incremental(BANCO, pdf).tabela.para_colunas() == esperado,
+                 f"{nome}: incremental difere do PDF com texto")
+
+    configurar_ocr(fonte(args.processos, prazo=args.atraso / 2, cache=False))
+    inicio = time.perf_counter()
+    try:
+        tabela(digitalizado)
+        raise AssertionError("prazo do OCR não foi aplicado")
+    except ErroOcr:
+        falha_prazo = time.perf_counter() - inicio
+    configurar_ocr(None)
+    try:
+        tabela(digitalizado)
+        raise AssertionError("PDF digitalizado sem OCR não falhou")
+    except ErroOcr:
+        pass
+    print(f"{args.linhas} linhas, {paginas} páginas, OCR sintético de {args.atraso:g} s por página; "
+          f"lançamentos conferidos, prazo de {args.atraso / 2:g} s falhou em {falha_prazo:.2f} s")
+
+    print(f"{'':<40} {'s':>8} {'páginas/s':>10}")
+
+    def linha(nome: str, segundos: float) -> None:
+        print(f"{nome:<40} {segundos:>8.3f} {paginas / segundos:>10.1f}")
+
+    linha("texto, sem OCR", melhor_tempo(lambda: tabela(com_texto), args.repeticoes))
+    configurar_ocr(fonte(args.processos))
+    linha("texto, com OCR configurado", melhor_tempo(lambda: tabela(com_texto), args.repeticoes))
+    for processos in sorted({1, args.processos}):
+        # Cache novo a cada repetição: todas as páginas passam pelo motor
+        def frio():
+            configurar_ocr(fonte(processos))
+            tabela(digitalizado)
+        linha(f"digitalizado, OCR ({processos} processo(s))", melhor_tempo(frio, args.repeticoes))
+    configurar_ocr(fonte(args.processos))
+    tabela(digitalizado)
+    linha("digitalizado, texto do cache", melhor_tempo(lambda: tabela(digitalizado), args.repeticoes))
+    configurar_ocr(None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=1000)
+    parser.add_argument("--atraso", type=float, default=0.2)
+    parser.add_argument("--processos", type=int, default=4)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as armazenamento:
+        executar(args, armazenamento)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compara a leitura genérica com a dos perfis de banco em extratos sintéticos.
+
+Uso: python benchmarks/bench_perfis.py [--linhas N] [--repeticoes R]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from app.extrator.extrator_extrato import ExtratorExtratoBancario  # noqa: E402
+from app.extrator.perfis_bancos import PERFIL_GENERICO, obter_perfil  # noqa: E402
+from sintetico import HISTORICOS, RUIDO, valor as _valor  # noqa: E402
+
+def _linha(codigo: str, r: random.Random) -> str:
+    data = f"{r.randint(1, 28):02d}/{r.randint(1, 12):02d}/2024"
+    historico = r.choice(HISTORICOS)
+    valor, saldo = _valor(r), _valor(r)
+    debito = r.random() < 0.5
+    if codigo == "001":
+        return f"{data} 0000 {r.randint(10000, 99999)} {historico} {valor} {'(-)' if debito else '(+)'} {saldo} C"
+    if codigo == "341":
+        return f"{data[:5]} {historico} {'-' if debito else ''}{valor} {saldo}"
+    return f"{data} {r.randint(100000, 999999)} {historico} {valor} {'D' if debito else 'C'} {saldo} C"
+
+
+def extrato(codigo: str, linhas: int, seed: int = 0) -> str:
+    """Texto no formato de extrair_texto_pdf, com cabeçalhos, saldos e ruído entre os lançamentos."""
+    r = random.Random(seed)
+    saida = []
+    for i in range(linhas):
+        if i % 40 == 0:
+            saida += [f"\n--- PÁGINA {i // 40 + 1} ---", "Agência 1234 Conta Corrente 56789-0",
+                      "Período 01/01/2024 a 31/12/2024", f"Saldo Anterior {_valor(r)}"]
+        saida.append(_linha(codigo, r))
+        if r.random() < 0.15:
+            saida.append(r.choice(RUIDO))
+        if r.random() < 0.05:
+            saida.append(f"SALDO DO DIA {_valor(r)}")
+    return "\n".join(saida) + "\n"
+
+
+def medir(funcao, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    extrator = ExtratorExtratoBancario()
+
+    print(f"{'banco':<28} {'genérico l/s':>13} {'perfil l/s':>11} {'ganho':>6} {'lanç. gen.':>10} {'lanç. perfil':>12}")
+    for codigo in ("001", "341", "104"):
+        perfil = obter_perfil(codigo)
+        texto = extrato(codigo, args.linhas)
+        linhas = texto.split("\n")
+
+        def generico():
+            return list(extrator._lancamentos_unicos(codigo, linhas, PERFIL_GENERICO))
+
+        def com_perfil():
+            return list(extrator._lancamentos_unicos(codigo, linhas, perfil))
+
+        t_generico = medir(generico, args.repeticoes)
+        t_perfil = medir(com_perfil, args.repeticoes)
+        print(f"{codigo + ' ' + perfil.nome:<28} {len(linhas) / t_generico:>13,.0f} {len(linhas) / t_perfil:>11,.0f} "
+              f"{t_generico / t_perfil:>5.1f}x {len(generico()):>10} {len(com_perfil()):>12}")
+
+
+if __name__ == "__main__":
+    main()
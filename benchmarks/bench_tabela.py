@@ -0,0 +1,117 @@
+"""
+Compara a lista de dicts com a TabelaLancamentos em memória por linha e no tempo de totais, duplicatas e ordenação.
+
+Uso: python benchmarks/bench_tabela.py [--linhas N] [--repeticoes R]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from conferencia import conferir  # noqa: E402
+from app.extrator.exportacao import _lotes, ordenar_por_data  # noqa: E402
+from app.extrator.tabela_lancamentos import TabelaLancamentos  # noqa: E402
+
+HISTORICOS = [
+    "PIX RECEBIDO", "PIX ENVIADO", "TED ENVIADA", "PAGAMENTO BOLETO", "TARIFA BANCARIA", "SAQUE 24H",
+    "RENDIMENTO POUPANCA", "DEB AUTOMATICO LUZ", "CRED SALARIO", "IOF", "JUROS", "COMPRA CARTAO",
+]
+
+
+def lancamentos(quantidade: int, seed: int = 0):
+    """Dicts no formato de _montar_lancamento, com ~5% de duplicatas e históricos parcialmente repetidos."""
+    r = random.Random(seed)
+    saida = []
+    for i in range(quantidade):
+        if saida and r.random() < 0.05:
+            saida.append(dict(r.choice(saida)))
+            continue
+        movimento = r.choice(("DÉBITO", "CRÉDITO"))
+        historico = r.choice(HISTORICOS)
+        if r.random() < 0.5:
+            historico += f" {r.randint(1, 10 ** 6)}"
+        centavos = r.randint(1, 10 ** 7)
+        saida.append({
+            'Data': f"{r.randint(1, 28):02d}/{r.randint(1, 12):02d}/2024",
+            'Movimento': movimento,
+            'Historico': historico,
+            'Valor': centavos / 100,
+            'Debito': '001' if movimento == 'CRÉDITO' else '',
+            'Credito': '001' if movimento == 'DÉBITO' else '',
+            'Centavos': centavos,
+        })
+    return saida
+
+
+def com_dicts(linhas):
+    # O caminho anterior: duas passagens para os totais, chaves em tupla e sort por dict
+    total_debitos = sum((l['Valor'] for l in linhas if l['Movimento'] == 'DÉBITO'), 0.0)
+    total_creditos = sum((l['Valor'] for l in linhas if l['Movimento'] == 'CRÉDITO'), 0.0)
+    vistos, unicos = set(), []
+    for l in linhas:
+        chave = (l['Data'], l['Valor'], l['Historico'][:20])
+        if chave not in vistos:
+            vistos.add(chave)
+            unicos.append(l)
+    return total_debitos, total_creditos, ordenar_por_data(unicos)
+
+
+def com_tabela(tabela):
+    totais = tabela.totais()
+    return totais, tabela.sem_duplicatas().ordenada_por_data()
+
+
+def memoria(construir) -> int:
+    gc.collect()
+    tracemalloc.start()
+    objeto = construir()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objeto
+    return atual
+
+
+def medir(funcao, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=200000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    linhas = lancamentos(args.linhas)
+    tabela = TabelaLancamentos.de_lancamentos(linhas, '001')
+    unicos_dicts = com_dicts(linhas)[2]
+    conferir(tabela.sem_duplicatas().ordenada_por_data().para_dicts() == unicos_dicts,
+             "duplicatas e ordenação da tabela diferem das da lista de dicts")
+    conferir(tabela.sem_duplicatas().linhas() == [linha for lote in _lotes(unicos_dicts) for linha in lote],
+             "linhas exportadas da tabela diferem das da lista de dicts")
+
+    bytes_dicts = memoria(lambda: lancamentos(args.linhas))
+    bytes_tabela = memoria(lambda: TabelaLancamentos.de_lancamentos(lancamentos(args.linhas), '001'))
+    t_dicts = medir(lambda: com_dicts(linhas), args.repeticoes)
+    t_tabela = medir(lambda: com_tabela(tabela), args.repeticoes)
+    t_montar = medir(lambda: TabelaLancamentos.de_lancamentos(linhas, '001'), args.repeticoes)
+
+    print(f"{len(linhas):,} lançamentos ({len(unicos_dicts):,} únicos)")
+    print(f"{'':<28} {'dicts':>10} {'tabela':>10} {'ganho':>7}")
+    print(f"{'bytes por linha':<28} {bytes_dicts / len(linhas):>10.0f} {bytes_tabela / len(linhas):>10.0f} "
+          f"{bytes_dicts / bytes_tabela:>6.1f}x")
+    print(f"{'totais+duplicatas+ordem (s)':<28} {t_dicts:>10.3f} {t_tabela:>10.3f} {t_dicts / t_tabela:>6.1f}x")
+    print(f"{'montar a tabela (s)':<28} {'':>10} {t_montar:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
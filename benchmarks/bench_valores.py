@@ -0,0 +1,62 @@
+"""
+Mede a conversão de valores monetários (valores/s): limpeza genérica, centavos e normalizar_valor.
+
+A correção do caminho em centavos (igual à limpeza genérica, totais exatos)
+é conferida pelos testes, em tests/test_valores.py.
+
+Uso: python benchmarks/bench_valores.py [--valores N] [--repeticoes R]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import sintetico  # noqa: E402
+from app.extrator.extrator_extrato import ExtratorExtratoBancario  # noqa: E402
+from app.extrator.valores import centavos, valor_texto_livre  # noqa: E402
+
+
+def textos_valor(quantidade: int, seed: int = 0):
+    """Valores no formato dos extratos, com sinal e de todos os tamanhos."""
+    r = random.Random(seed)
+    saida = []
+    for _ in range(quantidade):
+        texto = sintetico.valor(r) if r.random() < 0.9 else f"{r.randint(0, 99)},{r.randint(0, 99):02d}"
+        saida.append(r.choice(("", "", "-", "+")) + texto)
+    return saida
+
+
+def medir(funcao, textos, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for texto in textos:
+            funcao(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return len(textos) / melhor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--valores", type=int, default=200000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    textos = textos_valor(args.valores)
+    extrator = ExtratorExtratoBancario()
+    print(f"{len(textos):,} valores")
+    print(f"{'':<34} {'valores/s':>12}")
+    for nome, funcao in (
+        ("limpeza genérica", valor_texto_livre),
+        ("centavos", centavos),
+        ("normalizar_valor", extrator.normalizar_valor),
+    ):
+        print(f"{nome:<34} {medir(funcao, textos, args.repeticoes):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Vazão da classificação das linhas do extrato (linhas/s), no checkout e em outros commits.
+
+Mede eh_linha_transacao e processar_linha_extrato linha a linha e
+extrair_lancamentos no texto inteiro, sobre o texto de um extrato sintético.
+Para o antes/depois do varredor de linhas, passe o commit anterior a ele:
+
+    python benchmarks/bench_varredor.py --antes <commit>
+
+Uso: python benchmarks/bench_varredor.py [--lancamentos N] [--repeticoes R] [--antes REV ...]
+"""
+import argparse
+import json
+import logging
+import time
+
+import revisoes
+import sintetico
+
+BANCO = "999"
+BENCHMARKS = ("eh_linha_transacao", "processar_linha", "extrair_lancamentos")
+
+
+def melhor_tempo(funcao, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def medir(args) -> dict:
+    """Linhas/s de cada benchmark com o src/ em uso (os métodos existem desde a primeira versão do extrator)."""
+    revisoes.usar_src(args.src)
+    logging.disable(logging.CRITICAL)
+    from app.extrator.extrator_extrato import ExtratorExtratoBancario
+
+    texto = sintetico.texto(sintetico.gerar(args.lancamentos))
+    linhas = [linha.strip() for linha in texto.split("\n")]
+    extrator = ExtratorExtratoBancario()
+
+    def classificar():
+        for linha in linhas:
+            extrator.eh_linha_transacao(linha)
+
+    def processar():
+        for linha in linhas:
+            extrator.processar_linha_extrato(BANCO, linha)
+
+    funcoes = dict(eh_linha_transacao=classificar, processar_linha=processar,
+                   extrair_lancamentos=lambda: extrator.extrair_lancamentos(BANCO, texto))
+    return dict(linhas=len(linhas), lancamentos=len(extrator.extrair_lancamentos(BANCO, texto)),
+                linhas_por_segundo={nome: len(linhas) / melhor_tempo(funcoes[nome], args.repeticoes)
+                                    for nome in BENCHMARKS})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lancamentos", type=int, default=50000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--antes", nargs="*", default=[], metavar="REV", help="commits a comparar com o checkout")
+    parser.add_argument("--src", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.src:
+        print(json.dumps(medir(args)))
+        return
+
+    repassar = ["--lancamentos", str(args.lancamentos), "--repeticoes", str(args.repeticoes)]
+    resultados = {rev: revisoes.medir_revisao(__file__, rev, repassar) for rev in args.antes}
+    resultados["checkout"] = medir(args)
+    atual = resultados["checkout"]["linhas_por_segundo"]
+
+    print(f"{resultados['checkout']['linhas']:,} linhas; linhas/s (ganho do checkout sobre cada commit)")
+    print(f"{'':<22}" + "".join(f"{rev:>22}" for rev in resultados))
+    for nome in BENCHMARKS:
+        celulas = []
+        for rev, resultado in resultados.items():
+            vazao = resultado["linhas_por_segundo"][nome]
+            ganho = f" ({atual[nome] / vazao:.2f}x)" if rev != "checkout" else ""
+            celulas.append(f"{vazao:,.0f}{ganho}")
+        print(f"{nome:<22}" + "".join(f"{celula:>22}" for celula in celulas))
+    print(f"{'lançamentos':<22}" + "".join(f"{r['lancamentos']:>22,}" for r in resultados.values()))
+
+
+if __name__ == "__main__":
+    main()
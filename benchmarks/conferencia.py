@@ -0,0 +1,17 @@
+"""
+Conferências de correção dos benchmarks.
+
+São a guarda de que o caminho medido ainda dá o resultado certo: ao contrário
+de assert, continuam valendo com python -O, e a falha encerra o benchmark com
+código de saída diferente de zero.
+"""
+
+
+class FalhaConferencia(Exception):
+    """Um resultado conferido pelo benchmark não é o esperado."""
+
+
+def conferir(condicao, mensagem) -> None:
+    """Levanta FalhaConferencia(mensagem) se a condição for falsa."""
+    if not condicao:
+        raise FalhaConferencia(mensagem)
@@ -0,0 +1,42 @@
+"""
+Medições com o código de outro commit, para comparar antes e depois de uma mudança sem trocar o checkout.
+
+O src/ do commit é extraído (git archive) num diretório temporário e o
+próprio benchmark roda de novo num processo novo, com --src apontando para
+ele; o processo imprime o resultado em JSON. O extrato sintético vem do
+sintetico.py atual, então as duas versões medem o mesmo documento.
+"""
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from typing import List
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def usar_src(src: str) -> None:
+    """Põe o src/ dado (o do checkout, por padrão) na frente do sys.path."""
+    sys.path.insert(0, src or os.path.join(RAIZ, "src"))
+
+
+def extrair_src(revisao: str, destino: str) -> str:
+    """Extrai o src/ do commit revisao em destino e retorna o caminho dele."""
+    arquivo = subprocess.run(["git", "archive", "--format=tar", revisao, "src"], cwd=RAIZ,
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(arquivo)) as tar:
+        tar.extractall(destino)
+    return os.path.join(destino, "src")
+
+
+def medir_revisao(script: str, revisao: str, argumentos: List[str]) -> dict:
+    """Roda `script --src <src da revisão> argumentos` e retorna o JSON que ele imprime."""
+    with tempfile.TemporaryDirectory() as destino:
+        src = extrair_src(revisao, destino)
+        # cwd no temporário: o que a versão antiga gravar em ./storage some com ele
+        saida = subprocess.run([sys.executable, os.path.abspath(script), "--src", src, *argumentos], cwd=destino,
+                               capture_output=True, text=True, check=True).stdout
+    return json.loads(saida)
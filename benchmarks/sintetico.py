@@ -0,0 +1,237 @@
+"""
+Extratos bancários sintéticos e determinísticos para os benchmarks, como texto ou PDF.
+
+O mesmo (linhas, seed, formato de data, indicador) gera sempre o mesmo extrato,
+então resultados de commits diferentes medem o mesmo documento.
+"""
+import random
+import re
+import uuid
+import zlib
+from datetime import date, timedelta
+from typing import Collection, List, NamedTuple
+
+HISTORICOS = [
+    "PIX RECEBIDO FULANO DE TAL", "PIX ENVIADO BELTRANO", "TED ENVIADA", "PAGAMENTO BOLETO",
+    "TARIFA BANCARIA", "SAQUE 24H", "DEPOSITO EM CHEQUE", "RENDIMENTO POUPANCA",
+    "DEB AUTOMATICO LUZ", "CRED SALARIO", "IOF", "JUROS", "TRANSF ENTRE CONTAS",
+    "SISPAG FORNECEDOR", "COMPRA CARTAO", "SEGURO VIDA",
+]
+RUIDO = ["OUTRO BANCO SA", "CPF 123.456.789-00", "Central de atendimento 4004 0001", "cont historico"]
+
+_MESES = ["JAN", "FEV", "MAR", "ABR", "MAI", "JUN", "JUL", "AGO", "SET", "OUT", "NOV", "DEZ"]
+
+FORMATOS_DATA = {
+    "dd/mm/aaaa": lambda d: f"{d.day:02d}/{d.month:02d}/{d.year}",
+    "dd/mm/aa": lambda d: f"{d.day:02d}/{d.month:02d}/{d.year % 100:02d}",
+    "dd-mm-aaaa": lambda d: f"{d.day:02d}-{d.month:02d}-{d.year}",
+    "dd/mm": lambda d: f"{d.day:02d}/{d.month:02d}",
+    "dd/mes": lambda d: f"{d.day:02d}/{_MESES[d.month - 1]}",
+}
+
+# Como o débito/crédito aparece depois do valor: 1.234,56 D | -1.234,56 | 1.234,56 (-)
+INDICADORES = ("dc", "sinal", "parenteses")
+
+# Cabe em uma página A4 com fonte 9 e entrelinha 11
+LINHAS_POR_PAGINA_MAX = 68
+
+# Linha de lançamento: data, histórico, valor (com o indicador) e saldo
+LANCAMENTO = re.compile(
+    r"(?P<data>\S+) (?P<historico>.+) (?P<valor>-?[\d.]+,\d\d)(?P<ind> [DC]| \([+-]\))? (?P<saldo>[\d.]+,\d\d)"
+)
+
+# Courier 9: todos os glifos com 600/1000 do tamanho
+_LARGURA_GLIFO = 0.6 * 9
+
+
+class Extrato(NamedTuple):
+    paginas: List[List[str]]
+    lancamentos: int
+    # Históricos que continuam no topo da página seguinte (ver gerar)
+    continuacoes: int = 0
+
+    @property
+    def linhas(self) -> int:
+        return sum(len(pagina) for pagina in self.paginas)
+
+
+def valor(r: random.Random) -> str:
+    v = r.randint(1, 9999999)
+    return f"{v // 100:,}".replace(",", ".") + f",{v % 100:02d}"
+
+
+def _com_indicador(texto: str, debito: bool, indicador: str) -> str:
+    if indicador == "dc":
+        return f"{texto} {'D' if debito else 'C'}"
+    if indicador == "sinal":
+        return f"-{texto}" if debito else texto
+    return f"{texto} {'(-)' if debito else '(+)'}"
+
+
+def gerar(lancamentos: int, linhas_por_pagina: int = 50, formato_data: str = "dd/mm/aaaa",
+          indicador: str = "dc", seed: int = 0, continuacoes: float = 0.0) -> Extrato:
+    """
+    Extrato com cabeçalho (período, agência, saldo anterior) em cada página,
+    lançamentos em datas crescentes a partir de 01/12/2023, históricos que
+    continuam na linha seguinte, linhas de ruído e saldos do dia.
+
+    continuacoes: chance de a página que termina num lançamento começar, antes
+    do cabeçalho, pela continuação do histórico dele ("NF ... PARCELA UNICA").
+    Sorteada à parte: com 0 o extrato é o mesmo de antes dessa opção.
+    """
+    if formato_data not in FORMATOS_DATA:
+        raise ValueError(f"formato_data deve ser um de: {', '.join(FORMATOS_DATA)}")
+    if indicador not in INDICADORES:
+        raise ValueError(f"indicador deve ser um de: {', '.join(INDICADORES)}")
+    # Cada lançamento pode trazer mais duas linhas (ruído e saldo) depois da checagem do fim da página
+    linhas_por_pagina = min(max(10, linhas_por_pagina), LINHAS_POR_PAGINA_MAX - 2)
+
+    r = random.Random(seed)
+    formatar = FORMATOS_DATA[formato_data]
+    inicio = date(2023, 12, 1)
+    # Uns 20 lançamentos por dia, então extratos grandes atravessam a virada do ano
+    fim = inicio + timedelta(days=max(1, lancamentos // 20))
+    cabecalho = [
+        "BANCO SINTETICO S.A. - EXTRATO DE CONTA CORRENTE",
+        "Agência 1234 Conta Corrente 56789-0",
+        f"Período {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}",
+        "Data Histórico Valor Saldo",
+    ]
+
+    paginas: List[List[str]] = []
+    pagina: List[str] = []
+    dia = inicio
+    r_continuacao = random.Random(seed + 1)
+    continuacao = ""
+    total_continuacoes = 0
+    for i in range(lancamentos):
+        if not pagina:
+            pagina = [continuacao] if continuacao else []
+            pagina += cabecalho + [f"Saldo Anterior {valor(r)}"]
+            continuacao = ""
+        if i and i % 20 == 0:
+            dia += timedelta(days=1)
+        debito = r.random() < 0.5
+        pagina.append(f"{formatar(dia)} {r.choice(HISTORICOS)} {_com_indicador(valor(r), debito, indicador)} {valor(r)}")
+        if r.random() < 0.1:
+            pagina.append(r.choice(RUIDO))
+        if r.random() < 0.05:
+            pagina.append(f"SALDO DO DIA {valor(r)}")
+        if len(pagina) >= linhas_por_pagina:
+            if i + 1 < lancamentos and pagina[-1][:1].isdigit() and r_continuacao.random() < continuacoes:
+                continuacao = f"NF {r_continuacao.randint(10000, 99999)} PARCELA UNICA"
+                total_continuacoes += 1
+            paginas.append(pagina)
+            pagina = []
+    if pagina:
+        paginas.append(pagina)
+    return Extrato(paginas, lancamentos, total_continuacoes)
+
+
+def texto(extrato: Extrato) -> str:
+    """O texto no formato de ExtratorExtratoBancario.extrair_texto_pdf."""
+    return "".join(f"\n--- PÁGINA {i} ---\n" + "\n".join(pagina) + "\n" for i, pagina in enumerate(extrato.paginas, 1))
+
+
+def _literal(texto: str) -> str:
+    return "(" + texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _celulas(pagina: List[str]) -> str:
+    """
+    Conteúdo de uma página em colunas, como nos extratos gerados por relatórios:
+    cada célula é um Tj posicionado por Tm, com valor e saldo alinhados à
+    direita. O indicador vem num Tj logo depois do valor, sem novo
+    posicionamento; continuações e ruído ficam na coluna do histórico e as
+    demais linhas (cabeçalho, saldos) na margem.
+    """
+    comandos = ["BT /F2 9 Tf"]
+    for i, linha in enumerate(pagina):
+        y = 800 - 11 * i
+        m = LANCAMENTO.fullmatch(linha)
+        if m is None:
+            x = 110 if linha in RUIDO or linha.endswith("PARCELA UNICA") else 40
+            comandos.append(f"1 0 0 1 {x} {y} Tm {_literal(linha)} Tj")
+            continue
+        valor, saldo = m.group("valor"), m.group("saldo")
+        comandos.append(
+            f"1 0 0 1 40 {y} Tm {_literal(m.group('data'))} Tj "
+            f"1 0 0 1 110 {y} Tm {_literal(m.group('historico'))} Tj "
+            f"1 0 0 1 {400 - _LARGURA_GLIFO * len(valor):.1f} {y} Tm {_literal(valor)} Tj"
+            + (f" {_literal(m.group('ind'))} Tj" if m.group("ind") else "")
+            + f" 1 0 0 1 {540 - _LARGURA_GLIFO * len(saldo):.1f} {y} Tm {_literal(saldo)} Tj"
+        )
+    comandos.append("ET")
+    return "\n".join(comandos)
+
+
+def pdf(extrato: Extrato, digitalizadas: Collection[int] = (), colunas: bool = False, paleta: bool = False) -> bytes:
+    """
+    PDF mínimo (Helvetica, WinAnsi), uma linha de texto por linha do extrato.
+
+    As páginas em digitalizadas (índices a partir de 0) não têm texto, só uma
+    imagem em tons de cinza (Flate) cujas linhas de pixels são os bytes cp1252
+    das linhas do extrato: um "escaneado" que o OCR sintético do bench_ocr lê de volta.
+    Com paleta, a imagem usa /Indexed sobre /DeviceGray com a paleta identidade
+    (os mesmos pixels, por outro caminho de decodificação).
+
+    Com colunas, as páginas de texto usam Courier com /Widths e cada célula
+    num Tj próprio (ver _celulas), o layout que o motor de colunas lê.
+    """
+    objetos = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    recursos_texto = b"<< /Font << /F1 1 0 R >> >>"
+    if colunas:
+        objetos.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding "
+                       b"/FirstChar 32 /LastChar 255 /Widths [%s] >>" % b" ".join([b"600"] * 224))
+        recursos_texto = b"<< /Font << /F1 1 0 R /F2 2 0 R >> >>"
+    espaco = b"[/Indexed /DeviceGray 255 <%s>]" % bytes(range(256)).hex().encode() if paleta else b"/DeviceGray"
+    paginas = []
+    for i, pagina in enumerate(extrato.paginas):
+        if i in digitalizadas:
+            largura = max(len(linha) for linha in pagina)
+            pixels = zlib.compress(b"".join(linha.encode("cp1252").ljust(largura) for linha in pagina))
+            objetos.append(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s "
+                           b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n%s\nendstream"
+                           % (largura, len(pagina), espaco, len(pixels), pixels))
+            recursos = b"<< /XObject << /Im1 %d 0 R >> >>" % len(objetos)
+            corpo = b"q 595 0 0 842 0 0 cm /Im1 Do Q"
+        elif colunas:
+            recursos = recursos_texto
+            corpo = _celulas(pagina).encode("cp1252")
+        else:
+            linhas = [_literal(linha) + " Tj T*" for linha in pagina]
+            recursos = recursos_texto
+            corpo = "\n".join(["BT /F1 9 Tf 11 TL 40 800 Td"] + linhas + ["ET"]).encode("cp1252")
+        objetos.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(corpo), corpo))
+        paginas.append((recursos, len(objetos)))
+    id_paginas = len(objetos) + len(extrato.paginas) + 1
+    kids = []
+    for recursos, conteudo in paginas:
+        objetos.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources %s /Contents %d 0 R >>" % (id_paginas, recursos, conteudo))
+        kids.append(b"%d 0 R" % len(objetos))
+    objetos.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids)))
+    objetos.append(b"<< /Type /Catalog /Pages %d 0 R >>" % id_paginas)
+
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for i, objeto in enumerate(objetos, 1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n%s\nendobj\n" % (i, objeto)
+    xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    saida += b"".join(b"%010d 00000 n \n" % p for p in posicoes)
+    saida += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, len(objetos), xref)
+    return bytes(saida)
+
+
+def multipart(campos: dict, pdf: bytes):
+    """Corpo multipart/form-data com os campos e o PDF em "file", para enviar à API sem dependências."""
+    limite = uuid.uuid4().hex
+    partes = []
+    for nome, valor in campos.items():
+        partes.append(f'--{limite}\r\nContent-Disposition: form-data; name="{nome}"\r\n\r\n{valor}\r\n'.encode())
+    partes.append(f'--{limite}\r\nContent-Disposition: form-data; name="file"; filename="extrato.pdf"\r\n'
+                  f'Content-Type: application/pdf\r\n\r\n'.encode() + pdf + b"\r\n")
+    partes.append(f"--{limite}--\r\n".encode())
+    return b"".join(partes), f"multipart/form-data; boundary={limite}"
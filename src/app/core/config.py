@@ -4,6 +4,56 @@ from pydantic import BaseModel
 class Settings(BaseModel):
     STORAGE_UPLOADS: str = os.getenv("STORAGE_UPLOADS", "./storage/uploads")
     STORAGE_EXPORTS: str = os.getenv("STORAGE_EXPORTS", "./storage/exports")
+    STORAGE_CACHE: str = os.getenv("STORAGE_CACHE", "./storage/cache")
+    # Razões por conta das ingestões incrementais (/api/v1/ledgers/{account}/ingest)
+    STORAGE_LEDGERS: str = os.getenv("STORAGE_LEDGERS", "./storage/ledgers")
+    # Texto das páginas digitalizadas já reconhecido pelo OCR, pela impressão das imagens da página
+    STORAGE_OCR: str = os.getenv("STORAGE_OCR", "./storage/ocr")
+    # Tamanho máximo do cache de resultados em disco (0 desativa o cache)
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    # Grava os PDFs enviados em STORAGE_UPLOADS; com false, extrações síncronas leem o upload da memória
+    PERSIST_UPLOADS: bool = os.getenv("PERSIST_UPLOADS", "true").lower() in ("1", "true", "yes")
+    # Limpeza de STORAGE_UPLOADS e STORAGE_EXPORTS: idade máxima dos arquivos e tamanho máximo de cada
+    # diretório (0 desliga cada limite), aplicados a cada STORAGE_SWEEP_SECONDS (0 desliga a limpeza)
+    UPLOADS_TTL_SECONDS: int = int(os.getenv("UPLOADS_TTL_SECONDS", str(24 * 3600)))
+    UPLOADS_MAX_BYTES: int = int(os.getenv("UPLOADS_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+    EXPORTS_TTL_SECONDS: int = int(os.getenv("EXPORTS_TTL_SECONDS", str(7 * 24 * 3600)))
+    EXPORTS_MAX_BYTES: int = int(os.getenv("EXPORTS_MAX_BYTES", str(4 * 1024 * 1024 * 1024)))
+    STORAGE_SWEEP_SECONDS: float = float(os.getenv("STORAGE_SWEEP_SECONDS", "600"))
+    OCR_CACHE_TTL_SECONDS: int = int(os.getenv("OCR_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    OCR_CACHE_MAX_BYTES: int = int(os.getenv("OCR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    # Processos usados para extrair o texto das páginas do PDF em paralelo
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+    # Fila de extrações assíncronas (?async=1)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+    JOB_TTL_SECONDS: int = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+    # Lote (/api/v1/extract/batch): processos em paralelo e máximo de PDFs por requisição
+    BATCH_WORKERS: int = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+    BATCH_MAX_FILES: int = int(os.getenv("BATCH_MAX_FILES", "500"))
+    # Processos que executam as extrações síncronas e assíncronas, fora das threads do servidor
+    # (0 extrai na própria thread da requisição)
+    EXTRACT_PROCESSES: int = int(os.getenv("EXTRACT_PROCESSES", str(os.cpu_count() or 1)))
+    # Controle de admissão: extrações ao mesmo tempo (0 desliga o controle), soma máxima dos custos
+    # estimados (por página e por MB do PDF), espera máxima na fila e tamanho da fila; quem não entra
+    # recebe 503 com Retry-After
+    ADMISSION_MAX_RUNNING: int = int(os.getenv("ADMISSION_MAX_RUNNING", str(os.cpu_count() or 1)))
+    ADMISSION_CAPACITY: float = float(os.getenv("ADMISSION_CAPACITY", str(200 * (os.cpu_count() or 1))))
+    ADMISSION_PAGE_COST: float = float(os.getenv("ADMISSION_PAGE_COST", "1"))
+    ADMISSION_MB_COST: float = float(os.getenv("ADMISSION_MB_COST", "10"))
+    ADMISSION_MAX_WAIT_SECONDS: float = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+    ADMISSION_MAX_QUEUED: int = int(os.getenv("ADMISSION_MAX_QUEUED", "16"))
+    # OCR das páginas digitalizadas (sem texto, só imagens) com o Tesseract local; só é usado com os pacotes
+    # pytesseract e Pillow e o executável TESSERACT_CMD instalados. Idioma do Tesseract, processos do pool de
+    # OCR (uma página por processo) e prazo para todas as páginas de um documento
+    OCR_ENABLED: bool = os.getenv("OCR_ENABLED", "true").lower() in ("1", "true", "yes")
+    OCR_LANG: str = os.getenv("OCR_LANG", "por")
+    TESSERACT_CMD: str = os.getenv("TESSERACT_CMD", "tesseract")
+    OCR_PROCESSES: int = int(os.getenv("OCR_PROCESSES", str(os.cpu_count() or 1)))
+    OCR_TIMEOUT_SECONDS: float = float(os.getenv("OCR_TIMEOUT_SECONDS", "120"))
+    # Tempos por etapa e contagens de cada extração em histogramas (/metrics); com false nada é medido,
+    # exceto nas requisições que pedem ?timings=true
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000,http://192.168.1.141:6100")
 
     
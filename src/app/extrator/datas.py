@@ -0,0 +1,202 @@
+import re
+from datetime import date, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+MESES_ABREV = {
+    'jan': '01', 'fev': '02', 'mar': '03', 'abr': '04',
+    'mai': '05', 'jun': '06', 'jul': '07', 'ago': '08',
+    'set': '09', 'out': '10', 'nov': '11', 'dez': '12'
+}
+
+# Linhas do início do extrato em que o período é procurado
+LINHAS_CABECALHO = 80
+
+# Datas distintas guardadas por extrato antes de o cache ser esvaziado
+LIMITE_CACHE = 4096
+
+_MES = re.compile('|'.join(MESES_ABREV))
+_NAO_DATA = re.compile(r'[^\d\/\-]')
+# DD/MM, DD/MM/AA ou DD/MM/AAAA (ou com '-'), com o mesmo separador nas duas posições
+_NUMERICA = re.compile(r'(\d{1,2})([/-])(\d{1,2})(?:\2(\d{4}|\d{2}))?')
+
+_DATA = r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})'
+# "Período: 01/12/2023 a 31/01/2024", "de 01/12/2023 até 31/01/2024"
+_PERIODO_DATAS = re.compile(rf'{_DATA}\s*(?:a|à|até|ate|-|–)\s*{_DATA}', re.IGNORECASE)
+# "Mês de referência: 01/2024", "Período: janeiro/2024", "Referência: JAN de 2024";
+# palavras inteiras, para "REMESSA 03/2024" ou "semestre 1 de 2024" não virarem período
+_PERIODO_MES = re.compile(
+    r'\b(?:per[ií]odo|refer[eê]ncia|m[eê]s)\b\D{0,25}?'
+    r'(?:(\d{1,2})|(' + '|'.join(MESES_ABREV) + r')[a-zç]*)\s*(?:/|de)\s*(\d{4})\b',
+    re.IGNORECASE,
+)
+
+
+def _numero(ano: int, mes: int, dia: int) -> int:
+    # Posição crescente no calendário que aceita dias inexistentes (31/02)
+    return ano * 372 + (mes - 1) * 31 + (dia - 1)
+
+
+class PeriodoExtrato(NamedTuple):
+    inicio: date
+    fim: date
+
+
+def detectar_periodo(linhas: Iterable[str]) -> Optional[PeriodoExtrato]:
+    """
+    Período do extrato informado no cabeçalho, como intervalo de datas ou mês/ano.
+
+    Retorna None se nenhuma linha tiver um período reconhecível.
+    """
+    for linha in linhas:
+        m = _PERIODO_DATAS.search(linha)
+        if m:
+            try:
+                inicio = date(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+                fim = date(int(m.group(6)), int(m.group(5)), int(m.group(4)))
+            except ValueError:
+                continue
+            if inicio <= fim:
+                return PeriodoExtrato(inicio, fim)
+            continue
+        m = _PERIODO_MES.search(linha)
+        if m:
+            mes = int(m.group(1)) if m.group(1) else int(MESES_ABREV[m.group(2).lower()])
+            ano = int(m.group(3))
+            if 1 <= mes <= 12:
+                proximo = date(ano + mes // 12, mes % 12 + 1, 1)
+                return PeriodoExtrato(date(ano, mes, 1), proximo - timedelta(days=1))
+    return None
+
+
+def sem_periodo(texto: str) -> str:
+    """O texto sem os intervalos de datas de período ("01/12/2023 a 17/12/2023")."""
+    return _PERIODO_DATAS.sub('', texto)
+
+
+class NormalizadorDatas:
+    """
+    Normaliza as datas de um extrato para DD/MM/AAAA, com cache por texto de data.
+
+    Datas sem ano (DD/MM, DD/mês) recebem o ano que as coloca dentro do período
+    do extrato (ou o mais perto dele), o que resolve a virada de dezembro para
+    janeiro. Sem período conhecido, vale o último ano até hoje: extratos não
+    têm lançamentos futuros.
+
+    Um normalizador serve a um único extrato; o período pode ser passado na
+    criação ou lido do cabeçalho (ler_cabecalho / observar_cabecalho).
+    """
+
+    __slots__ = ('periodo', '_inicio', '_fim', '_anos', '_cache')
+
+    def __init__(self, periodo: Optional[PeriodoExtrato] = None):
+        self._cache: Dict[str, str] = {}
+        self.definir_periodo(periodo)
+
+    def definir_periodo(self, periodo: Optional[PeriodoExtrato]) -> None:
+        self.periodo = periodo
+        if periodo is None:
+            hoje = date.today()
+            periodo = PeriodoExtrato(hoje - timedelta(days=365) + timedelta(days=1), hoje)
+        self._inicio = _numero(periodo.inicio.year, periodo.inicio.month, periodo.inicio.day)
+        self._fim = _numero(periodo.fim.year, periodo.fim.month, periodo.fim.day)
+        self._anos = (periodo.inicio.year, periodo.fim.year)
+        self._cache.clear()
+
+    def ler_cabecalho(self, linhas: Iterable[str]) -> None:
+        """Usa o período encontrado nas primeiras LINHAS_CABECALHO linhas, se houver."""
+        periodo = detectar_periodo(islice(linhas, LINHAS_CABECALHO))
+        if periodo is not None:
+            self.definir_periodo(periodo)
+
+    def observar_cabecalho(self, linhas: Iterable[str]) -> Iterator[str]:
+        """
+        Repassa as linhas procurando o período nas primeiras LINHAS_CABECALHO,
+        para leituras em fluxo, em que o cabeçalho chega antes dos lançamentos.
+        """
+        iterador = iter(linhas)
+        for linha in islice(iterador, LINHAS_CABECALHO):
+            if self.periodo is None:
+                periodo = detectar_periodo((linha,))
+                if periodo is not None:
+                    self.definir_periodo(periodo)
+            yield linha
+        yield from iterador
+
+    def ano_para(self, dia: int, mes: int) -> int:
+        """Ano em que DD/MM cai dentro do período, ou o mais perto dele."""
+        primeiro, ultimo = self._anos
+
+        def distancia(ano: int):
+            posicao = _numero(ano, mes, dia)
+            fora = max(self._inicio - posicao, posicao - self._fim, 0)
+            return fora, not (primeiro <= ano <= ultimo), ano
+
+        return min(range(primeiro - 1, ultimo + 2), key=distancia)
+
+    def normalizar(self, data_str: str) -> str:
+        """
+        Retorna a data no formato DD/MM/AAAA, ou o texto recebido se não for uma data válida.
+        """
+        data = self._cache.get(data_str)
+        if data is None:
+            data = self._normalizar(data_str)
+            if len(self._cache) >= LIMITE_CACHE:
+                self._cache.clear()
+            self._cache[data_str] = data
+        return data
+
+    def _normalizar(self, data_str: str) -> str:
+        data_limpa = data_str.strip()
+        if _MES.search(data_limpa.lower()):
+            return self.converter_mes_abrev(data_limpa)
+
+        m = _NUMERICA.fullmatch(_NAO_DATA.sub('', data_str))
+        if not m:
+            return data_str
+        dia, mes, ano = int(m.group(1)), int(m.group(3)), m.group(4)
+        if ano is None:
+            # DD-MM sem ano costuma ser pedaço de valores ("8.095,03-8.095"), não data
+            if m.group(2) == '-' or not 1 <= mes <= 12:
+                return data_str
+            ano = self.ano_para(dia, mes)
+        elif len(ano) == 2:
+            # Mesma virada do %y: 69-99 -> 1900, 00-68 -> 2000
+            ano = int(ano) + (1900 if int(ano) >= 69 else 2000)
+        else:
+            ano = int(ano)
+        try:
+            date(ano, mes, dia)
+        except ValueError:
+            return data_str
+        return f"{dia:02d}/{mes:02d}/{ano}"
+
+    def converter_mes_abrev(self, data_str: str) -> str:
+        """Data com mês abreviado (maiúsculas ou minúsculas), como '05/jan' ou '5 - JAN'."""
+        partes = re.sub(r'\s+', '', data_str).replace('-', '/').split('/')
+        if len(partes) != 2:
+            return data_str
+        dia, mes_abrev = partes
+        mes_num = MESES_ABREV.get(mes_abrev.lower())
+        if mes_num is None:
+            return data_str
+        if dia.isdigit():
+            ano = self.ano_para(int(dia), int(mes_num))
+        else:
+            ano = self._anos[1]
+        return f"{dia.zfill(2)}/{mes_num}/{ano}"
+
+
+_padrao: Optional[Tuple[date, NormalizadorDatas]] = None
+
+
+def normalizador_padrao() -> NormalizadorDatas:
+    """
+    Normalizador sem período, compartilhado pelas chamadas que não informam o
+    extrato (normalizar_data avulso); recriado quando o dia muda.
+    """
+    global _padrao
+    hoje = date.today()
+    if _padrao is None or _padrao[0] != hoje:
+        _padrao = (hoje, NormalizadorDatas())
+    return _padrao[1]
@@ -0,0 +1,332 @@
+import csv
+import importlib.util
+import json
+import os
+import re
+import uuid
+import zipfile
+from contextlib import contextmanager
+from datetime import date, datetime
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Union
+from xml.sax.saxutils import escape, quoteattr
+
+if TYPE_CHECKING:
+    from app.extrator.tabela_lancamentos import TabelaLancamentos
+
+# Ordem das colunas nas exportações
+COLUNAS = ['Data', 'Movimento', 'Historico', 'Valor', 'Debito', 'Credito']
+
+LARGURA_MAXIMA = 50
+
+# Lista de dicts no formato de Lancamento ou a tabela em colunas (tabela_lancamentos)
+Lancamentos = Union[List[Dict[str, Any]], 'TabelaLancamentos']
+
+# Linhas montadas e escritas por vez (ver _lotes)
+_LOTE_LINHAS = 2000
+
+# Caracteres de controle que não podem aparecer em XML
+_CARACTERES_INVALIDOS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Estilo 1 = cabeçalho em negrito, com borda fina e centralizado (o mesmo do pandas.to_excel)
+_ESTILOS = (
+    _XML + f'<styleSheet xmlns="{_NS_MAIN}">'
+    '<fonts count="2"><font><sz val="11"/><color theme="1"/><name val="Calibri"/><family val="2"/><scheme val="minor"/></font>'
+    '<font><b val="1"/></font></fonts>'
+    '<fills count="2"><fill><patternFill/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" applyFont="1" applyBorder="1" applyAlignment="1" xfId="0">'
+    '<alignment horizontal="center" vertical="top"/></xf></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def chave_data(data_str: str) -> Optional[int]:
+    """
+    Converte 'DD/MM/AAAA' em um inteiro AAAAMMDD ordenável.
+
+    Retorna None para datas que não estão nesse formato ou são inválidas;
+    elas ficam no fim da ordenação.
+    """
+    if len(data_str) == 10 and data_str[2] == '/' and data_str[5] == '/':
+        dia, mes, ano = data_str[:2], data_str[3:5], data_str[6:]
+        if dia.isdigit() and mes.isdigit() and ano.isdigit():
+            try:
+                date(int(ano), int(mes), int(dia))
+            except ValueError:
+                return None
+            return int(ano) * 10000 + int(mes) * 100 + int(dia)
+    try:
+        data_obj = datetime.strptime(data_str, '%d/%m/%Y')
+    except ValueError:
+        return None
+    return data_obj.year * 10000 + data_obj.month * 100 + data_obj.day
+
+
+def ordenar_por_data(lancamentos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Ordena os lançamentos pela data (estável: mesma data mantém a ordem do extrato).
+    """
+    chaves: Dict[str, Optional[int]] = {}
+    for lancamento in lancamentos:
+        data = lancamento['Data']
+        if data not in chaves:
+            chaves[data] = chave_data(data)
+
+    def ordem(lancamento):
+        chave = chaves[lancamento['Data']]
+        return (1, 0) if chave is None else (0, chave)
+
+    return sorted(lancamentos, key=ordem)
+
+
+def _larguras(lancamentos: Lancamentos) -> List[int]:
+    if isinstance(lancamentos, list):
+        maiores = [max((len(str(lancamento[coluna])) for lancamento in lancamentos), default=0) for coluna in COLUNAS]
+    else:
+        maiores = lancamentos.maiores_textos()
+    return [min(max(len(coluna), maior) + 2, LARGURA_MAXIMA) for coluna, maior in zip(COLUNAS, maiores)]
+
+
+def _celula(referencia: str, valor: Any, estilo: str = '') -> str:
+    if isinstance(valor, str):
+        if not valor:
+            return ''
+        if _CARACTERES_INVALIDOS.search(valor):
+            valor = _CARACTERES_INVALIDOS.sub('', valor)
+        espaco = ' xml:space="preserve"' if valor != valor.strip() else ''
+        return f'<c r="{referencia}"{estilo} t="inlineStr"><is><t{espaco}>{escape(valor)}</t></is></c>'
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}"{estilo} t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return f'<c r="{referencia}"{estilo} t="n"><v>{valor!r}</v></c>'
+
+
+def _escrever_aba(arquivo_zip: zipfile.ZipFile, caminho: str, lancamentos: Lancamentos) -> int:
+    letras = [chr(ord('A') + i) for i in range(len(COLUNAS))]
+
+    with arquivo_zip.open(caminho, 'w') as bruto:
+        def escrever(texto: str):
+            bruto.write(texto.encode('utf-8'))
+
+        colunas = ''.join(
+            f'<col min="{i}" max="{i}" width="{largura}" customWidth="1"/>'
+            for i, largura in enumerate(_larguras(lancamentos), start=1)
+        )
+        escrever(
+            _XML + f'<worksheet xmlns="{_NS_MAIN}">'
+            f'<dimension ref="A1:{letras[-1]}{len(lancamentos) + 1}"/>'
+            f'<cols>{colunas}</cols><sheetData>'
+        )
+        cabecalho = ''.join(_celula(f'{letra}1', coluna, ' s="1"') for letra, coluna in zip(letras, COLUNAS))
+        escrever(f'<row r="1">{cabecalho}</row>')
+
+        numero = 1
+        for lote in _lotes(lancamentos):
+            partes = []
+            for numero, linha in enumerate(lote, start=numero + 1):
+                celulas = ''.join(_celula(f'{letra}{numero}', valor) for letra, valor in zip(letras, linha))
+                partes.append(f'<row r="{numero}">{celulas}</row>')
+            escrever(''.join(partes))
+        escrever('</sheetData></worksheet>')
+
+    return numero - 1
+
+
+def salvar_xlsx(abas: Dict[str, Lancamentos], arquivo_saida: str) -> int:
+    """
+    Grava as abas como XLSX escrevendo o XML das planilhas direto no zip, em lotes de linhas.
+
+    As larguras das colunas são calculadas a partir dos valores antes da
+    escrita em vez de reler cada célula. O arquivo é gravado em um temporário
+    e renomeado (ver _gravacao_atomica).
+
+    Returns:
+        int: Quantidade de linhas de lançamento gravadas
+    """
+    nomes = list(abas)
+    sobreposicoes = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(nomes) + 1)
+    )
+    tipos = (
+        _XML + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f'{sobreposicoes}</Types>'
+    )
+    relacoes_raiz = (
+        _XML + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    planilhas = ''.join(
+        f'<sheet name={quoteattr(nome)} sheetId="{i}" r:id="rId{i}"/>' for i, nome in enumerate(nomes, start=1)
+    )
+    livro = _XML + f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><sheets>{planilhas}</sheets></workbook>'
+    relacoes_livro = (
+        _XML + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + ''.join(
+            f'<Relationship Id="rId{i}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, len(nomes) + 1)
+        )
+        + f'<Relationship Id="rId{len(nomes) + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    )
+
+    total = 0
+    with _gravacao_atomica(arquivo_saida) as temporario:
+        with zipfile.ZipFile(temporario, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+            arquivo_zip.writestr('[Content_Types].xml', tipos)
+            arquivo_zip.writestr('_rels/.rels', relacoes_raiz)
+            arquivo_zip.writestr('xl/workbook.xml', livro)
+            arquivo_zip.writestr('xl/_rels/workbook.xml.rels', relacoes_livro)
+            arquivo_zip.writestr('xl/styles.xml', _ESTILOS)
+            for i, nome in enumerate(nomes, start=1):
+                total += _escrever_aba(arquivo_zip, f'xl/worksheets/sheet{i}.xml', abas[nome])
+    return total
+
+
+def salvar_csv(lancamentos: Lancamentos, arquivo_saida: str) -> int:
+    """
+    Grava os lançamentos como CSV (UTF-8, separador vírgula, cabeçalho com COLUNAS).
+
+    Returns:
+        int: Quantidade de linhas de lançamento gravadas
+    """
+    with _gravacao_atomica(arquivo_saida) as temporario:
+        with open(temporario, 'w', encoding='utf-8', newline='') as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(COLUNAS)
+            for lote in _lotes(lancamentos):
+                escritor.writerows(lote)
+    return len(lancamentos)
+
+
+def salvar_jsonl(lancamentos: Lancamentos, arquivo_saida: str) -> int:
+    """
+    Grava os lançamentos como JSON Lines: um objeto por linha, com as chaves de COLUNAS.
+
+    Returns:
+        int: Quantidade de linhas de lançamento gravadas
+    """
+    with _gravacao_atomica(arquivo_saida) as temporario:
+        with open(temporario, 'w', encoding='utf-8', newline='\n') as arquivo:
+            codificar = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+            for lote in _lotes(lancamentos):
+                arquivo.write(''.join(codificar(dict(zip(COLUNAS, linha))) + '\n' for linha in lote))
+    return len(lancamentos)
+
+
+def salvar_parquet(lancamentos: Lancamentos, arquivo_saida: str) -> int:
+    """
+    Grava os lançamentos como Parquet (requer pyarrow), um row group por lote de linhas.
+
+    Debito e Credito viram texto, já que o código do banco pode vir como número ou string.
+
+    Returns:
+        int: Quantidade de linhas de lançamento gravadas
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Exportação parquet requer o pacote pyarrow.")
+
+    esquema = pa.schema([
+        ('Data', pa.string()),
+        ('Movimento', pa.string()),
+        ('Historico', pa.string()),
+        ('Valor', pa.float64()),
+        ('Debito', pa.string()),
+        ('Credito', pa.string()),
+    ])
+    with _gravacao_atomica(arquivo_saida) as temporario:
+        with pq.ParquetWriter(temporario, esquema, compression='zstd') as escritor:
+            for lote in _lotes(lancamentos):
+                data, movimento, historico, valor, debito, credito = zip(*lote)
+                escritor.write_table(pa.table([
+                    list(data), list(movimento), list(historico), list(valor),
+                    [None if v is None else str(v) for v in debito],
+                    [None if v is None else str(v) for v in credito],
+                ], schema=esquema))
+    return len(lancamentos)
+
+
+def _lotes(lancamentos: Lancamentos) -> Iterator[List[tuple]]:
+    """
+    Linhas exportadas (tuplas na ordem de COLUNAS, ordenadas por data) em lotes
+    de _LOTE_LINHAS, montados à medida que a escrita avança: só um lote fica em
+    memória. A tabela em colunas ordena e converte sem montar dicts.
+    """
+    if not isinstance(lancamentos, list):
+        yield from lancamentos.lotes_linhas(_LOTE_LINHAS)
+        return
+    obter = itemgetter(*COLUNAS)
+    ordenados = ordenar_por_data(lancamentos)
+    for inicio in range(0, len(ordenados), _LOTE_LINHAS):
+        yield [obter(lancamento) for lancamento in ordenados[inicio:inicio + _LOTE_LINHAS]]
+
+
+@contextmanager
+def _gravacao_atomica(arquivo_saida: str) -> Iterator[str]:
+    """
+    Fornece um caminho temporário e o renomeia para arquivo_saida no fim, então
+    quem lê o caminho final nunca vê um arquivo pela metade.
+    """
+    temporario = f"{arquivo_saida}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield temporario
+        os.replace(temporario, arquivo_saida)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+class FormatoExportacao(NamedTuple):
+    extensao: str
+    media_type: str
+    salvar: Callable[[Lancamentos, str], int]
+
+
+FORMATOS: Dict[str, FormatoExportacao] = {
+    'xlsx': FormatoExportacao(
+        '.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        lambda lancamentos, arquivo_saida: salvar_xlsx({'Extrato': lancamentos}, arquivo_saida),
+    ),
+    'csv': FormatoExportacao('.csv', 'text/csv; charset=utf-8', salvar_csv),
+    'jsonl': FormatoExportacao('.jsonl', 'application/x-ndjson', salvar_jsonl),
+    'parquet': FormatoExportacao('.parquet', 'application/vnd.apache.parquet', salvar_parquet),
+}
+
+
+def formatos_disponiveis() -> List[str]:
+    """
+    Formatos de exportação utilizáveis neste ambiente (parquet só com pyarrow instalado).
+    """
+    return [nome for nome in FORMATOS if nome != 'parquet' or importlib.util.find_spec('pyarrow') is not None]
+
+
+def media_type(arquivo: str) -> str:
+    """
+    Content-Type de um arquivo exportado, pela extensão.
+    """
+    extensao = os.path.splitext(arquivo)[1].lower()
+    for formato in FORMATOS.values():
+        if formato.extensao == extensao:
+            return formato.media_type
+    return 'application/octet-stream'
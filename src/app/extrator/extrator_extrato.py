@@ -1,12 +1,114 @@
 import PyPDF2
-import pandas as pd
+import io
+import mmap
+import os
 import re
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, List, Deque, Dict, Tuple, Optional, Iterable, Iterator, BinaryIO, Sequence, Union
 import logging
+from app.extrator.varredor_linhas import VarreduraLinha
+from app.extrator.datas import MESES_ABREV, NormalizadorDatas, PeriodoExtrato, normalizador_padrao
+from app.extrator.perfis_bancos import PERFIL_GENERICO, PerfilBanco, obter_perfil
+from app.extrator.layout_colunas import ColunasIndisponiveis, LinhaColunas, ler_colunas_pagina
+from app.extrator.exportacao import FORMATOS, Lancamentos, salvar_xlsx
+from app.extrator.tabela_lancamentos import TabelaLancamentos
+from app.extrator.incremental import (BordasPagina, PaginaExtraida, ResultadoIncremental, continuacoes_entre_paginas,
+                                     impressao_conteudo, impressao_texto)
+from app.extrator.ocr import ErroOcr, encerrar_ocr, fonte_ocr, pagina_digitalizada
+from app.extrator.valores import centavos, centavos_formatado, tipo_movimento, valor_texto_livre
+from app.extrator.medicao import (ETAPA_COLUNAS, ETAPA_DUPLICATAS, ETAPA_LINHAS, ETAPA_OCR, ETAPA_TEXTO, Medicao,
+                                  etapa)
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# Versão das regras de extração; mude ao alterar o resultado produzido para o mesmo PDF
+VERSAO_EXTRATOR = "1.8"
+
+# Caminho do PDF em disco ou o conteúdo já em memória
+OrigemPdf = Union[str, bytes]
+
+# Linha que extrair_texto_pdf põe antes do texto de cada página
+MARCADOR_PAGINA = re.compile(r'--- PÁGINA \d+ ---')
+
+# Motores de extração: texto corrido da página (extract_text + regex por linha)
+# ou colunas pela posição do texto na página (layout_colunas)
+MOTORES = ('texto', 'colunas')
+
+# Abaixo disso abrir o PDF em outro processo custa mais do que extrair as páginas direto
+PAGINAS_MINIMAS_POR_PROCESSO = 8
+
+_pools: Dict[int, 'ProcessPoolExecutor'] = {}
+_pools_lock = threading.Lock()
+
+_extratores: Dict[int, 'ExtratorExtratoBancario'] = {}
+_extratores_lock = threading.Lock()
+
+def _obter_pool(processos: int) -> 'ProcessPoolExecutor':
+    """Retorna o pool de processos compartilhado para a quantidade pedida."""
+    # Importado só quando há PDF grande a dividir: multiprocessing pesa na subida do worker
+    from concurrent.futures import ProcessPoolExecutor
+    with _pools_lock:
+        pool = _pools.get(processos)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=processos)
+            _pools[processos] = pool
+        return pool
+
+def encerrar_pools() -> None:
+    """Encerra os pools de processos das páginas e o do OCR (na saída do servidor)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+    encerrar_ocr()
+
+@contextmanager
+def _abrir_pdf(origem: OrigemPdf) -> Iterator[BinaryIO]:
+    """
+    Abre o PDF para o PdfReader sem copiar o conteúdo para buffers próprios:
+    arquivos em disco são mapeados em memória e bytes são lidos no lugar.
+    """
+    if not isinstance(origem, str):
+        yield io.BytesIO(origem)
+        return
+    with open(origem, 'rb') as arquivo:
+        # mmap não aceita arquivo vazio; o PdfReader reporta o erro
+        if os.fstat(arquivo.fileno()).st_size == 0:
+            yield arquivo
+            return
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            yield mapa
+
+def _extrair_textos_paginas(caminho_pdf: str, inicio: int, fim: int) -> List[str]:
+    """Extrai o texto das páginas [inicio, fim) abrindo o PDF uma única vez."""
+    with _abrir_pdf(caminho_pdf) as arquivo:
+        leitor = PyPDF2.PdfReader(arquivo)
+        return [leitor.pages[i].extract_text() for i in range(inicio, fim)]
+
+def _padroes_colunas(perfil: PerfilBanco):
+    # Nas colunas o indicador D/C costuma ser um fragmento separado do valor, então
+    # os padrões de valor do perfil são complementados pelo genérico (indicador opcional)
+    return perfil.padroes_data, perfil.padroes_valor + PERFIL_GENERICO.padroes_valor, perfil.pular
+
+def _ler_colunas_paginas(caminho_pdf: str, inicio: int, fim: int, bank_code) -> List[LinhaColunas]:
+    """Lê as colunas das páginas [inicio, fim) abrindo o PDF uma única vez."""
+    padroes_data, padroes_valor, pular = _padroes_colunas(obter_perfil(bank_code))
+    with _abrir_pdf(caminho_pdf) as arquivo:
+        leitor = PyPDF2.PdfReader(arquivo)
+        return [
+            linha
+            for i in range(inicio, fim)
+            for linha in ler_colunas_pagina(leitor.pages[i], padroes_data, padroes_valor, pular)
+        ]
 
 class ExtratorExtratoBancario:
-    def __init__(self):
+    def __init__(self, processos_pdf: int = 1):
+        self.processos_pdf = max(1, processos_pdf)
         self.configurar_logs()
         self.configurar_padroes()
         
@@ -19,59 +121,111 @@ class ExtratorExtratoBancario:
         self.logger = logging.getLogger(__name__)
     
     def configurar_padroes(self):
-        """Configura os padrões regex para diferentes formatos de bancos."""
+        """
+        Configura os padrões regex genéricos.
+        
+        Os padrões são os do perfil genérico (perfis_bancos), compilados uma vez
+        na importação; bancos com perfil próprio usam obter_perfil(bank_code).
+        """
         # Padrões para diferentes formatos de data
-        self.padroes_data = [
-            re.compile(r'\b(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})\b'),  # DD/MM/YYYY ou DD-MM-YYYY
-            re.compile(r'\b(\d{1,2}[\/\-]\d{1,2})\b'),                # DD/MM (sem ano)
-            re.compile(r'\b(\d{1,2}[\/\-](jan|fev|mar|abr|jun|jul|ago|set|out|nov|dez))\b', re.IGNORECASE), #DD/XXX (traduzir mês)
-            re.compile(r'\b(\d{1,2}\s*[\/\-]\s*(jan|fev|mar|abr|mai|jun|jul|ago|set|out|nov|dez))\b', re.IGNORECASE)
-        ]
+        self.padroes_data = PERFIL_GENERICO.padroes_data
 
-        self.meses_abrev = {
-            'jan': '01', 'fev': '02', 'mar': '03', 'abr': '04',
-            'mai': '05', 'jun': '06', 'jul': '07', 'ago': '08',
-            'set': '09', 'out': '10', 'nov': '11', 'dez': '12'
-        }
+        self.meses_abrev = MESES_ABREV
         
         # Padrões para valores monetários com indicadores
-        self.padroes_valor = [
-            # Aceita: -1.234,56  |  1.234,56  |  1.234,56 D
-        re.compile(r'(?P<valor>[+-]?\d{1,3}(?:\.\d{3})*,\d{2})(?:\s*(?P<ind>[DC]|\(\+\)|\(\-\)))?')
-]
+        self.padroes_valor = PERFIL_GENERICO.padroes_valor
+        self._valores = self.varredor_valores(self.padroes_valor)
         
         # Palavras-chave para identificar linhas de transação
-        self.palavras_transacao = [
-            'pix', 'ted', 'doc', 'pagamento', 'saque', 'deposito', 'transferencia', 'dep', 'depósito',
-            'boleto', 'tarifa', 'cheque', 'debito', 'credito', 'cobranca',
-            'impostos', 'agua', 'água', 'luz', 'telefone', 'rende facil', 'rendimento', 'seguros',
-            'seguro', 'pagto', 'consorcio', 'consórcio', 'rende', 'deb', 'cred','déb', 'créd', 'juros', 'iof', 'transf',
-            'sispag', 'rend', 'rede', 'cob', 'tev', 'envio', 'dp', 'db', 'pg', 'fornecedor', 'recebimento'
-        ]
+        self.palavras_transacao = PERFIL_GENERICO.palavras_transacao
+
+        # Termos de linhas de cabeçalho ou totais
+        self.termos_ignorar = PERFIL_GENERICO.termos_ignorar
+
+        # Varredor que aplica todos os padrões acima em uma única passagem por linha
+        self.varredor = PERFIL_GENERICO.varredor
+    
+    def dividir_paginas(self, total_paginas: int) -> List[Tuple[int, int]]:
+        """
+        Divide as páginas em faixas contíguas, uma por processo.
+        
+        Args:
+            total_paginas (int): Quantidade de páginas do PDF
+            
+        Returns:
+            List[Tuple[int, int]]: Faixas [inicio, fim) em ordem de página
+        """
+        faixas = min(self.processos_pdf, total_paginas // PAGINAS_MINIMAS_POR_PROCESSO)
+        if faixas <= 1:
+            return [(0, total_paginas)]
+        
+        tamanho, resto = divmod(total_paginas, faixas)
+        divisao = []
+        inicio = 0
+        for i in range(faixas):
+            fim = inicio + tamanho + (1 if i < resto else 0)
+            divisao.append((inicio, fim))
+            inicio = fim
+        return divisao
     
-    def extrair_texto_pdf(self, caminho_pdf: str) -> str:
+    def extrair_texto_pdf(self, caminho_pdf: OrigemPdf, medicao: Optional[Medicao] = None) -> str:
         """
         Extrai texto de um arquivo PDF, tratando múltiplas páginas.
         
+        Com mais de um processo configurado, as páginas são divididas em faixas
+        e cada processo abre o PDF uma vez e extrai a sua faixa. Um PDF em
+        memória é sempre extraído no próprio processo.
+        
+        Páginas digitalizadas (sem texto, só imagens) recebem o texto do OCR,
+        todas de uma vez (ver ocr.FonteOcr); as demais nem passam por ele.
+        
         Args:
-            caminho_pdf (str): Caminho para o arquivo PDF
+            caminho_pdf (OrigemPdf): Caminho para o arquivo PDF ou o seu conteúdo
+            medicao (Optional[Medicao]): Recebe o tempo da etapa e o número de páginas
             
         Returns:
             str: Texto extraído do PDF
         """
         try:
-            with open(caminho_pdf, 'rb') as arquivo:
-                leitor = PyPDF2.PdfReader(arquivo)
-                texto_completo = ""
-                
-                for i, pagina in enumerate(leitor.pages):
-                    texto_pagina = pagina.extract_text()
-                    if texto_pagina.strip():
-                        texto_completo += f"\n--- PÁGINA {i+1} ---\n"
-                        texto_completo += texto_pagina + "\n"
+            inicio_leitura = time.monotonic()
+            with _abrir_pdf(caminho_pdf) as arquivo:
+                with etapa(medicao, ETAPA_TEXTO):
+                    leitor = PyPDF2.PdfReader(arquivo)
+                    total_paginas = len(leitor.pages)
+                    faixas = (self.dividir_paginas(total_paginas) if isinstance(caminho_pdf, str)
+                              else [(0, total_paginas)])
+                    
+                    if len(faixas) == 1:
+                        textos = [pagina.extract_text() for pagina in leitor.pages]
+                    else:
+                        pool = _obter_pool(self.processos_pdf)
+                        futuros = [
+                            pool.submit(_extrair_textos_paginas, caminho_pdf, inicio, fim)
+                            for inicio, fim in faixas
+                        ]
+                        textos = [texto for futuro in futuros for texto in futuro.result()]
                 
-                self.logger.info(f"Texto extraído de {len(leitor.pages)} páginas")
-                return texto_completo
+                digitalizadas = {
+                    i: leitor.pages[i] for i, texto in enumerate(textos)
+                    if pagina_digitalizada(leitor.pages[i], texto)
+                }
+                if digitalizadas:
+                    for i, texto in self._reconhecer_digitalizadas(digitalizadas, inicio_leitura, medicao).items():
+                        textos[i] = texto
+                    if not any(texto.strip() for texto in textos):
+                        self._sem_ocr(len(digitalizadas))
+            if medicao is not None:
+                medicao.paginas = total_paginas
+            
+            partes = []
+            for i, texto_pagina in enumerate(textos):
+                if texto_pagina.strip():
+                    partes.append(f"\n--- PÁGINA {i+1} ---\n")
+                    partes.append(texto_pagina)
+                    partes.append("\n")
+            
+            self.logger.info(f"Texto extraído de {total_paginas} páginas ({len(faixas)} faixa(s))")
+            return "".join(partes)
                 
         except Exception as e:
             self.logger.error(f"Erro ao extrair texto do PDF: {str(e)}")
@@ -87,119 +241,69 @@ class ExtratorExtratoBancario:
 
     
     
+    @staticmethod
+    def varredor_valores(padroes_valor: List[re.Pattern]):
+        """
+        Função que acha o valor numa linha: o search do próprio padrão quando há
+        um só, ou o primeiro padrão (na ordem configurada) que casa.
+        """
+        if len(padroes_valor) == 1:
+            return padroes_valor[0].search
+        
+        def buscar(linha: str):
+            for padrao in padroes_valor:
+                m = padrao.search(linha)
+                if m:
+                    return m
+            return None
+        return buscar
+    
     def detectar_valor_e_tipo(self, linha: str) -> Tuple[Optional[float], Optional[str]]:
-        for padrao in self.padroes_valor:
-            m = padrao.search(linha)
-            if m:
-                valor_str = m.group('valor')
-                indicador = m.group('ind')
-                valor = self.normalizar_valor(valor_str)
-                if indicador:
-                    tipo = self.identificar_tipo_movimento(indicador)
-                else:
-                    tipo = 'DÉBITO' if valor_str.strip().startswith('-') else 'CRÉDITO'
-                return valor, tipo
-        return None, None
+        m = self._valores(linha)
+        if m is None:
+            return None, None
+        valor_str = m.group('valor')
+        return self.normalizar_valor(valor_str), tipo_movimento(valor_str, m.group('ind'))
 
     
-    def converter_data_com_mes_abrev(self, data_str: str) -> str:
+    def converter_data_com_mes_abrev(self, data_str: str, datas: Optional[NormalizadorDatas] = None) -> str:
         """Converte data com mês abreviado (maiúsculas ou minúsculas)."""
-        try:
-            data_limpa = re.sub(r'\s+', '', data_str)
-            data_limpa = data_limpa.replace('-', '/')
-                                
-            partes = data_limpa.split('/')
-            if len(partes) != 2:
-                return data_str
-            
-            dia, mes_abrev = partes
-            dia = dia.zfill(2)
-            mes_abrev = mes_abrev.strip()
-            
-            mes_num = None
-            mes = mes_abrev.lower()
-            
-            if mes in self.meses_abrev:
-                mes_num = self.meses_abrev[mes]
-            elif mes_abrev in self.meses_abrev:  # Fallback
-                mes_num = self.meses_abrev[mes_abrev]
-            
-            if mes_num:
-                ano_atual = datetime.now().year
-                return f"{dia}/{mes_num}/{ano_atual}"
-            
-            return data_str
-            
-        except Exception:
-            return data_str
+        return (datas or normalizador_padrao()).converter_mes_abrev(data_str)
     
-    def normalizar_data(self, data_str: str) -> str:
+    def normalizar_data(self, data_str: str, datas: Optional[NormalizadorDatas] = None) -> str:
         """
         Normaliza diferentes formatos de data.
         
+        Datas sem ano recebem o ano pelo período do extrato (ver NormalizadorDatas);
+        sem normalizador do extrato, vale o último ano até hoje.
+        
         Args:
             data_str (str): String da data
+            datas (Optional[NormalizadorDatas]): Normalizador do extrato em leitura
             
         Returns:
             str: Data normalizada no formato DD/MM/AAAA
         """
-        try:
-            data_limpa = data_str.strip()
-
-            if any(mes.lower() in data_limpa.lower() for mes in ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez']):
-                return self.converter_data_com_mes_abrev(data_limpa)
-            
-            data_limpa = re.sub(r'[^\d\/\-]', '', data_str)
-            
-            # Se tem apenas DD/MM, adiciona o ano atual
-            if len(data_limpa.split('/')) == 2 or len(data_limpa.split('-')) == 2:
-                ano_atual = datetime.now().year
-                data_limpa += f"/{ano_atual}"
-            
-            # Tenta diferentes formatos
-            formatos = ['%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y', '%d-%m-%y']
-            
-            for formato in formatos:
-                try:
-                    data_obj = datetime.strptime(data_limpa, formato)
-                    return data_obj.strftime('%d/%m/%Y')
-                except ValueError:
-                    continue
-                    
-            return data_str
-            
-        except Exception:
-            return data_str
+        return (datas or normalizador_padrao()).normalizar(data_str)
     
     def normalizar_valor(self, valor_str: str) -> float:
         """
         Converte string de valor monetário brasileiro para float.
         
+        No formato dos padrões de valor ("1.234,56") o valor sai dos centavos
+        inteiros (valores.centavos_formatado); outros textos passam pela limpeza
+        genérica (valores.valor_texto_livre).
+        
         Args:
             valor_str (str): String do valor (ex: "1.234,56")
             
         Returns:
             float: Valor convertido
         """
-        try:
-            # Remove espaços e caracteres especiais
-            valor_limpo = valor_str.replace(' ', '').replace('(+)', '').replace('(-)', '')
-            
-            # Se tem pontos como separadores de milhares e vírgula como decimal
-            if '.' in valor_limpo and ',' in valor_limpo:
-                # Remove os pontos (milhares) e troca vírgula por ponto (decimal)
-                valor_limpo = valor_limpo.replace('.', '').replace(',', '.')
-            elif ',' in valor_limpo and '.' not in valor_limpo:
-                # Apenas vírgula decimal
-                valor_limpo = valor_limpo.replace(',', '.')
-            
-            # Remove caracteres não numéricos exceto ponto decimal
-            valor_limpo = re.sub(r'[^\d\.\-\+]', '', valor_limpo)
-            
-            return abs(float(valor_limpo)) if valor_limpo else 0.0
-            
-        except Exception:
-            return 0.0
+        centavos = centavos_formatado(valor_str)
+        if centavos is None:
+            return valor_texto_livre(valor_str)
+        return centavos / 100
     
     def identificar_tipo_movimento(self, indicador: str) -> str:
         """
@@ -211,14 +315,7 @@ class ExtratorExtratoBancario:
         Returns:
             str: 'DÉBITO', 'CRÉDITO' ou 'INDEFINIDO'
         """
-        indicador = indicador.upper().strip()
-        
-        if indicador in ['D', '-', '(-)']:
-            return 'DÉBITO'
-        elif indicador in ['C', '+', '(+)']:
-            return 'CRÉDITO'
-        else:
-            return 'INDEFINIDO'
+        return tipo_movimento('', indicador) if indicador else 'INDEFINIDO'
     
     def eh_linha_transacao(self, linha: str) -> bool:
         """
@@ -230,22 +327,7 @@ class ExtratorExtratoBancario:
         Returns:
             bool: True se é uma linha de transação
         """
-        linha_lower = linha.lower()
-        
-        # Verifica se tem data E valor
-        tem_data = any(padrao.search(linha) for padrao in self.padroes_data)
-        tem_valor = any(padrao.search(linha) for padrao in self.padroes_valor)
-        
-        # Verifica se tem palavras-chave de transação
-        tem_palavra_chave = any(palavra in linha_lower for palavra in self.palavras_transacao)
-        
-        # Ignora linhas de cabeçalho ou totais
-        ignorar = any(termo in linha_lower for termo in [
-            'agencia', 'conta corrente', 'cliente', 'periodo', 'saldo anterior',
-            'total', 'pagina', '---', 'informacoes adicionais'
-        ])
-        
-        return tem_data and tem_valor and tem_palavra_chave and not ignorar
+        return self.varredor.varrer(linha).eh_transacao
     
     def extrair_historico(self, linha: str, data: str, valor_info: str) -> str:
         """
@@ -259,166 +341,693 @@ class ExtratorExtratoBancario:
         Returns:
             str: Histórico limpo
         """
-        historico = linha
-        
-        # Remove a data
-        for padrao in self.padroes_data:
-            historico = padrao.sub('', historico)
-        
-        # Remove informações de valor
-        for padrao in self.padroes_valor:
-            historico = padrao.sub('', historico)
-        
-        # Limpa espaços extras e caracteres especiais
-        historico = re.sub(r'\s+', ' ', historico).strip()
-        historico = re.sub(r'^[-\s]+|[-\s]+$', '', historico)
-        
-        return historico[:100]  # Limita tamanho
+        return self.varredor.historico_sequencial(linha)
     
-    def processar_linha_extrato(self, bank_code, linha: str) -> Optional[Dict[str, any]]:
+    def processar_linha_extrato(self, bank_code, linha: str, varredura: Optional[VarreduraLinha] = None,
+                                datas: Optional[NormalizadorDatas] = None) -> Optional[Dict[str, any]]:
         """
         Processa uma linha do extrato e extrai as informações.
         
         Args:
             linha (str): Linha do extrato
+            varredura (Optional[VarreduraLinha]): Varredura já feita da linha, se houver
+            datas (Optional[NormalizadorDatas]): Normalizador de datas do extrato
             
         Returns:
             Optional[Dict[str, any]]: Dados extraídos ou None se inválida
         """
-        if not self.eh_linha_transacao(linha):
+        if varredura is None:
+            varredura = obter_perfil(bank_code).varredor.varrer(linha)
+        if not varredura.eh_transacao:
             return None
         
+        # Histórico já limpo pela varredura
+        return self._montar_lancamento(bank_code, varredura.data, varredura.valor, varredura.indicador,
+                                       varredura.historico, datas)
+    
+    def _montar_lancamento(self, bank_code, data_str: str, valor_str: str, indicador: Optional[str],
+                           historico: str, datas: Optional[NormalizadorDatas] = None) -> Optional[Dict[str, any]]:
+        """
+        Normaliza data, valor e tipo de movimento e monta o registro do lançamento.
+        O valor é lido uma vez, em centavos inteiros (Centavos); Valor, em reais, sai deles.
+        """
         # Extrai data
-        data = self.detectar_data(linha)
+        data = self.normalizar_data(data_str, datas)
         if not data:
             return None
         
         # Extrai valor e tipo
-        valor, tipo_movimento = self.detectar_valor_e_tipo(linha)
-        if valor is None or valor == 0:
+        valor_centavos = centavos(valor_str)
+        if valor_centavos == 0:
             return None
-        
-        # Extrai histórico
-        historico = self.extrair_historico(linha, data, str(valor))
+        movimento = tipo_movimento(valor_str, indicador)
         
         # Monta o registro
         dados = {
             'Data': data,
-            'Movimento': tipo_movimento,
+            'Movimento': movimento,
             'Historico': historico,
-            'Valor': valor,
-            'Debito': bank_code if tipo_movimento == 'CRÉDITO' else '',
-            'Credito': bank_code if tipo_movimento == 'DÉBITO' else ''
+            'Valor': valor_centavos / 100,
+            'Debito': bank_code if movimento == 'CRÉDITO' else '',
+            'Credito': bank_code if movimento == 'DÉBITO' else '',
+            'Centavos': valor_centavos,
         }
         
         return dados
     
-    def extrair_lancamentos(self, bank_code, texto_pdf: str) -> List[Dict[str, any]]:
+    def iter_linhas_pdf(self, caminho_pdf: OrigemPdf, medicao: Optional[Medicao] = None) -> Iterator[str]:
         """
-        Extrai todos os lançamentos do texto do PDF.
+        Lê o PDF página a página e gera as mesmas linhas de extrair_texto_pdf(...).split('\\n').
+        
+        Só o texto da página atual fica em memória.
         
         Args:
-            texto_pdf (str): Texto extraído do PDF
+            caminho_pdf (OrigemPdf): Caminho para o arquivo PDF ou o seu conteúdo
+            medicao (Optional[Medicao]): Recebe o tempo de leitura das páginas e o número delas
             
-        Returns:
-            List[Dict[str, any]]: Lista de lançamentos
+        Yields:
+            str: Linhas do texto, incluindo os marcadores de página
         """
-        linhas = texto_pdf.split('\n')
-        lancamentos = []
+        inicio_leitura = time.monotonic()
+        with _abrir_pdf(caminho_pdf) as arquivo:
+            leitor = PyPDF2.PdfReader(arquivo)
+            if medicao is not None:
+                medicao.paginas = len(leitor.pages)
+            # Páginas digitalizadas seguidas vão juntas para o OCR, antes da próxima página com texto
+            digitalizadas: Dict[int, PyPDF2.PageObject] = {}
+            com_texto = False
+            for i, pagina in enumerate(leitor.pages):
+                # Só a leitura da página é cronometrada, não o consumo das linhas
+                with etapa(medicao, ETAPA_TEXTO):
+                    texto_pagina = pagina.extract_text()
+                if pagina_digitalizada(pagina, texto_pagina):
+                    digitalizadas[i] = pagina
+                    continue
+                if digitalizadas:
+                    com_texto |= yield from self._linhas_digitalizadas(digitalizadas, inicio_leitura, medicao)
+                    digitalizadas = {}
+                if texto_pagina.strip():
+                    com_texto = True
+                    yield ""
+                    yield f"--- PÁGINA {i+1} ---"
+                    yield from texto_pagina.split('\n')
+            if digitalizadas:
+                com_texto |= yield from self._linhas_digitalizadas(digitalizadas, inicio_leitura, medicao)
+                if not com_texto:
+                    self._sem_ocr(len(digitalizadas))
+            self.logger.info(f"Texto extraído de {len(leitor.pages)} páginas")
+    
+    def _linhas_digitalizadas(self, digitalizadas: Dict[int, 'PyPDF2.PageObject'], inicio_leitura: float,
+                              medicao: Optional[Medicao] = None) -> Iterator[str]:
+        """Linhas de iter_linhas_pdf das páginas digitalizadas dadas; retorna se alguma tinha texto."""
+        textos = self._reconhecer_digitalizadas(digitalizadas, inicio_leitura, medicao)
+        com_texto = False
+        for i in sorted(textos):
+            if textos[i].strip():
+                com_texto = True
+                yield ""
+                yield f"--- PÁGINA {i+1} ---"
+                yield from textos[i].split('\n')
+        return com_texto
+    
+    def _reconhecer_digitalizadas(self, digitalizadas: Dict[int, 'PyPDF2.PageObject'], inicio_leitura: float,
+                                  medicao: Optional[Medicao] = None) -> Dict[int, str]:
+        """
+        Texto por OCR das páginas digitalizadas ({índice: página}), com o prazo
+        contado de inicio_leitura. Sem OCR disponível, retorna {} e registra as páginas no log.
+        """
+        fonte = fonte_ocr()
+        if fonte is None:
+            self.logger.warning(f"{len(digitalizadas)} página(s) digitalizada(s) sem OCR disponível: "
+                                f"{', '.join(str(i + 1) for i in digitalizadas)}")
+            return {}
+        with etapa(medicao, ETAPA_OCR):
+            textos = fonte.reconhecer(digitalizadas, inicio_leitura)
+        if medicao is not None:
+            medicao.paginas_ocr += len(textos)
+        self.logger.info(f"OCR de {len(textos)} página(s) digitalizada(s)")
+        return textos
+    
+    def _sem_ocr(self, digitalizadas: int) -> None:
+        """O PDF não tem texto nenhum, só páginas digitalizadas que não passaram por OCR."""
+        if fonte_ocr() is None:
+            raise ErroOcr(f"PDF digitalizado ({digitalizadas} página(s) só com imagens) e OCR indisponível.")
+    
+    def _iterar_lancamentos(self, bank_code, linhas: Iterable[str], perfil: PerfilBanco,
+                            medicao: Optional[Medicao] = None,
+                            datas: Optional[NormalizadorDatas] = None,
+                            bordas: Optional[BordasPagina] = None) -> Iterator[Dict[str, any]]:
+        """
+        Gera os lançamentos (ainda com duplicatas) a partir de um fluxo de linhas.
+        
+        Cada lançamento só é gerado depois de olhar a próxima linha com texto,
+        que pode ser a continuação do histórico; linhas em branco seguidas de um
+        marcador de página são puladas, então a continuação pode estar no topo
+        da página seguinte (desde que lá não seja uma linha de cabeçalho). Na
+        mesma página, uma linha em branco encerra o histórico, como antes. As linhas de
+        cabeçalho/rodapé do perfil são descartadas antes disso, mas depois de o
+        período do extrato ser procurado no cabeçalho.
+        
+        Com medicao, conta as linhas lidas e, das que o perfil analisou, as
+        aceitas e as rejeitadas. Sem datas, o normalizador é criado para estas
+        linhas. Com bordas, as linhas são as de uma página só e bordas recebe o
+        que a liga às vizinhas (ver incremental.BordasPagina).
+        """
+        varredor = perfil.varredor
+        if datas is None:
+            datas = NormalizadorDatas()
+        if medicao is not None:
+            linhas = medicao.contar_linhas(linhas)
+        linhas = datas.observar_cabecalho(linhas)
+        if perfil.pular is not None:
+            # Os marcadores de página ficam: a continuação do histórico é procurada além deles
+            pular = perfil.pular.search
+            marcador = MARCADOR_PAGINA.search
+            linhas = (linha for linha in linhas if not pular(linha) or marcador(linha))
         
-        # Processa linha por linha
-        for i, linha in enumerate(linhas):
-            linha = linha.strip()
+        iterador = iter(linhas)
+        # Linhas já lidas na busca da continuação, com a varredura quando feita
+        adiante: Deque[Tuple[str, Optional[VarreduraLinha]]] = deque()
+        i = -1
+        aceitas = rejeitadas = 0
+        
+        # Processa linha por linha; cada linha é varrida uma única vez
+        while True:
+            if adiante:
+                linha, varredura = adiante.popleft()
+            else:
+                bruta = next(iterador, None)
+                if bruta is None:
+                    break
+                linha, varredura = bruta.strip(), None
+            i += 1
+            
+            if not linha or MARCADOR_PAGINA.fullmatch(linha):
+                continue
+            if bordas is not None and bordas.continuacao is None:
+                # Primeira linha com texto da página: continua o último lançamento da anterior?
+                if varredura is None:
+                    varredura = varredor.varrer(linha)
+                bordas.continuacao = '' if varredura.tem_data or varredor.ignorada(linha) else linha[:50]
             
             if len(linha) < 5:  # Ignora linhas muito curtas
                 continue
             
             # Tenta processar como transação
-            dados = self.processar_linha_extrato(bank_code, linha)
-            
-            if dados:
-                lancamentos.append(dados)
-                self.logger.debug(f"Linha {i+1}: {dados['Data']} - {dados['Historico'][:30]}...")
-            
-            # Verifica se a próxima linha é continuação (para históricos quebrados)
-            if i + 1 < len(linhas) and dados:
-                proxima_linha = linhas[i + 1].strip()
-                if (proxima_linha and 
-                    not self.eh_linha_transacao(proxima_linha) and 
-                    not any(padrao.search(proxima_linha) for padrao in self.padroes_data)):
+            if varredura is None:
+                varredura = varredor.varrer(linha)
+            dados = self.processar_linha_extrato(bank_code, linha, varredura, datas)
+            if not dados:
+                rejeitadas += 1
+                continue
+            aceitas += 1
+            
+            self.logger.debug(f"Linha {i+1}: {dados['Data']} - {dados['Historico'][:30]}...")
+            
+            # Verifica se a próxima linha é continuação (para históricos quebrados).
+            # Uma linha de transação sempre tem data, então basta checar a data. Linhas em
+            # branco só são puladas a caminho de um marcador de página: na mesma página,
+            # a linha depois de uma em branco não continua o histórico. Na página seguinte,
+            # a linha também não pode ser de cabeçalho.
+            outra_pagina = em_branco = False
+            for bruta in iterador:
+                proxima_linha = bruta.strip()
+                if not proxima_linha or MARCADOR_PAGINA.fullmatch(proxima_linha):
+                    if proxima_linha:
+                        outra_pagina = True
+                    else:
+                        em_branco = True
+                    adiante.append((proxima_linha, None))
+                    continue
+                if em_branco and not outra_pagina:
+                    adiante.append((proxima_linha, None))
+                    break
+                varredura_proxima = varredor.varrer(proxima_linha)
+                adiante.append((proxima_linha, varredura_proxima))
+                if not varredura_proxima.tem_data and not (outra_pagina and varredor.ignorada(proxima_linha)):
                     # Adiciona à descrição do último lançamento
-                    lancamentos[-1]['Historico'] += f" {proxima_linha[:50]}"
+                    dados['Historico'] += f" {proxima_linha[:50]}"
+                break
+            else:
+                # Nada depois dele: numa página lida sozinha, o histórico pode continuar na seguinte
+                if bordas is not None:
+                    bordas.aberta = True
+            
+            yield dados
         
-        # Remove duplicatas baseado em data, valor e primeiras palavras do histórico
-        lancamentos_unicos = []
+        if medicao is not None:
+            medicao.linhas_aceitas, medicao.linhas_rejeitadas = aceitas, rejeitadas
+    
+    def _lancamentos_unicos(self, bank_code, linhas: Iterable[str], perfil: PerfilBanco,
+                            medicao: Optional[Medicao] = None) -> Iterator[Dict[str, any]]:
+        """Remove duplicatas à medida que os lançamentos são gerados."""
+        return self._sem_duplicatas(self._iterar_lancamentos(bank_code, linhas, perfil, medicao), perfil, medicao)
+    
+    def _sem_duplicatas(self, lancamentos: Iterable[Dict[str, any]], perfil: PerfilBanco,
+                        medicao: Optional[Medicao] = None) -> Iterator[Dict[str, any]]:
         chaves_vistas = set()
+        total = 0
         
+        # Remove duplicatas baseado em data, valor e primeiras palavras do histórico
         for lancamento in lancamentos:
+            total += 1
             chave = (
                 lancamento['Data'],
-                lancamento['Valor'],
+                lancamento['Centavos'],
                 lancamento['Historico'][:20]
             )
             
             if chave not in chaves_vistas:
                 chaves_vistas.add(chave)
-                lancamentos_unicos.append(lancamento)
+                yield lancamento
         
-        self.logger.info(f"Extraídos {len(lancamentos_unicos)} lançamentos únicos de {len(lancamentos)} totais")
-        return lancamentos_unicos
+        self.logger.info(f"Extraídos {len(chaves_vistas)} lançamentos únicos de {total} totais (perfil {perfil.nome})")
+        if medicao is not None:
+            medicao.duplicatas = total - len(chaves_vistas)
+    
+    def _tabela_sem_duplicatas(self, bank_code, lancamentos: Iterable[Dict[str, any]],
+                               perfil: PerfilBanco, medicao: Optional[Medicao] = None) -> TabelaLancamentos:
+        """Como _sem_duplicatas, mas acumulando em colunas e removendo as duplicatas de uma vez no fim."""
+        # Os lançamentos chegam de um gerador: montar a tabela é o que faz a leitura das linhas
+        with etapa(medicao, ETAPA_LINHAS):
+            tabela = TabelaLancamentos.de_lancamentos(lancamentos, bank_code)
+        with etapa(medicao, ETAPA_DUPLICATAS):
+            unicos = tabela.sem_duplicatas()
+        self.logger.info(f"Extraídos {len(unicos)} lançamentos únicos de {len(tabela)} totais (perfil {perfil.nome})")
+        if medicao is not None:
+            medicao.duplicatas = len(tabela) - len(unicos)
+        return unicos
     
-    def salvar_planilha(self, lancamentos: List[Dict[str, any]], arquivo_saida: str):
+    def extrair_tabela(self, bank_code, texto_pdf: str, medicao: Optional[Medicao] = None) -> TabelaLancamentos:
         """
-        Salva os lançamentos em uma planilha Excel com formatação.
+        Extrai todos os lançamentos do texto do PDF em uma TabelaLancamentos.
+        
+        Usa o perfil do banco; se ele não encontrar nenhum lançamento (layout
+        diferente do esperado), refaz a leitura com o perfil genérico.
         
         Args:
-            lancamentos (List[Dict[str, any]]): Lista de lançamentos
-            arquivo_saida (str): Nome do arquivo de saída
+            texto_pdf (str): Texto extraído do PDF
+            medicao (Optional[Medicao]): Recebe os tempos de leitura e duplicatas e as contagens de linhas
+            
+        Returns:
+            TabelaLancamentos: Lançamentos únicos, na ordem do extrato
+        """
+        linhas = texto_pdf.split('\n')
+        perfil = obter_perfil(bank_code)
+        tabela = self._tabela_sem_duplicatas(
+            bank_code, self._iterar_lancamentos(bank_code, linhas, perfil, medicao), perfil, medicao
+        )
+        if not len(tabela) and not perfil.generico:
+            tabela = self._tabela_sem_duplicatas(
+                bank_code, self._iterar_lancamentos(bank_code, linhas, PERFIL_GENERICO, medicao), PERFIL_GENERICO,
+                medicao,
+            )
+        return tabela
+    
+    def extrair_lancamentos(self, bank_code, texto_pdf: str) -> List[Dict[str, any]]:
+        """
+        Extrai todos os lançamentos do texto do PDF (extrair_tabela em forma de lista de dicts).
+        
+        Args:
+            texto_pdf (str): Texto extraído do PDF
+            
+        Returns:
+            List[Dict[str, any]]: Lista de lançamentos
+        """
+        return self.extrair_tabela(bank_code, texto_pdf).para_dicts()
+    
+    def iter_lancamentos(self, bank_code, caminho_pdf: OrigemPdf,
+                         medicao: Optional[Medicao] = None) -> Iterator[Dict[str, any]]:
+        """
+        Extrai os lançamentos do PDF em fluxo, sem montar o texto do documento inteiro.
+        
+        Os lançamentos são gerados enquanto as páginas são lidas, já sem
+        duplicatas e na mesma ordem de extrair_lancamentos (inclusive a
+        releitura com o perfil genérico quando o do banco não encontra nada).
+        
+        Args:
+            caminho_pdf (OrigemPdf): Caminho para o arquivo PDF ou o seu conteúdo
+            medicao (Optional[Medicao]): Recebe o tempo de leitura das páginas e as contagens
+            
+        Yields:
+            Dict[str, any]: Lançamentos únicos
         """
         try:
-            if not lancamentos:
-                self.logger.warning("Nenhum lançamento para salvar")
-                return
+            perfil = obter_perfil(bank_code)
+            encontrados = 0
+            linhas = self.iter_linhas_pdf(caminho_pdf, medicao)
+            for lancamento in self._lancamentos_unicos(bank_code, linhas, perfil, medicao):
+                encontrados += 1
+                yield lancamento
+            if not encontrados and not perfil.generico:
+                linhas = self.iter_linhas_pdf(caminho_pdf, medicao)
+                yield from self._lancamentos_unicos(bank_code, linhas, PERFIL_GENERICO, medicao)
+        except Exception as e:
+            self.logger.error(f"Erro ao extrair lançamentos do PDF: {str(e)}")
+            raise
+    
+    def extrair_tabela_incremental(self, bank_code, caminho_pdf: OrigemPdf, conhecidas: Sequence[PaginaExtraida] = (),
+                                   periodo: Optional[PeriodoExtrato] = None, perfil: Optional[PerfilBanco] = None,
+                                   medicao: Optional[Medicao] = None) -> ResultadoIncremental:
+        """
+        Como extrair_tabela(extrair_texto_pdf(...)), mas página a página e
+        reaproveitando as páginas já lidas numa extração anterior do mesmo
+        extrato (que é reenviado a cada dia com páginas novas no fim).
+        
+        Uma página com o mesmo conteúdo de uma conhecida nem tem o texto
+        extraído; uma com o mesmo texto (fora as linhas de período) não é lida
+        de novo. As demais são lidas sozinhas, e o histórico que continua no
+        topo da página seguinte é juntado na concatenação das páginas (ver
+        incremental.BordasPagina), então o resultado é o mesmo da leitura do
+        documento inteiro. Uma página digitalizada nova passa pelo OCR sozinha
+        (a impressão do conteúdo inclui as imagens dela).
+        
+        Args:
+            caminho_pdf (OrigemPdf): Caminho para o arquivo PDF ou o seu conteúdo
+            conhecidas (Sequence[PaginaExtraida]): Páginas do extrato anterior (ResultadoIncremental.paginas)
+            periodo (Optional[PeriodoExtrato]): Período do extrato anterior, se a primeira página for reaproveitada
+            perfil (Optional[PerfilBanco]): Perfil que leu as páginas conhecidas; por padrão o do banco
+            medicao (Optional[Medicao]): Recebe os tempos, as contagens e as páginas reaproveitadas
             
-            df = pd.DataFrame(lancamentos)
+        Returns:
+            ResultadoIncremental: Lançamentos únicos e as páginas para a próxima extração
+        """
+        perfil = perfil or obter_perfil(bank_code)
+        por_conteudo = {pagina.conteudo: pagina for pagina in conhecidas}
+        por_texto = {pagina.texto: pagina for pagina in conhecidas}
+        datas = NormalizadorDatas(periodo)
+        paginas = []
+        reaproveitadas = 0
+        digitalizadas = 0
+        com_texto = False
+        inicio_leitura = time.monotonic()
+        if medicao is not None:
+            medicao.linhas = medicao.linhas_aceitas = medicao.linhas_rejeitadas = 0
+        try:
+            with _abrir_pdf(caminho_pdf) as arquivo:
+                leitor = PyPDF2.PdfReader(arquivo)
+                for i, pagina in enumerate(leitor.pages):
+                    conteudo = impressao_conteudo(pagina)
+                    conhecida = por_conteudo.get(conteudo)
+                    if conhecida is None:
+                        with etapa(medicao, ETAPA_TEXTO):
+                            texto_pagina = pagina.extract_text()
+                        if pagina_digitalizada(pagina, texto_pagina):
+                            digitalizadas += 1
+                            reconhecidas = self._reconhecer_digitalizadas({i: pagina}, inicio_leitura, medicao)
+                            texto_pagina = reconhecidas.get(i, '')
+                        com_texto = com_texto or bool(texto_pagina.strip())
+                        linhas = texto_pagina.split('\n')
+                        if i == 0:
+                            datas.ler_cabecalho(linhas)
+                        texto = impressao_texto(linhas)
+                        conhecida = por_texto.get(texto)
+                        if conhecida is None:
+                            # Contagens desta página somadas às da extração
+                            parcial = None if medicao is None else Medicao()
+                            bordas = BordasPagina()
+                            with etapa(medicao, ETAPA_LINHAS):
+                                tabela = TabelaLancamentos.de_lancamentos(
+                                    self._iterar_lancamentos(bank_code, linhas, perfil, parcial, datas, bordas),
+                                    bank_code,
+                                )
+                            if parcial is not None:
+                                medicao.linhas += parcial.linhas
+                                medicao.linhas_aceitas += parcial.linhas_aceitas
+                                medicao.linhas_rejeitadas += parcial.linhas_rejeitadas
+                            paginas.append(PaginaExtraida(conteudo, texto, tabela, bordas.continuacao, bordas.aberta))
+                            continue
+                        conhecida = conhecida._replace(conteudo=conteudo)
+                    reaproveitadas += 1
+                    paginas.append(conhecida)
+            if digitalizadas and not com_texto and not reaproveitadas:
+                self._sem_ocr(digitalizadas)
+        except Exception as e:
+            self.logger.error(f"Erro ao extrair o PDF incrementalmente: {str(e)}")
+            raise
+        
+        with etapa(medicao, ETAPA_DUPLICATAS):
+            extrato = TabelaLancamentos.concatenar([pagina.tabela for pagina in paginas], bank_code)
+            extrato = extrato.com_continuacoes(continuacoes_entre_paginas(paginas))
+            tabela = extrato.sem_duplicatas()
+        if not len(tabela) and not perfil.generico:
+            # Como em extrair_tabela: o perfil do banco não achou nada, todas as páginas são lidas com o genérico
+            return self.extrair_tabela_incremental(bank_code, caminho_pdf, (), periodo, PERFIL_GENERICO, medicao)
+        
+        self.logger.info(f"Extraídos {len(tabela)} lançamentos únicos de {len(extrato)} totais (perfil {perfil.nome}, "
+                         f"{reaproveitadas} de {len(paginas)} páginas reaproveitadas)")
+        if medicao is not None:
+            medicao.paginas = len(paginas)
+            medicao.paginas_reaproveitadas = reaproveitadas
+            medicao.duplicatas = len(extrato) - len(tabela)
+        return ResultadoIncremental(tabela, paginas, reaproveitadas, datas.periodo, perfil)
+    
+    def _iterar_lancamentos_colunas(self, bank_code, linhas: Iterable[LinhaColunas], perfil: PerfilBanco,
+                                    datas: Optional[NormalizadorDatas] = None,
+                                    medicao: Optional[Medicao] = None) -> Iterator[Dict[str, any]]:
+        """
+        Gera os lançamentos (ainda com duplicatas) a partir das linhas já separadas em colunas.
+        
+        A continuação do histórico vem da própria posição na página (linha só
+        com texto na coluna do histórico), sem adivinhar pela linha seguinte.
+        Com medicao, conta as linhas de lançamento aceitas e as rejeitadas.
+        """
+        termos_ignorar = perfil.termos_ignorar
+        if medicao is not None:
+            linhas = medicao.contar_linhas(linhas)
+        aceitas = rejeitadas = 0
+        pendente = None
+        for linha in linhas:
+            if linha is not None and linha[0] is None:
+                if pendente is not None:
+                    pendente['Historico'] += f" {linha[1][:50]}"
+                continue
             
-            # Reorganiza as colunas na ordem desejada
-            colunas = ['Data', 'Movimento', 'Historico', 'Valor', 'Debito', 'Credito']
-            df = df[colunas]
+            if pendente is not None:
+                yield pendente
+                pendente = None
+            if linha is None:
+                continue
             
-            # Ordena por data
-            df['Data_Sort'] = pd.to_datetime(df['Data'], format='%d/%m/%Y', errors='coerce')
-            df = df.sort_values('Data_Sort').drop('Data_Sort', axis=1)
+            data, historico, valor, indicador = linha
+            historico = ' '.join(historico.split()).strip('- ')[:100]
+            historico_lower = historico.lower()
+            if any(termo in historico_lower for termo in termos_ignorar):
+                rejeitadas += 1
+                continue
+            pendente = self._montar_lancamento(bank_code, data, valor, indicador, historico, datas)
+            if pendente is None:
+                rejeitadas += 1
+            else:
+                aceitas += 1
+        
+        if pendente is not None:
+            yield pendente
+        if medicao is not None:
+            medicao.linhas_aceitas, medicao.linhas_rejeitadas = aceitas, rejeitadas
+    
+    def iter_linhas_colunas_pdf(self, caminho_pdf: OrigemPdf, perfil: PerfilBanco,
+                                datas: Optional[NormalizadorDatas] = None,
+                                medicao: Optional[Medicao] = None) -> Iterator[LinhaColunas]:
+        """
+        Lê o PDF página a página e gera as linhas separadas em colunas (ver layout_colunas).
+        
+        Args:
+            caminho_pdf (OrigemPdf): Caminho para o arquivo PDF ou o seu conteúdo
+            perfil (PerfilBanco): Perfil cujos padrões de data e valor identificam as colunas
+            datas (Optional[NormalizadorDatas]): Recebe o período lido do cabeçalho da primeira página
+            medicao (Optional[Medicao]): Recebe o tempo de leitura das páginas e o número delas
             
-            # Salva em Excel
-            with pd.ExcelWriter(arquivo_saida, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Extrato', index=False)
+        Yields:
+            LinhaColunas: Linhas de lançamento, continuação ou interrupção
+        """
+        padroes_data, padroes_valor, pular = _padroes_colunas(perfil)
+        with _abrir_pdf(caminho_pdf) as arquivo:
+            leitor = PyPDF2.PdfReader(arquivo)
+            if medicao is not None:
+                medicao.paginas = len(leitor.pages)
+            for i, pagina in enumerate(leitor.pages):
+                with etapa(medicao, ETAPA_COLUNAS):
+                    if i == 0 and datas is not None:
+                        datas.ler_cabecalho(pagina.extract_text().split('\n'))
+                    linhas = ler_colunas_pagina(pagina, padroes_data, padroes_valor, pular)
+                yield from linhas
+            self.logger.info(f"Colunas lidas de {len(leitor.pages)} páginas")
+    
+    def extrair_tabela_colunas(self, bank_code, caminho_pdf: OrigemPdf,
+                               medicao: Optional[Medicao] = None) -> TabelaLancamentos:
+        """
+        Extrai os lançamentos pela posição do texto nas colunas do extrato.
+        
+        Com mais de um processo configurado, as páginas são divididas em faixas
+        como em extrair_texto_pdf. Se nenhuma página tiver colunas
+        reconhecíveis, ou se o PyPDF2 instalado não permitir lê-las
+        (ColunasIndisponiveis), usa o motor de texto (extrair_tabela).
+        
+        Args:
+            caminho_pdf (OrigemPdf): Caminho para o arquivo PDF ou o seu conteúdo
+            medicao (Optional[Medicao]): Recebe os tempos das etapas e as contagens
+            
+        Returns:
+            TabelaLancamentos: Lançamentos únicos, na ordem do extrato
+        """
+        try:
+            perfil = obter_perfil(bank_code)
+            with etapa(medicao, ETAPA_COLUNAS), _abrir_pdf(caminho_pdf) as arquivo:
+                leitor = PyPDF2.PdfReader(arquivo)
+                total_paginas = len(leitor.pages)
+                faixas = self.dividir_paginas(total_paginas) if isinstance(caminho_pdf, str) else [(0, total_paginas)]
+                # As colunas descartam o cabeçalho; o período vem do texto da primeira página
+                datas = NormalizadorDatas()
+                if total_paginas:
+                    datas.ler_cabecalho(leitor.pages[0].extract_text().split('\n'))
                 
-                # Ajusta larguras das colunas
-                worksheet = writer.sheets['Extrato']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+                if len(faixas) == 1:
+                    padroes_data, padroes_valor, pular = _padroes_colunas(perfil)
+                    linhas = [
+                        linha
+                        for pagina in leitor.pages
+                        for linha in ler_colunas_pagina(pagina, padroes_data, padroes_valor, pular)
+                    ]
+                else:
+                    pool = _obter_pool(self.processos_pdf)
+                    futuros = [
+                        pool.submit(_ler_colunas_paginas, caminho_pdf, inicio, fim, bank_code)
+                        for inicio, fim in faixas
+                    ]
+                    linhas = [linha for futuro in futuros for linha in futuro.result()]
+            if medicao is not None:
+                medicao.paginas = total_paginas
             
-            self.logger.info(f"Planilha salva em {arquivo_saida}")
+            self.logger.info(f"Colunas lidas de {total_paginas} páginas ({len(faixas)} faixa(s))")
+            tabela = self._tabela_sem_duplicatas(
+                bank_code, self._iterar_lancamentos_colunas(bank_code, linhas, perfil, datas, medicao), perfil, medicao
+            )
+        except ColunasIndisponiveis as e:
+            self.logger.warning(f"Motor de colunas indisponível ({e}); usando o motor de texto")
+            return self.extrair_tabela(bank_code, self.extrair_texto_pdf(caminho_pdf, medicao), medicao)
+        except Exception as e:
+            self.logger.error(f"Erro ao extrair colunas do PDF: {str(e)}")
+            raise
+        
+        if not len(tabela):
+            self.logger.info("Nenhuma coluna reconhecida; usando o motor de texto")
+            tabela = self.extrair_tabela(bank_code, self.extrair_texto_pdf(caminho_pdf, medicao), medicao)
+        return tabela
+    
+    def extrair_lancamentos_colunas(self, bank_code, caminho_pdf: OrigemPdf) -> List[Dict[str, any]]:
+        """
+        extrair_tabela_colunas em forma de lista de dicts.
+        
+        Args:
+            caminho_pdf (OrigemPdf): Caminho para o arquivo PDF ou o seu conteúdo
+            
+        Returns:
+            List[Dict[str, any]]: Lista de lançamentos
+        """
+        return self.extrair_tabela_colunas(bank_code, caminho_pdf).para_dicts()
+    
+    def iter_lancamentos_colunas(self, bank_code, caminho_pdf: OrigemPdf,
+                                 medicao: Optional[Medicao] = None) -> Iterator[Dict[str, any]]:
+        """
+        Como extrair_lancamentos_colunas, mas em fluxo: os lançamentos são
+        gerados enquanto as páginas são lidas (sem processos paralelos).
+        
+        Args:
+            caminho_pdf (OrigemPdf): Caminho para o arquivo PDF ou o seu conteúdo
+            medicao (Optional[Medicao]): Recebe o tempo de leitura das páginas e as contagens
+            
+        Yields:
+            Dict[str, any]: Lançamentos únicos
+        """
+        try:
+            perfil = obter_perfil(bank_code)
+            encontrados = 0
+            datas = NormalizadorDatas()
+            linhas = self.iter_linhas_colunas_pdf(caminho_pdf, perfil, datas, medicao)
+            lancamentos = self._iterar_lancamentos_colunas(bank_code, linhas, perfil, datas, medicao)
+            try:
+                for lancamento in self._sem_duplicatas(lancamentos, perfil, medicao):
+                    encontrados += 1
+                    yield lancamento
+            except ColunasIndisponiveis as e:
+                # Levantada ao ler a primeira página, antes de qualquer lançamento
+                self.logger.warning(f"Motor de colunas indisponível ({e}); usando o motor de texto")
+            if not encontrados:
+                yield from self.iter_lancamentos(bank_code, caminho_pdf, medicao)
+        except Exception as e:
+            self.logger.error(f"Erro ao extrair colunas do PDF: {str(e)}")
+            raise
+    
+    def salvar_planilha(self, lancamentos: Lancamentos, arquivo_saida: str):
+        """
+        Salva os lançamentos em uma planilha Excel com formatação.
+        
+        Args:
+            lancamentos (Lancamentos): Lista de lançamentos ou TabelaLancamentos
+            arquivo_saida (str): Nome do arquivo de saída
+        """
+        if not lancamentos:
+            self.logger.warning("Nenhum lançamento para salvar")
+            return
+        
+        self.salvar_planilhas({'Extrato': lancamentos}, arquivo_saida)
+    
+    def salvar_planilhas(self, abas: Dict[str, Lancamentos], arquivo_saida: str):
+        """
+        Salva vários conjuntos de lançamentos em um mesmo arquivo Excel, uma aba por conjunto.
+        
+        Args:
+            abas (Dict[str, Lancamentos]): Nome da aba -> lançamentos
+            arquivo_saida (str): Nome do arquivo de saída
+        """
+        try:
+            linhas = salvar_xlsx(abas, arquivo_saida)
+            self.logger.info(f"Planilha salva em {arquivo_saida} ({linhas} linhas)")
             
         except Exception as e:
             self.logger.error(f"Erro ao salvar planilha: {str(e)}")
             raise
     
+    def salvar_exportacao(self, lancamentos: Lancamentos, arquivo_saida: str, formato: str = 'xlsx'):
+        """
+        Salva os lançamentos no formato de exportação escolhido (xlsx, csv, jsonl ou parquet).
+        
+        Args:
+            lancamentos (Lancamentos): Lista de lançamentos ou TabelaLancamentos
+            arquivo_saida (str): Nome do arquivo de saída
+            formato (str): Chave de exportacao.FORMATOS
+        """
+        if not lancamentos:
+            self.logger.warning("Nenhum lançamento para salvar")
+            return
+        
+        try:
+            linhas = FORMATOS[formato].salvar(lancamentos, arquivo_saida)
+            self.logger.info(f"Exportação {formato} salva em {arquivo_saida} ({linhas} linhas)")
+            
+        except Exception as e:
+            self.logger.error(f"Erro ao salvar exportação {formato}: {str(e)}")
+            raise
+    
             
             
                 
 
+def extrator_compartilhado(processos_pdf: int = 1) -> ExtratorExtratoBancario:
+    """
+    Retorna o extrator do processo para a quantidade de processos pedida.
 
-
+    O extrator não guarda estado entre chamadas (os padrões são os dos perfis,
+    compilados na importação), então uma única instância atende todas as
+    requisições e threads em vez de ser recriada a cada PDF.
+    """
+    processos_pdf = max(1, processos_pdf)
+    extrator = _extratores.get(processos_pdf)
+    if extrator is None:
+        with _extratores_lock:
+            extrator = _extratores.get(processos_pdf)
+            if extrator is None:
+                extrator = ExtratorExtratoBancario(processos_pdf=processos_pdf)
+                _extratores[processos_pdf] = extrator
+    return extrator
@@ -0,0 +1,108 @@
+import hashlib
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+from app.extrator.datas import PeriodoExtrato, sem_periodo
+from app.extrator.ocr import imagens_pagina, impressao_imagens
+from app.extrator.perfis_bancos import PerfilBanco
+from app.extrator.tabela_lancamentos import TabelaLancamentos
+
+
+class BordasPagina:
+    """
+    O que liga uma página às vizinhas na continuação do histórico, preenchido
+    por ExtratorExtratoBancario._iterar_lancamentos ao ler a página sozinha:
+
+    - continuacao: None se a página não tem linha com texto; senão o texto que
+      a primeira linha acrescenta ao último lançamento da página anterior
+      ('' se ela tem data ou é de cabeçalho, e não continua nada);
+    - aberta: o último lançamento da página não tem nenhuma linha com texto
+      depois dele, então o histórico dele pode continuar na página seguinte.
+    """
+
+    __slots__ = ('continuacao', 'aberta')
+
+    def __init__(self):
+        self.continuacao: Optional[str] = None
+        self.aberta = False
+
+
+class PaginaExtraida(NamedTuple):
+    """
+    Lançamentos de uma página (ainda com duplicatas) e as duas impressões que a identificam:
+
+    - conteudo: SHA-256 do fluxo de conteúdo da página (e das imagens dela), calculado sem extrair o texto;
+    - texto: SHA-256 do texto extraído.
+
+    As duas ignoram os intervalos de período: em extratos parciais reenviados
+    a cada dia, o cabeçalho de todas as páginas muda ("01/12/2023 a
+    17/12/2023") sem que os lançamentos mudem.
+
+    continuacao e aberta são as de BordasPagina: o histórico que atravessa a
+    quebra de página é juntado depois, em continuacoes_entre_paginas.
+    """
+    conteudo: str
+    texto: str
+    tabela: TabelaLancamentos
+    continuacao: Optional[str] = None
+    aberta: bool = False
+
+
+class ResultadoIncremental(NamedTuple):
+    """
+    tabela: lançamentos únicos do extrato, na ordem das páginas;
+    paginas: as páginas do extrato, para a próxima extração reaproveitar;
+    reaproveitadas: quantas páginas vieram das conhecidas sem serem lidas de novo;
+    periodo: período do extrato (do cabeçalho ou o recebido);
+    perfil: perfil que leu as páginas (o do banco ou o genérico).
+    """
+    tabela: TabelaLancamentos
+    paginas: List[PaginaExtraida]
+    reaproveitadas: int
+    periodo: Optional[PeriodoExtrato]
+    perfil: PerfilBanco
+
+
+def continuacoes_entre_paginas(paginas: Sequence[PaginaExtraida]) -> Dict[int, str]:
+    """
+    Históricos que continuam na página seguinte, como na leitura do documento
+    inteiro: {índice do lançamento nas tabelas das páginas concatenadas: texto
+    a acrescentar}. Páginas sem texto não interrompem a continuação.
+    """
+    continuacoes = {}
+    fim = 0
+    aberta = False
+    for pagina in paginas:
+        if pagina.continuacao is None:
+            continue
+        if aberta and pagina.continuacao:
+            continuacoes[fim - 1] = pagina.continuacao
+        fim += len(pagina.tabela)
+        aberta = pagina.aberta
+    return continuacoes
+
+
+def impressao_conteudo(pagina) -> str:
+    """
+    Impressão dos bytes do conteúdo de uma página do PyPDF2; bem mais barata que extract_text.
+
+    O período só é reconhecido em strings literais com codificação de um byte
+    (WinAnsi); com fontes compostas os bytes entram inteiros e a página que
+    mudou só o cabeçalho é reconhecida pela impressão do texto.
+
+    As imagens da página entram pela impressão delas: páginas digitalizadas têm
+    todas o mesmo conteúdo (desenhar a imagem), e só a imagem as diferencia.
+    """
+    conteudo = pagina.get_contents()
+    dados = conteudo.get_data() if conteudo is not None else b""
+    digest = hashlib.sha256(sem_periodo(dados.decode("latin-1")).encode("latin-1"))
+    imagens = imagens_pagina(pagina)
+    if imagens:
+        impressao = impressao_imagens(imagens)
+        # Sem a impressão das imagens a página não é comparável: nunca é reaproveitada
+        digest.update((impressao or uuid.uuid4().hex).encode("ascii"))
+    return digest.hexdigest()
+
+
+def impressao_texto(linhas: Iterable[str]) -> str:
+    """Impressão do texto de uma página (linhas de extract_text)."""
+    return hashlib.sha256(sem_periodo("\n".join(linhas)).encode("utf-8")).hexdigest()
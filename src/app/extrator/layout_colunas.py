@@ -0,0 +1,365 @@
+import re
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from PyPDF2 import PageObject
+from PyPDF2.generic import ContentStream, TextStringObject
+
+# Diferença máxima de altura (pt) entre fragmentos da mesma linha visual
+TOLERANCIA_LINHA = 2.0
+
+# Folga (pt) ao comparar o início de um fragmento com o início de uma coluna
+TOLERANCIA_COLUNA = 3.0
+
+# Linhas de uma página: (data, historico, valor, indicador) para um lançamento,
+# (None, historico, None, None) para a continuação do histórico anterior e
+# None para linhas que interrompem a continuação (cabeçalhos, rodapés, saldos).
+LinhaColunas = Optional[Tuple[Optional[str], str, Optional[str], Optional[str]]]
+
+_INDICADOR = re.compile(r'[DC]|\(\+\)|\(-\)')
+
+_Matriz = List[float]
+
+
+class ColunasIndisponiveis(RuntimeError):
+    """O PyPDF2 instalado não tem o build_char_map usado para decodificar as fontes."""
+
+
+def _multiplicar(m: _Matriz, n: _Matriz) -> _Matriz:
+    return [
+        m[0] * n[0] + m[1] * n[2], m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2], m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4], m[4] * n[1] + m[5] * n[3] + n[5],
+    ]
+
+
+class _Fonte:
+    """Decodificação e larguras dos glifos (em milésimos do tamanho) de uma fonte da página."""
+
+    __slots__ = ('codificacao', 'mapa', 'larguras', 'largura_padrao', 'bytes_por_codigo', 'meio_espaco')
+
+    def __init__(self, codificacao='charmap', mapa: Optional[dict] = None, larguras: Optional[Dict[int, float]] = None,
+                 largura_padrao: float = 500.0, bytes_por_codigo: int = 1, meio_espaco: float = 250.0):
+        self.codificacao = codificacao
+        self.mapa = mapa or {}
+        self.larguras = larguras or {}
+        self.largura_padrao = largura_padrao
+        self.bytes_por_codigo = bytes_por_codigo
+        self.meio_espaco = meio_espaco
+
+    def decodificar(self, operando) -> str:
+        """Decodifica o operando de Tj/TJ, como o extract_text do PyPDF2."""
+        if isinstance(operando, str):
+            return operando
+        codificacao = self.codificacao
+        if isinstance(codificacao, str):
+            try:
+                texto = operando.decode(codificacao, 'surrogatepass')
+            except Exception:
+                texto = operando.decode('utf-16-be' if codificacao == 'charmap' else 'charmap', 'surrogatepass')
+        else:
+            texto = ''.join(codificacao[x] if x in codificacao else chr(x) for x in operando)
+        if self.mapa:
+            texto = ''.join(self.mapa.get(c, c) for c in texto)
+        return texto
+
+    def avanco(self, operando, tamanho: float, espacamento: float, espacamento_palavras: float) -> float:
+        """Deslocamento horizontal (antes da escala Tz) depois de mostrar o operando."""
+        if isinstance(operando, TextStringObject):
+            operando = operando.get_original_bytes()
+        elif isinstance(operando, str):
+            operando = operando.encode('latin-1', 'replace')
+        if self.bytes_por_codigo == 2:
+            codigos = [operando[i] << 8 | operando[i + 1] for i in range(0, len(operando) - 1, 2)]
+            espacos = 0
+        else:
+            codigos = operando
+            espacos = operando.count(32)
+        larguras, padrao = self.larguras, self.largura_padrao
+        soma = sum(larguras.get(codigo, padrao) for codigo in codigos)
+        return soma / 1000 * tamanho + espacamento * len(codigos) + espacamento_palavras * espacos
+
+
+def _larguras_fonte(fonte) -> Tuple[Dict[int, float], Optional[float]]:
+    """/Widths de uma fonte simples ou /W de uma composta, e a largura padrão declarada (se houver)."""
+    if '/DescendantFonts' in fonte:
+        descendente = fonte['/DescendantFonts'][0].get_object()
+        larguras: Dict[int, float] = {}
+        w = list(descendente.get('/W', []))
+        while len(w) > 1:
+            if isinstance(w[1], list):
+                larguras.update((w[0] + i, float(largura)) for i, largura in enumerate(w[1]))
+                w = w[2:]
+            elif len(w) > 2:
+                larguras.update((codigo, float(w[2])) for codigo in range(w[0], w[1] + 1))
+                w = w[3:]
+            else:
+                break
+        return larguras, float(descendente.get('/DW', 1000))
+    primeiro = int(fonte.get('/FirstChar', 0))
+    larguras = {primeiro + i: float(largura) for i, largura in enumerate(fonte.get('/Widths', []))}
+    descritor = fonte.get('/FontDescriptor')
+    if descritor is not None and '/MissingWidth' in descritor.get_object():
+        return larguras, float(descritor.get_object()['/MissingWidth'])
+    return larguras, None
+
+
+def _carregar_fontes(pagina: PageObject) -> Dict[str, _Fonte]:
+    """
+    Fontes da página por nome de recurso.
+
+    A decodificação vem do build_char_map, interno ao PyPDF2: por isso a
+    versão fica fixa em requirements.txt, e este é o único ponto que o usa.
+    Se outra versão não o tiver, levanta ColunasIndisponiveis e quem chama
+    usa o motor de texto.
+    """
+    try:
+        from PyPDF2._cmap import build_char_map
+    except (ImportError, AttributeError) as e:
+        raise ColunasIndisponiveis(f"PyPDF2 sem build_char_map: {e}") from e
+    fontes: Dict[str, _Fonte] = {}
+    recursos = pagina.get('/Resources')
+    if recursos is None or '/Font' not in recursos.get_object():
+        return fontes
+    for nome in recursos.get_object()['/Font']:
+        try:
+            _, meio_espaco, codificacao, mapa, fonte = build_char_map(nome, 250.0, pagina)
+            larguras, padrao = _larguras_fonte(fonte)
+        except Exception:
+            fontes[nome] = _Fonte()
+            continue
+        # Sem larguras declaradas (fontes padrão sem /Widths), cada glifo vale duas vezes o espaço
+        fontes[nome] = _Fonte(codificacao, mapa, larguras, padrao if padrao is not None else meio_espaco * 4,
+                              2 if '/DescendantFonts' in fonte else 1, meio_espaco)
+    return fontes
+
+
+class _EstadoTexto:
+    """Parâmetros de texto do estado gráfico (salvos por q e restaurados por Q)."""
+
+    __slots__ = ('fonte', 'tamanho', 'espacamento', 'espacamento_palavras', 'escala', 'entrelinha', 'elevacao')
+
+    def __init__(self):
+        self.fonte = _Fonte()
+        self.tamanho = 1.0
+        self.espacamento = 0.0          # Tc
+        self.espacamento_palavras = 0.0  # Tw
+        self.escala = 1.0               # Tz / 100
+        self.entrelinha = 0.0           # TL
+        self.elevacao = 0.0             # Ts
+
+    def copia(self) -> '_EstadoTexto':
+        copia = _EstadoTexto()
+        for campo in self.__slots__:
+            setattr(copia, campo, getattr(self, campo))
+        return copia
+
+
+def fragmentos_pagina(pagina: PageObject) -> List[Tuple[float, float, str]]:
+    """
+    Lê o conteúdo da página e retorna os trechos de texto com a posição em que começam.
+
+    Percorre os operadores do content stream acompanhando as matrizes de
+    transformação (cm, Tm/Td/TD/T*), a fonte (Tf) e os parâmetros de texto
+    (Tc, Tw, Tz, TL, Ts), sem montar o texto corrido da página. Cada
+    Tj/TJ/'/" vira um fragmento (x, y, texto) e avança a matriz de texto
+    pela largura dos glifos, então trechos mostrados em seguida, sem novo
+    posicionamento, começam onde o anterior terminou.
+    """
+    conteudo = pagina.get_contents()
+    if conteudo is None:
+        return []
+    if not isinstance(conteudo, ContentStream):
+        conteudo = ContentStream(conteudo, pagina.pdf, 'bytes')
+
+    fontes = _carregar_fontes(pagina)
+    fragmentos = []
+    cm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+    tm = list(cm)
+    tlm = list(cm)
+    estado = _EstadoTexto()
+    pilha = []
+
+    def mover(tx: float, ty: float) -> None:
+        nonlocal tm, tlm
+        tlm = _multiplicar([1.0, 0.0, 0.0, 1.0, tx, ty], tlm)
+        tm = list(tlm)
+
+    def mostrar(partes) -> None:
+        # partes: operandos de Tj (texto) ou o array de TJ (textos e ajustes em milésimos)
+        texto = ''
+        for parte in partes:
+            if isinstance(parte, (str, bytes)):
+                texto += estado.fonte.decodificar(parte)
+            elif texto and texto[-1] != ' ' and abs(float(parte)) >= estado.fonte.meio_espaco:
+                # Como no extract_text: um ajuste de TJ de meio espaço ou mais separa as palavras
+                texto += ' '
+        texto = texto.strip()
+        if texto:
+            m = _multiplicar([1.0, 0.0, 0.0, 1.0, 0.0, estado.elevacao], _multiplicar(tm, cm))
+            fragmentos.append((m[4], m[5], texto))
+        avanco = 0.0
+        for parte in partes:
+            if isinstance(parte, (str, bytes)):
+                avanco += estado.fonte.avanco(parte, estado.tamanho, estado.espacamento, estado.espacamento_palavras)
+            else:
+                avanco -= float(parte) / 1000 * estado.tamanho
+        avanco *= estado.escala
+        tm[4] += avanco * tm[0]
+        tm[5] += avanco * tm[1]
+
+    for operandos, operador in conteudo.operations:
+        if operador == b'Tj':
+            mostrar(operandos[:1])
+        elif operador == b'TJ':
+            mostrar(operandos[0])
+        elif operador == b'Td':
+            mover(float(operandos[0]), float(operandos[1]))
+        elif operador == b'Tm':
+            tlm = [float(v) for v in operandos]
+            tm = list(tlm)
+        elif operador == b'T*':
+            mover(0.0, -estado.entrelinha)
+        elif operador == b'TD':
+            estado.entrelinha = -float(operandos[1])
+            mover(float(operandos[0]), float(operandos[1]))
+        elif operador == b'TL':
+            estado.entrelinha = float(operandos[0])
+        elif operador == b'Tc':
+            estado.espacamento = float(operandos[0])
+        elif operador == b'Tw':
+            estado.espacamento_palavras = float(operandos[0])
+        elif operador == b'Tz':
+            estado.escala = float(operandos[0]) / 100
+        elif operador == b'Ts':
+            estado.elevacao = float(operandos[0])
+        elif operador == b"'":
+            mover(0.0, -estado.entrelinha)
+            mostrar(operandos[:1])
+        elif operador == b'"':
+            estado.espacamento_palavras = float(operandos[0])
+            estado.espacamento = float(operandos[1])
+            mover(0.0, -estado.entrelinha)
+            mostrar(operandos[2:3])
+        elif operador == b'Tf':
+            estado.fonte = fontes.get(operandos[0]) or _Fonte()
+            estado.tamanho = float(operandos[1])
+        elif operador == b'BT':
+            tm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+            tlm = list(tm)
+        elif operador == b'cm':
+            cm = _multiplicar([float(v) for v in operandos], cm)
+        elif operador == b'q':
+            pilha.append((cm, estado.copia()))
+        elif operador == b'Q' and pilha:
+            cm, estado = pilha.pop()
+    return fragmentos
+
+
+def agrupar_linhas(fragmentos: List[Tuple[float, float, str]]) -> List[List[Tuple[float, str]]]:
+    """Agrupa os fragmentos em linhas visuais, de cima para baixo, cada uma em ordem de x."""
+    linhas: List[List[Tuple[float, str]]] = []
+    y_atual = None
+    for x, y, texto in sorted(fragmentos, key=lambda f: (-f[1], f[0])):
+        if y_atual is None or y_atual - y > TOLERANCIA_LINHA:
+            linhas.append([])
+            y_atual = y
+        linhas[-1].append((x, texto))
+    for linha in linhas:
+        linha.sort(key=lambda f: f[0])
+    return linhas
+
+
+def _casa(padroes: Sequence[Pattern], texto: str):
+    for padrao in padroes:
+        m = padrao.fullmatch(texto)
+        if m:
+            return m
+    return None
+
+
+class FaixasColunas:
+    """
+    Início (x) das colunas de histórico e de valor de uma página.
+
+    As faixas vêm das linhas "âncora", que começam com uma data e têm um valor
+    depois dela: o histórico começa no primeiro fragmento após a data e o valor
+    no fragmento de valor mais à esquerda (valores costumam ser alinhados à direita).
+    """
+
+    __slots__ = ('historico', 'valor')
+
+    def __init__(self, historico: float, valor: float):
+        self.historico = historico
+        self.valor = valor
+
+    @classmethod
+    def detectar(cls, linhas: List[List[Tuple[float, str]]], padroes_data: Sequence[Pattern],
+                 padroes_valor: Sequence[Pattern]) -> Optional['FaixasColunas']:
+        inicios_historico = []
+        inicios_valor = []
+        for linha in linhas:
+            if len(linha) < 3 or not _casa(padroes_data, linha[0][1]):
+                continue
+            for x, texto in linha[2:]:
+                if _casa(padroes_valor, texto):
+                    inicios_historico.append(linha[1][0])
+                    inicios_valor.append(x)
+                    break
+        if not inicios_valor:
+            return None
+        inicios_historico.sort()
+        return cls(inicios_historico[len(inicios_historico) // 2], min(inicios_valor))
+
+
+def ler_colunas_pagina(pagina: PageObject, padroes_data: Sequence[Pattern], padroes_valor: Sequence[Pattern],
+                       pular: Optional[Pattern] = None) -> List[LinhaColunas]:
+    """
+    Separa as linhas da página em data, histórico, valor e indicador pelas faixas das colunas.
+
+    Uma linha só com texto na faixa do histórico (sem data e sem valor) é a
+    continuação do histórico da linha anterior. Páginas sem colunas
+    reconhecíveis retornam uma lista vazia.
+    """
+    linhas = agrupar_linhas(fragmentos_pagina(pagina))
+    faixas = FaixasColunas.detectar(linhas, padroes_data, padroes_valor)
+    if faixas is None:
+        return []
+
+    inicio_historico = faixas.historico - TOLERANCIA_COLUNA
+    inicio_valor = faixas.valor - TOLERANCIA_COLUNA
+    resultado: List[LinhaColunas] = []
+    for linha in linhas:
+        if pular is not None and pular.search(' '.join(texto for _, texto in linha)):
+            resultado.append(None)
+            continue
+
+        data = None
+        historico = []
+        valor = indicador = None
+        outros = False
+        for x, texto in linha:
+            if x < inicio_historico:
+                if data is None and _casa(padroes_data, texto):
+                    data = texto
+                else:
+                    outros = True
+            elif x < inicio_valor:
+                historico.append(texto)
+            elif valor is None:
+                m = _casa(padroes_valor, texto)
+                if m:
+                    valor = m.group('valor')
+                    indicador = m.group('ind')
+                else:
+                    outros = True
+            elif indicador is None and _INDICADOR.fullmatch(texto):
+                indicador = texto
+            # Demais colunas à direita (saldo) são ignoradas
+
+        if data is not None and valor is not None:
+            resultado.append((data, ' '.join(historico), valor, indicador))
+        elif historico and data is None and valor is None and not outros:
+            resultado.append((None, ' '.join(historico), None, None))
+        else:
+            resultado.append(None)
+    return resultado
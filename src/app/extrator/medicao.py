@@ -0,0 +1,77 @@
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import ContextManager, Dict, Iterable, Iterator, Optional
+
+# Etapas medidas (nomes também usados no campo timings e nas métricas)
+ETAPA_ADMISSAO = 'admission'
+ETAPA_CACHE = 'cache'
+ETAPA_TEXTO = 'pdf_text'
+ETAPA_OCR = 'ocr'
+ETAPA_COLUNAS = 'pdf_columns'
+ETAPA_LINHAS = 'parse'
+ETAPA_DUPLICATAS = 'dedup'
+ETAPA_EXPORTACAO = 'export'
+ETAPA_RAZAO = 'ledger'
+
+
+class Medicao:
+    """
+    Tempos por etapa e contadores de uma extração.
+
+    Cada extração que pede medição recebe a sua instância, passada como
+    argumento pelas funções do extrator (que é compartilhado entre threads).
+    Sem medição (None) nada é cronometrado nem contado.
+
+    Os tempos das etapas se acumulam (uma releitura com o perfil genérico soma
+    à primeira); os contadores de linhas valem para a última leitura, a que
+    produziu o resultado.
+    """
+
+    __slots__ = ('motor', 'em_cache', 'segundos', 'etapas', 'paginas', 'paginas_reaproveitadas', 'paginas_ocr',
+                 'linhas', 'linhas_aceitas', 'linhas_rejeitadas', 'duplicatas', 'lancamentos', 'bytes_entrada',
+                 'bytes_saida')
+
+    def __init__(self, motor: str = 'texto'):
+        self.motor = motor
+        self.em_cache = False
+        self.segundos = 0.0
+        self.etapas: Dict[str, float] = {}
+        self.paginas = 0
+        # Páginas de uma extração incremental que vieram da extração anterior
+        self.paginas_reaproveitadas = 0
+        # Páginas digitalizadas cujo texto veio do OCR (ou do cache dele)
+        self.paginas_ocr = 0
+        self.linhas = 0
+        self.linhas_aceitas = 0
+        self.linhas_rejeitadas = 0
+        self.duplicatas = 0
+        self.lancamentos = 0
+        self.bytes_entrada = 0
+        self.bytes_saida = 0
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        inicio = perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + perf_counter() - inicio
+
+    def copiar(self, outra: 'Medicao') -> None:
+        """Copia os tempos e contadores de outra medição (a devolvida por um processo filho)."""
+        for nome in self.__slots__:
+            setattr(self, nome, getattr(outra, nome))
+
+    def contar_linhas(self, linhas: Iterable) -> Iterator:
+        """Repassa as linhas contando-as em self.linhas (zerado a cada leitura)."""
+        self.linhas = 0
+        for linha in linhas:
+            self.linhas += 1
+            yield linha
+
+
+def etapa(medicao: Optional[Medicao], nome: str) -> ContextManager[None]:
+    """medicao.etapa(nome), ou um contexto vazio quando não há medição."""
+    if medicao is None:
+        return nullcontext()
+    return medicao.etapa(nome)
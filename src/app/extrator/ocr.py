@@ -0,0 +1,382 @@
+import abc
+import hashlib
+import importlib.util
+import io
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Optional
+import PyPDF2
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ErroOcr(RuntimeError):
+    """Páginas digitalizadas sem texto reconhecido: OCR indisponível ou prazo do documento esgotado."""
+
+
+# Partes privadas do PyPDF2 (fixado no requirements.txt), usadas só por estas duas funções:
+# os dados da imagem ainda codificados, sem o que get_data() decodificaria, e a
+# conversão de imagens do próprio PyPDF2, para o que arquivo_imagem não monta sozinho.
+# Numa versão sem elas as funções retornam None e a página fica sem OCR, como
+# se ele estivesse indisponível, em vez de o documento inteiro falhar.
+
+def _dados_codificados(imagem) -> Optional[bytes]:
+    try:
+        return imagem._data
+    except AttributeError:
+        return None
+
+
+def _imagem_pypdf2(imagem) -> Optional[bytes]:
+    try:
+        from PyPDF2.filters import _xobj_to_image
+        return _xobj_to_image(imagem)[1]
+    except (ImportError, AttributeError):
+        return None
+
+
+def imagens_pagina(pagina) -> list:
+    """
+    XObjects de imagem usados diretamente pela página (sem os de dentro de
+    formulários, como em PageObject.images); não decodifica nenhuma imagem.
+    """
+    recursos = pagina.get('/Resources')
+    if recursos is None:
+        return []
+    xobjects = recursos.get_object().get('/XObject')
+    if xobjects is None:
+        return []
+    xobjects = xobjects.get_object()
+    imagens = []
+    for nome in xobjects:
+        xobject = xobjects[nome].get_object()
+        if xobject.get('/Subtype') == '/Image':
+            imagens.append(xobject)
+    return imagens
+
+
+def impressao_imagens(imagens: list) -> Optional[str]:
+    """
+    SHA-256 dos dados das imagens ainda codificados (JPEG, Flate, JBIG2...), sem
+    decodificá-las: identifica a página digitalizada no cache do OCR. None se
+    o PyPDF2 instalado não der acesso a esses dados.
+    """
+    digest = hashlib.sha256()
+    for imagem in imagens:
+        dados = _dados_codificados(imagem)
+        if dados is None:
+            return None
+        digest.update(len(dados).to_bytes(8, 'big'))
+        digest.update(dados)
+    return digest.hexdigest()
+
+
+def pagina_digitalizada(pagina, texto: str) -> bool:
+    """Página sem texto extraível, só com imagens (um extrato escaneado)."""
+    return not texto.strip() and bool(imagens_pagina(pagina))
+
+
+def pdf_pagina(pagina) -> bytes:
+    """A página sozinha num PDF: o que vai para o processo de OCR, em vez do documento inteiro."""
+    escritor = PyPDF2.PdfWriter()
+    escritor.add_page(pagina)
+    saida = io.BytesIO()
+    escritor.write(saida)
+    return saida.getvalue()
+
+
+class MotorOcr(abc.ABC):
+    """
+    Backend de OCR: recebe as imagens de uma página (arquivos de imagem em bytes,
+    ver arquivo_imagem) e devolve o texto, uma linha por linha do extrato.
+
+    Roda nos processos do pool de OCR, então a instância precisa ser serializável (pickle).
+    """
+
+    @property
+    @abc.abstractmethod
+    def identificacao(self) -> str:
+        """Nome e parâmetros que mudam o texto reconhecido; fazem parte da chave do cache."""
+
+    @abc.abstractmethod
+    def disponivel(self) -> bool:
+        """Se o backend pode rodar neste ambiente (pacotes e executáveis presentes)."""
+
+    @abc.abstractmethod
+    def reconhecer(self, imagens: List[bytes], limite: Optional[float] = None) -> str:
+        """
+        Texto das imagens da página. limite: time.time() até quando o documento
+        pode esperar; o backend não deve passar dele (ErroOcr quando esgotado).
+        """
+
+
+class MotorTesseract(MotorOcr):
+    """
+    Tesseract local via pytesseract (requer os pacotes pytesseract e Pillow e o
+    executável tesseract). idioma: códigos do Tesseract ("por", "por+eng");
+    tempo_limite: segundos por imagem (0: sem limite próprio). O tesseract de
+    cada imagem é encerrado nesse tempo ou no limite do documento, o que vier antes.
+    """
+
+    def __init__(self, idioma: str = 'por', comando: str = 'tesseract', tempo_limite: float = 0):
+        self.idioma = idioma
+        self.comando = comando
+        self.tempo_limite = tempo_limite
+
+    @property
+    def identificacao(self) -> str:
+        return f"tesseract:{self.idioma}"
+
+    def disponivel(self) -> bool:
+        return (importlib.util.find_spec('pytesseract') is not None
+                and importlib.util.find_spec('PIL') is not None
+                and shutil.which(self.comando) is not None)
+
+    def reconhecer(self, imagens: List[bytes], limite: Optional[float] = None) -> str:
+        try:
+            import pytesseract
+            from PIL import Image
+        except ImportError:
+            raise ErroOcr("OCR requer os pacotes pytesseract e Pillow.")
+        pytesseract.pytesseract.tesseract_cmd = self.comando
+        textos = []
+        for dados in imagens:
+            with Image.open(io.BytesIO(dados)) as imagem:
+                textos.append(pytesseract.image_to_string(imagem, lang=self.idioma, timeout=self._tempo(limite)))
+        return "\n".join(texto.strip('\n') for texto in textos)
+
+    def _tempo(self, limite: Optional[float]) -> float:
+        """timeout do pytesseract para a próxima imagem (0: sem limite)."""
+        if limite is None:
+            return self.tempo_limite
+        restante = limite - time.time()
+        if restante <= 0:
+            raise ErroOcr("prazo do documento esgotado")
+        return min(restante, self.tempo_limite) if self.tempo_limite else restante
+
+
+_MODOS_ESPACO = {'/DeviceGray': 'L', '/DeviceRGB': 'RGB', '/DeviceCMYK': 'CMYK'}
+_MODOS_ICC = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+
+def _modo_imagem(imagem) -> Optional[str]:
+    """Modo do Pillow para os pixels decodificados da imagem, ou None (paleta, Lab, separações...)."""
+    if imagem.get('/BitsPerComponent') == 1:
+        return '1'
+    espaco = imagem.get('/ColorSpace')
+    espaco = espaco.get_object() if espaco is not None else None
+    if isinstance(espaco, list):
+        # [/ICCBased perfil]; os demais espaços em lista (/Indexed, /CalRGB, /Separation, /DeviceN...) ficam com None
+        if len(espaco) == 2 and espaco[0] == '/ICCBased':
+            return _MODOS_ICC.get(espaco[1].get_object().get('/N'))
+        return None
+    return _MODOS_ESPACO.get(espaco)
+
+
+def arquivo_imagem(imagem) -> Optional[bytes]:
+    """
+    A imagem como um arquivo que o Pillow abre (requer Pillow).
+
+    JPEG e JPEG 2000 já são arquivos; as demais têm os pixels decodificados e
+    gravados em PNG. Só o que não der para montar assim passa pelo PyPDF2, que
+    no 3.0.1 trata tons de cinza em Flate como paleta e estraga a imagem (None
+    se o PyPDF2 instalado não tiver essa conversão).
+    """
+    from PIL import Image
+    filtro = imagem.get('/Filter')
+    if isinstance(filtro, list) and len(filtro) == 1:
+        filtro = filtro[0]
+    if filtro in ('/DCTDecode', '/JPXDecode'):
+        # get_data() não decodifica esses filtros: devolve o próprio arquivo
+        return imagem.get_data()
+    modo = _modo_imagem(imagem)
+    if modo is None or filtro == '/CCITTFaxDecode':
+        return _imagem_pypdf2(imagem)
+    pixels = Image.frombytes(modo, (imagem['/Width'], imagem['/Height']), imagem.get_data())
+    saida = io.BytesIO()
+    pixels.save(saida, format='PNG')
+    return saida.getvalue()
+
+
+def _reconhecer_pagina(motor: MotorOcr, pdf: bytes, limite: float) -> Optional[str]:
+    """
+    Executado no pool de OCR: imagens da página → texto. limite: time.time()
+    do fim do prazo do documento; uma página que só começa depois dele não roda.
+    None se alguma imagem não puder ser convertida (ver arquivo_imagem).
+    """
+    if time.time() >= limite:
+        raise ErroOcr("prazo do documento esgotado")
+    pagina = PyPDF2.PdfReader(io.BytesIO(pdf)).pages[0]
+    arquivos = [arquivo_imagem(imagem) for imagem in imagens_pagina(pagina)]
+    if None in arquivos:
+        return None
+    return motor.reconhecer(arquivos, limite)
+
+
+class FonteOcr:
+    """
+    Texto das páginas digitalizadas pelo motor de OCR, num pool de processos
+    próprio (uma tarefa por página) e com cache do texto pela impressão das
+    imagens da página.
+
+    prazo: segundos para todas as páginas de um documento, contados do início
+    da leitura dele. Esgotado o prazo, a extração falha com ErroOcr sem esperar
+    pelas páginas pendentes (as prontas ficam no cache para a próxima
+    tentativa); as que ainda estão na fila não chegam a rodar e as em andamento
+    param no limite que o motor recebe (ver MotorOcr.reconhecer).
+    cache: diretório com path(nome)/find(nome), como app.utils.files.FileStore;
+    None desliga o cache.
+    """
+
+    def __init__(self, motor: MotorOcr, processos: int, prazo: float, cache=None):
+        self.motor = motor
+        self.processos = max(1, processos)
+        self.prazo = prazo
+        self.cache = cache
+        self._disponivel: Optional[bool] = None
+        self._pool: Optional['ProcessPoolExecutor'] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def disponivel(self) -> bool:
+        if self._disponivel is None:
+            self._disponivel = self.motor.disponivel()
+            if not self._disponivel:
+                logger.warning(f"OCR indisponível ({self.motor.identificacao}); páginas digitalizadas ficam sem texto")
+        return self._disponivel
+
+    def _obter_pool(self) -> 'ProcessPoolExecutor':
+        from concurrent.futures import ProcessPoolExecutor
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processos)
+            return self._pool
+
+    def encerrar(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def _chave(self, pagina) -> Optional[str]:
+        impressao = impressao_imagens(imagens_pagina(pagina))
+        if impressao is None:
+            return None
+        identificacao = hashlib.sha256(self.motor.identificacao.encode('utf-8')).hexdigest()
+        return hashlib.sha256((identificacao + impressao).encode('ascii')).hexdigest()
+
+    def _ler_cache(self, chave: str) -> Optional[str]:
+        caminho = self.cache.find(chave + '.txt') if self.cache is not None else None
+        if caminho is None:
+            return None
+        try:
+            with open(caminho, 'r', encoding='utf-8') as arquivo:
+                return arquivo.read()
+        except FileNotFoundError:
+            return None
+
+    def _gravar_cache(self, chave: str, texto: str) -> None:
+        if self.cache is None:
+            return
+        caminho = self.cache.path(chave + '.txt')
+        tmp = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto)
+            os.replace(tmp, caminho)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def reconhecer(self, paginas: Dict[int, 'PyPDF2.PageObject'], inicio: Optional[float] = None) -> Dict[int, str]:
+        """
+        Texto de cada página digitalizada ({índice: página} → {índice: texto}).
+
+        inicio: time.monotonic() do começo da leitura do documento, de onde conta
+        o prazo (um documento lido em partes tem um prazo só); por padrão, agora.
+        """
+        from concurrent.futures import wait
+        limite = (time.monotonic() if inicio is None else inicio) + self.prazo
+        # O mesmo limite no relógio de parede, que os processos do pool também enxergam
+        limite_pool = time.time() + (limite - time.monotonic())
+        textos: Dict[int, str] = {}
+        futuros = {}
+        for i, pagina in paginas.items():
+            chave = self._chave(pagina)
+            if chave is None:
+                logger.warning(f"Página {i + 1}: imagens ilegíveis com esta versão do PyPDF2; fica sem OCR")
+                continue
+            texto = self._ler_cache(chave)
+            if texto is not None:
+                textos[i] = texto
+                continue
+            futuro = self._obter_pool().submit(_reconhecer_pagina, self.motor, pdf_pagina(pagina), limite_pool)
+            futuros[futuro] = (i, chave)
+        if not futuros:
+            return textos
+
+        prontos, atrasados = wait(futuros, timeout=max(0.0, limite - time.monotonic()))
+        # Tira da fila do pool as que ainda não foram enviadas aos processos
+        for futuro in atrasados:
+            futuro.cancel()
+        falhas = []
+        for futuro in prontos:
+            i, chave = futuros[futuro]
+            try:
+                texto = futuro.result()
+            except Exception as e:
+                falhas.append(f"página {i + 1}: {e}")
+                continue
+            if texto is None:
+                logger.warning(f"Página {i + 1}: imagens ilegíveis com esta versão do PyPDF2; fica sem OCR")
+                continue
+            textos[i] = texto
+            self._gravar_cache(chave, texto)
+        if falhas:
+            raise ErroOcr(f"Falha no OCR ({'; '.join(falhas)}).")
+        if atrasados:
+            raise ErroOcr(f"OCR não terminou no prazo de {self.prazo:g} s "
+                          f"({len(atrasados)} de {len(paginas)} página(s) digitalizada(s) pendentes).")
+        return textos
+
+
+_fonte: Optional[FonteOcr] = None
+
+
+def configurar_ocr(fonte: Optional[FonteOcr]) -> None:
+    """Define a fonte de OCR das páginas digitalizadas do processo (None desliga o OCR)."""
+    global _fonte
+    anterior, _fonte = _fonte, fonte
+    if anterior is not None and anterior is not fonte:
+        anterior.encerrar()
+
+
+def limitar_ocr(processos: int) -> None:
+    """
+    Limita o pool de OCR deste processo a processos. Para os processos dos pools
+    de extração, criados por fork do servidor: a fonte herdada é trocada por uma
+    nova, sem encerrar o pool dela, que é do servidor.
+    """
+    global _fonte
+    if _fonte is not None:
+        _fonte = FonteOcr(_fonte.motor, processos, _fonte.prazo, _fonte.cache)
+
+
+def fonte_ocr() -> Optional[FonteOcr]:
+    """A fonte de OCR configurada, se o motor dela estiver disponível neste ambiente."""
+    if _fonte is None or not _fonte.disponivel:
+        return None
+    return _fonte
+
+
+def encerrar_ocr() -> None:
+    """Encerra o pool de OCR (na saída do servidor)."""
+    if _fonte is not None:
+        _fonte.encerrar()
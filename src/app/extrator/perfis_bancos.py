@@ -0,0 +1,154 @@
+import re
+from typing import Dict, Optional, Pattern, Sequence, Union
+from app.extrator.varredor_linhas import VarredorLayout, VarredorLinhas, alternancia
+
+# Valor monetário brasileiro: -1.234,56 | 1.234,56
+_VALOR = r'[+-]?\d{1,3}(?:\.\d{3})*,\d{2}'
+
+
+class PerfilBanco:
+    """
+    Regras de leitura do extrato de um banco, compiladas uma única vez.
+
+    - padroes_data / padroes_valor: datas e valores reconhecidos;
+    - palavras_transacao / termos_ignorar: palavras que marcam (ou descartam)
+      uma linha de lançamento; sem palavras, qualquer linha com data e valor serve;
+    - pular: linhas de cabeçalho/rodapé removidas antes da leitura (não viram
+      lançamento nem continuação de histórico);
+    - layout: regex ancorada da linha de lançamento com os grupos data,
+      historico, valor e ind. Com layout, a linha é lida por um único match em
+      vez da varredura genérica.
+    """
+
+    __slots__ = ('codigo', 'nome', 'padroes_data', 'padroes_valor', 'palavras_transacao',
+                 'termos_ignorar', 'pular', 'layout', 'varredor')
+
+    def __init__(self, codigo: str, nome: str, padroes_data: Sequence[Pattern], padroes_valor: Sequence[Pattern],
+                 palavras_transacao: Sequence[str] = (), termos_ignorar: Sequence[str] = (),
+                 pular: Sequence[Pattern] = (), layout: Optional[Pattern] = None):
+        self.codigo = codigo
+        self.nome = nome
+        self.padroes_data = list(padroes_data)
+        self.padroes_valor = list(padroes_valor)
+        self.palavras_transacao = list(palavras_transacao)
+        self.termos_ignorar = list(termos_ignorar)
+        self.pular = alternancia(pular)
+        self.layout = layout
+
+        if layout is not None:
+            self.varredor: VarredorLinhas = VarredorLayout(
+                layout, self.padroes_data, self.padroes_valor, self.palavras_transacao, self.termos_ignorar
+            )
+        else:
+            self.varredor = VarredorLinhas(
+                self.padroes_data, self.padroes_valor, self.palavras_transacao, self.termos_ignorar
+            )
+
+    @property
+    def generico(self) -> bool:
+        return self is PERFIL_GENERICO
+
+
+# Perfil genérico: usado para bancos sem perfil próprio e como alternativa
+# quando o perfil do banco não encontra nenhum lançamento no documento.
+PERFIL_GENERICO = PerfilBanco(
+    codigo='*',
+    nome='Genérico',
+    # Padrões para diferentes formatos de data
+    padroes_data=[
+        re.compile(r'\b(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})\b'),  # DD/MM/YYYY ou DD-MM-YYYY
+        re.compile(r'\b(\d{1,2}[\/\-]\d{1,2})\b'),                # DD/MM (sem ano)
+        re.compile(r'\b(\d{1,2}[\/\-](jan|fev|mar|abr|jun|jul|ago|set|out|nov|dez))\b', re.IGNORECASE), #DD/XXX (traduzir mês)
+        re.compile(r'\b(\d{1,2}\s*[\/\-]\s*(jan|fev|mar|abr|mai|jun|jul|ago|set|out|nov|dez))\b', re.IGNORECASE)
+    ],
+    # Padrões para valores monetários com indicadores
+    padroes_valor=[
+        # Aceita: -1.234,56  |  1.234,56  |  1.234,56 D
+        re.compile(r'(?P<valor>[+-]?\d{1,3}(?:\.\d{3})*,\d{2})(?:\s*(?P<ind>[DC]|\(\+\)|\(\-\)))?')
+    ],
+    # Palavras-chave para identificar linhas de transação
+    palavras_transacao=[
+        'pix', 'ted', 'doc', 'pagamento', 'saque', 'deposito', 'transferencia', 'dep', 'depósito',
+        'boleto', 'tarifa', 'cheque', 'debito', 'credito', 'cobranca',
+        'impostos', 'agua', 'água', 'luz', 'telefone', 'rende facil', 'rendimento', 'seguros',
+        'seguro', 'pagto', 'consorcio', 'consórcio', 'rende', 'deb', 'cred','déb', 'créd', 'juros', 'iof', 'transf',
+        'sispag', 'rend', 'rede', 'cob', 'tev', 'envio', 'dp', 'db', 'pg', 'fornecedor', 'recebimento'
+    ],
+    # Termos de linhas de cabeçalho ou totais
+    termos_ignorar=[
+        'agencia', 'conta corrente', 'cliente', 'periodo', 'saldo anterior',
+        'total', 'pagina', '---', 'informacoes adicionais'
+    ],
+)
+
+# Linhas de cabeçalho e rodapé comuns aos extratos
+_PULAR_COMUNS = [
+    re.compile(r'^\s*--- PÁGINA \d+ ---'),
+    re.compile(r'^\s*ag[eê]ncia\b', re.IGNORECASE),
+    re.compile(r'^\s*per[ií]odo\b', re.IGNORECASE),
+    re.compile(r'^\s*saldo (anterior|do dia|final|dispon[ií]vel)\b', re.IGNORECASE),
+]
+
+_TERMOS_SALDO = ['saldo', 's a l d o', 'total']
+
+PERFIS: Dict[str, PerfilBanco] = {}
+
+
+def registrar_perfil(perfil: PerfilBanco) -> PerfilBanco:
+    """Registra o perfil para o seu código de banco (substitui um perfil já registrado)."""
+    PERFIS[normalizar_codigo(perfil.codigo)] = perfil
+    return perfil
+
+
+def normalizar_codigo(bank_code: Union[int, str, None]) -> str:
+    """'001', '1' e 1 são o mesmo banco."""
+    return str(bank_code if bank_code is not None else '').strip().lstrip('0') or '0'
+
+
+def obter_perfil(bank_code: Union[int, str, None]) -> PerfilBanco:
+    """Perfil do banco, ou o genérico se o banco não tiver perfil próprio."""
+    return PERFIS.get(normalizar_codigo(bank_code), PERFIL_GENERICO)
+
+
+# Banco do Brasil: "02/01/2024 0000 13105 870 Pix - Enviado 1.234,56 (-)",
+# com lote/documento numéricos antes do histórico e o sinal entre parênteses.
+registrar_perfil(PerfilBanco(
+    codigo='001',
+    nome='Banco do Brasil',
+    padroes_data=[re.compile(r'\b(\d{2}/\d{2}/\d{4})\b')],
+    padroes_valor=[re.compile(rf'(?P<valor>{_VALOR})\s*(?P<ind>\(\+\)|\(-\))')],
+    termos_ignorar=_TERMOS_SALDO,
+    pular=_PULAR_COMUNS + [re.compile(r'^\s*dia\s+lote\b', re.IGNORECASE)],
+    layout=re.compile(
+        rf'(?P<data>\d{{2}}/\d{{2}}/\d{{4}})\s+(?:\d+\s+)*(?P<historico>.+?)\s+'
+        rf'(?P<valor>{_VALOR})\s*(?P<ind>\(\+\)|\(-\))(?:\s+{_VALOR}\s*(?:\(\+\)|\(-\)|[CD]))?$'
+    ),
+))
+
+# Itaú: "02/01 PIX TRANSF FULANO -1.234,56", sinal no próprio valor e saldo opcional no fim.
+registrar_perfil(PerfilBanco(
+    codigo='341',
+    nome='Itaú Unibanco',
+    padroes_data=[re.compile(r'\b(\d{2}/\d{2}(?:/\d{4})?)\b')],
+    padroes_valor=[re.compile(rf'(?P<valor>{_VALOR})(?:\s*(?P<ind>[DC]))?')],
+    termos_ignorar=_TERMOS_SALDO,
+    pular=_PULAR_COMUNS + [re.compile(r'^\s*data\s+lan[cç]amentos?\b', re.IGNORECASE)],
+    layout=re.compile(
+        rf'(?P<data>\d{{2}}/\d{{2}}(?:/\d{{4}})?)\s+(?P<historico>.+?)\s+'
+        rf'(?P<valor>{_VALOR})(?:\s*(?P<ind>[DC]))?(?:\s+{_VALOR}\s*[DC]?)?$'
+    ),
+))
+
+# Caixa: "02/01/2024 000123 PIX RECEBIDO 1.234,56 C", indicador C/D obrigatório.
+registrar_perfil(PerfilBanco(
+    codigo='104',
+    nome='Caixa Econômica Federal',
+    padroes_data=[re.compile(r'\b(\d{2}/\d{2}/\d{4})\b')],
+    padroes_valor=[re.compile(rf'(?P<valor>{_VALOR})\s*(?P<ind>[DC])\b')],
+    termos_ignorar=_TERMOS_SALDO,
+    pular=_PULAR_COMUNS + [re.compile(r'^\s*data\s+mov\b', re.IGNORECASE)],
+    layout=re.compile(
+        rf'(?P<data>\d{{2}}/\d{{2}}/\d{{4}})\s+(?:\d+\s+)?(?P<historico>.+?)\s+'
+        rf'(?P<valor>{_VALOR})\s*(?P<ind>[DC])(?:\s+{_VALOR}\s*[DC])?$'
+    ),
+))
@@ -0,0 +1,300 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.extrator.exportacao import COLUNAS, chave_data
+
+MOVIMENTOS = ('DÉBITO', 'CRÉDITO', 'INDEFINIDO')
+DEBITO, CREDITO, INDEFINIDO = range(len(MOVIMENTOS))
+_CODIGO_MOVIMENTO = {movimento: codigo for codigo, movimento in enumerate(MOVIMENTOS)}
+
+# Datas fora do formato DD/MM/AAAA ficam no fim da ordenação (como em ordenar_por_data)
+_DATA_INVALIDA = np.iinfo(np.int32).max
+
+# Tamanho do início do histórico usado na chave de duplicatas
+PREFIXO_DUPLICATA = 20
+
+
+class TabelaLancamentos:
+    """
+    Lançamentos de um extrato em colunas tipadas, em vez de uma lista de dicts.
+
+    - datas / historicos: códigos (int32) nas listas textos_data / textos_historico,
+      onde cada texto aparece uma única vez;
+    - movimentos: índice em MOVIMENTOS (int8);
+    - centavos: valor em centavos (int64), para que totais e comparações de
+      valor sejam exatos. Nos dicts é o Centavos, ao lado do Valor em reais (float)
+      que sai dele.
+
+    Debito e Credito não são guardados: valem bank_code conforme o movimento,
+    como em ExtratorExtratoBancario._montar_lancamento. Totais, remoção de
+    duplicatas e ordenação são operações do numpy sobre as colunas; os dicts
+    (formato Lancamento) só são montados por iteração ou para_dicts.
+    """
+
+    __slots__ = ('bank_code', 'datas', 'movimentos', 'historicos', 'centavos', 'textos_data', 'textos_historico')
+
+    def __init__(self, bank_code, datas: np.ndarray, movimentos: np.ndarray, historicos: np.ndarray,
+                 centavos: np.ndarray, textos_data: List[str], textos_historico: List[str]):
+        self.bank_code = bank_code
+        self.datas = datas
+        self.movimentos = movimentos
+        self.historicos = historicos
+        self.centavos = centavos
+        self.textos_data = textos_data
+        self.textos_historico = textos_historico
+
+    @classmethod
+    def de_lancamentos(cls, lancamentos: Iterable[Dict[str, Any]], bank_code=None) -> 'TabelaLancamentos':
+        """Monta a tabela a partir de dicts no formato de Lancamento (ver MontadorTabela)."""
+        montador = MontadorTabela(bank_code)
+        for lancamento in lancamentos:
+            montador.acrescentar(lancamento)
+        return montador.tabela()
+
+    @classmethod
+    def de_colunas(cls, colunas: Dict[str, Any]) -> 'TabelaLancamentos':
+        """Inverso de para_colunas."""
+        return cls(
+            colunas['bank_code'],
+            np.asarray(colunas['datas'], dtype=np.int32),
+            np.asarray(colunas['movimentos'], dtype=np.int8),
+            np.asarray(colunas['historicos'], dtype=np.int32),
+            np.asarray(colunas['centavos'], dtype=np.int64),
+            colunas['textos_data'],
+            colunas['textos_historico'],
+        )
+
+    @classmethod
+    def concatenar(cls, tabelas: Sequence['TabelaLancamentos'], bank_code=None) -> 'TabelaLancamentos':
+        """
+        Junta as tabelas em ordem numa só, reinternando os textos (cada tabela
+        tem as suas listas de textos e os seus códigos).
+        """
+        if bank_code is None:
+            bank_code = next((tabela.bank_code for tabela in tabelas if tabela.bank_code != ''), '')
+        codigos_data: Dict[str, int] = {}
+        codigos_historico: Dict[str, int] = {}
+        datas, historicos = [], []
+        for tabela in tabelas:
+            # Código antigo -> código novo, por texto; as colunas são remapeadas de uma vez
+            mapa_data = np.fromiter((codigos_data.setdefault(texto, len(codigos_data)) for texto in tabela.textos_data),
+                                    dtype=np.int32, count=len(tabela.textos_data))
+            mapa_historico = np.fromiter(
+                (codigos_historico.setdefault(texto, len(codigos_historico)) for texto in tabela.textos_historico),
+                dtype=np.int32, count=len(tabela.textos_historico),
+            )
+            datas.append(mapa_data[tabela.datas])
+            historicos.append(mapa_historico[tabela.historicos])
+        return cls(
+            bank_code,
+            np.concatenate(datas) if datas else np.empty(0, dtype=np.int32),
+            np.concatenate([tabela.movimentos for tabela in tabelas]) if tabelas else np.empty(0, dtype=np.int8),
+            np.concatenate(historicos) if historicos else np.empty(0, dtype=np.int32),
+            np.concatenate([tabela.centavos for tabela in tabelas]) if tabelas else np.empty(0, dtype=np.int64),
+            list(codigos_data),
+            list(codigos_historico),
+        )
+
+    def com_continuacoes(self, continuacoes: Dict[int, str]) -> 'TabelaLancamentos':
+        """
+        Cópia com o texto de cada continuação acrescentado ao histórico do
+        lançamento ({índice: texto}), como a linha de continuação na leitura.
+        """
+        if not continuacoes:
+            return self
+        textos = list(self.textos_historico)
+        codigos = {texto: codigo for codigo, texto in enumerate(textos)}
+        historicos = self.historicos.copy()
+        for indice, continuacao in continuacoes.items():
+            texto = f"{textos[historicos[indice]]} {continuacao}"
+            codigo = codigos.get(texto)
+            if codigo is None:
+                codigo = codigos[texto] = len(textos)
+                textos.append(texto)
+            historicos[indice] = codigo
+        return TabelaLancamentos(self.bank_code, self.datas, self.movimentos, historicos, self.centavos,
+                                 self.textos_data, textos)
+
+    def para_colunas(self) -> Dict[str, Any]:
+        """Colunas em listas simples, para gravar como JSON (cache de resultados)."""
+        return dict(
+            bank_code=self.bank_code,
+            datas=self.datas.tolist(),
+            movimentos=self.movimentos.tolist(),
+            historicos=self.historicos.tolist(),
+            centavos=self.centavos.tolist(),
+            textos_data=self.textos_data,
+            textos_historico=self.textos_historico,
+        )
+
+    def __len__(self) -> int:
+        return len(self.centavos)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.para_dicts())
+
+    def _selecionar(self, indices: np.ndarray) -> 'TabelaLancamentos':
+        # As listas de textos são compartilhadas; só as colunas são copiadas
+        return TabelaLancamentos(
+            self.bank_code, self.datas[indices], self.movimentos[indices], self.historicos[indices],
+            self.centavos[indices], self.textos_data, self.textos_historico,
+        )
+
+    def fatia(self, inicio: int, fim: Optional[int] = None) -> 'TabelaLancamentos':
+        """Os lançamentos [inicio, fim), na ordem da tabela."""
+        return self._selecionar(slice(inicio, fim))
+
+    def totais_centavos(self) -> Dict[str, int]:
+        """Totais exatos, em centavos."""
+        total_debitos = int(self.centavos[self.movimentos == DEBITO].sum())
+        total_creditos = int(self.centavos[self.movimentos == CREDITO].sum())
+        return dict(
+            total_debitos=total_debitos,
+            total_creditos=total_creditos,
+            saldo_liquido=total_creditos - total_debitos,
+        )
+
+    def totais(self) -> Dict[str, float]:
+        """Totais em reais: somados em centavos e convertidos só no fim."""
+        return {nome: total / 100 for nome, total in self.totais_centavos().items()}
+
+    def sem_duplicatas(self) -> 'TabelaLancamentos':
+        """
+        Remove os lançamentos repetidos (mesma data, valor e início do histórico),
+        mantendo a primeira ocorrência e a ordem do extrato.
+        """
+        if len(self) < 2:
+            return self
+        # Código do início do histórico: históricos diferentes com o mesmo prefixo colidem
+        codigos_prefixo: Dict[str, int] = {}
+        prefixos = np.fromiter(
+            (codigos_prefixo.setdefault(texto[:PREFIXO_DUPLICATA], len(codigos_prefixo))
+             for texto in self.textos_historico),
+            dtype=np.int32, count=len(self.textos_historico),
+        )[self.historicos]
+
+        # lexsort é estável: dentro de cada chave a primeira ocorrência vem primeiro
+        ordem = np.lexsort((prefixos, self.centavos, self.datas))
+        datas, centavos, prefixos = self.datas[ordem], self.centavos[ordem], prefixos[ordem]
+        primeira = np.empty(len(ordem), dtype=bool)
+        primeira[0] = True
+        primeira[1:] = (datas[1:] != datas[:-1]) | (centavos[1:] != centavos[:-1]) | (prefixos[1:] != prefixos[:-1])
+        if primeira.all():
+            return self
+        return self._selecionar(np.sort(ordem[primeira]))
+
+    def chaves_data(self) -> np.ndarray:
+        """Data de cada lançamento como AAAAMMDD (datas inválidas no fim), calculada uma vez por texto."""
+        chaves = np.fromiter(
+            (chave or _DATA_INVALIDA for chave in map(chave_data, self.textos_data)),
+            dtype=np.int32, count=len(self.textos_data),
+        )
+        return chaves[self.datas]
+
+    def ordenada_por_data(self) -> 'TabelaLancamentos':
+        """Ordena pela data (estável: mesma data mantém a ordem do extrato)."""
+        return self._selecionar(np.argsort(self.chaves_data(), kind='stable'))
+
+    def _conversores(self) -> tuple:
+        # Código -> texto de cada coluna, em arrays de objetos para o código do banco não virar texto numpy
+        debito = np.full(len(MOVIMENTOS), '', dtype=object)
+        credito = np.full(len(MOVIMENTOS), '', dtype=object)
+        debito[CREDITO] = self.bank_code
+        credito[DEBITO] = self.bank_code
+        return (np.asarray(self.textos_data, dtype=object), np.asarray(MOVIMENTOS, dtype=object),
+                np.asarray(self.textos_historico, dtype=object), debito, credito)
+
+    def _colunas_texto(self, indices=slice(None), conversores: Optional[tuple] = None) -> tuple:
+        textos_data, movimentos, textos_historico, debito, credito = conversores or self._conversores()
+        codigos_movimento = self.movimentos[indices]
+        return (textos_data[self.datas[indices]].tolist(), movimentos[codigos_movimento].tolist(),
+                textos_historico[self.historicos[indices]].tolist(), (self.centavos[indices] / 100).tolist(),
+                debito[codigos_movimento].tolist(), credito[codigos_movimento].tolist())
+
+    def linhas(self) -> List[tuple]:
+        """Tuplas na ordem de exportacao.COLUNAS, ordenadas por data (como nas exportações)."""
+        return list(zip(*self.ordenada_por_data()._colunas_texto()))
+
+    def lotes_linhas(self, tamanho: int) -> Iterator[List[tuple]]:
+        """
+        As mesmas tuplas de linhas(), em lotes de até `tamanho`: cada lote é
+        montado só quando pedido, então a exportação não guarda todas as linhas.
+        """
+        ordem = np.argsort(self.chaves_data(), kind='stable')
+        conversores = self._conversores()
+        for inicio in range(0, len(ordem), tamanho):
+            yield list(zip(*self._colunas_texto(ordem[inicio:inicio + tamanho], conversores)))
+
+    def maiores_textos(self) -> List[int]:
+        """
+        Maior len(str(valor)) de cada coluna de linhas(), calculado sobre os
+        valores distintos em uso em vez de linha a linha.
+        """
+        if not len(self):
+            return [0] * len(COLUNAS)
+        usados = np.unique(self.movimentos).tolist()
+        codigo_banco = len(str(self.bank_code))
+        return [
+            max(len(self.textos_data[codigo]) for codigo in np.unique(self.datas).tolist()),
+            max(len(MOVIMENTOS[codigo]) for codigo in usados),
+            max(len(self.textos_historico[codigo]) for codigo in np.unique(self.historicos).tolist()),
+            max(len(str(valor)) for valor in (np.unique(self.centavos) / 100).tolist()),
+            codigo_banco if CREDITO in usados else 0,
+            codigo_banco if DEBITO in usados else 0,
+        ]
+
+    def para_dicts(self) -> List[Dict[str, Any]]:
+        """Lançamentos como dicts no formato de Lancamento (mais Centavos), na ordem do extrato."""
+        datas, movimentos, historicos, valores, debitos, creditos = self._colunas_texto()
+        return [
+            {'Data': d, 'Movimento': m, 'Historico': h, 'Valor': v, 'Debito': db, 'Credito': cr, 'Centavos': c}
+            for d, m, h, v, db, cr, c in zip(datas, movimentos, historicos, valores, debitos, creditos,
+                                              self.centavos.tolist())
+        ]
+
+
+class MontadorTabela:
+    """
+    Acumula lançamentos um a um em arrays tipados e no fim gera a TabelaLancamentos.
+
+    Os textos de data e histórico são internados à medida que chegam, então
+    históricos repetidos (tarifas, rendimentos) ocupam memória uma única vez.
+    O valor vem do Centavos de cada dict, sem passar pelo Valor em reais.
+    """
+
+    __slots__ = ('bank_code', '_datas', '_movimentos', '_historicos', '_centavos', '_codigos_data', '_codigos_historico')
+
+    def __init__(self, bank_code=None):
+        self.bank_code = bank_code
+        self._datas = array('i')
+        self._movimentos = array('b')
+        self._historicos = array('i')
+        self._centavos = array('q')
+        self._codigos_data: Dict[str, int] = {}
+        self._codigos_historico: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._centavos)
+
+    def acrescentar(self, lancamento: Dict[str, Any]) -> None:
+        codigos_data = self._codigos_data
+        codigos_historico = self._codigos_historico
+        self._datas.append(codigos_data.setdefault(lancamento['Data'], len(codigos_data)))
+        self._historicos.append(codigos_historico.setdefault(lancamento['Historico'], len(codigos_historico)))
+        self._movimentos.append(_CODIGO_MOVIMENTO.get(lancamento['Movimento'], INDEFINIDO))
+        self._centavos.append(lancamento['Centavos'])
+        if self.bank_code is None:
+            self.bank_code = lancamento.get('Debito') or lancamento.get('Credito') or None
+
+    def tabela(self) -> TabelaLancamentos:
+        return TabelaLancamentos(
+            self.bank_code if self.bank_code is not None else '',
+            np.frombuffer(self._datas, dtype=np.int32).copy(),
+            np.frombuffer(self._movimentos, dtype=np.int8).copy(),
+            np.frombuffer(self._historicos, dtype=np.int32).copy(),
+            np.frombuffer(self._centavos, dtype=np.int64).copy(),
+            list(self._codigos_data),
+            list(self._codigos_historico),
+        )
@@ -0,0 +1,72 @@
+import re
+from typing import Optional
+
+# Indicador de débito/crédito que segue o valor (já em maiúsculas e sem espaços)
+TIPOS_INDICADOR = {
+    'D': 'DÉBITO', '-': 'DÉBITO', '(-)': 'DÉBITO',
+    'C': 'CRÉDITO', '+': 'CRÉDITO', '(+)': 'CRÉDITO',
+}
+
+_NAO_NUMERICO = re.compile(r'[^\d\.\-\+]')
+
+
+def centavos_formatado(valor_str: str) -> Optional[int]:
+    """
+    Centavos (sem sinal) de um valor no formato dos padrões de valor
+    ("1.234,56", "-1.234,56", "+0,50"), ou None se o texto não tiver uma
+    única vírgula seguida de dois dígitos.
+
+    A conta é feita num único int(): parte inteira sem os pontos de milhar
+    seguida dos dois dígitos dos centavos, sem passar por float. O sinal, se
+    houver, é aceito pelo int() e descartado no fim.
+    """
+    inteiro, _, decimais = valor_str.partition(',')
+    if len(decimais) != 2 or not decimais.isdigit():
+        return None
+    try:
+        resultado = int(inteiro.replace('.', '') + decimais)
+    except ValueError:
+        return None
+    return -resultado if resultado < 0 else resultado
+
+
+def valor_texto_livre(valor_str: str) -> float:
+    """
+    Valor (sem sinal) de um texto em qualquer formato, pelas regras de limpeza
+    de sempre: sem espaços e (+)/(-), pontos de milhar e vírgula decimal
+    trocados, e o que não for número descartado. 0.0 se não houver número.
+    """
+    try:
+        valor_limpo = valor_str.replace(' ', '').replace('(+)', '').replace('(-)', '')
+        if '.' in valor_limpo and ',' in valor_limpo:
+            valor_limpo = valor_limpo.replace('.', '').replace(',', '.')
+        elif ',' in valor_limpo and '.' not in valor_limpo:
+            valor_limpo = valor_limpo.replace(',', '.')
+        valor_limpo = _NAO_NUMERICO.sub('', valor_limpo)
+        return abs(float(valor_limpo)) if valor_limpo else 0.0
+    except Exception:
+        return 0.0
+
+
+def centavos(valor_str: str) -> int:
+    """
+    Valor monetário em centavos, sem sinal. Fora do formato dos padrões de
+    valor, usa valor_texto_livre arredondado ao centavo.
+    """
+    resultado = centavos_formatado(valor_str)
+    if resultado is None:
+        return round(valor_texto_livre(valor_str) * 100)
+    return resultado
+
+
+def tipo_movimento(valor_str: str, indicador: Optional[str]) -> str:
+    """
+    'DÉBITO', 'CRÉDITO' ou 'INDEFINIDO' pelo indicador (D/C, +/-, (+)/(-));
+    sem indicador, pelo sinal do próprio valor.
+    """
+    if indicador:
+        tipo = TIPOS_INDICADOR.get(indicador)
+        if tipo is None:
+            tipo = TIPOS_INDICADOR.get(indicador.upper().strip(), 'INDEFINIDO')
+        return tipo
+    return 'DÉBITO' if valor_str.lstrip().startswith('-') else 'CRÉDITO'
@@ -0,0 +1,193 @@
+import re
+from typing import Optional, Pattern, Sequence
+
+
+class VarreduraLinha:
+    """Resultado da varredura de uma linha do extrato."""
+
+    __slots__ = ('tem_data', 'eh_transacao', 'data', 'valor', 'indicador', 'historico')
+
+    def __init__(self, tem_data: bool, eh_transacao: bool = False, data: Optional[str] = None,
+                 valor: Optional[str] = None, indicador: Optional[str] = None,
+                 historico: Optional[str] = None):
+        self.tem_data = tem_data
+        self.eh_transacao = eh_transacao
+        self.data = data
+        self.valor = valor
+        self.indicador = indicador
+        self.historico = historico
+
+
+def alternancia(padroes: Sequence[Pattern]) -> Optional[Pattern]:
+    """Une padrões em uma única alternância, preservando flags de cada um."""
+    if not padroes:
+        return None
+    partes = []
+    for padrao in padroes:
+        corpo = padrao.pattern
+        if padrao.flags & re.IGNORECASE:
+            corpo = f'(?i:{corpo})'
+        partes.append(f'(?:{corpo})')
+    return re.compile('|'.join(partes))
+
+
+class VarredorLinhas:
+    """
+    Classifica uma linha do extrato e extrai data, valor e histórico de uma vez.
+
+    Cada linha é varrida uma única vez: a mesma varredura responde se a linha
+    é transação, se tem data (usado na checagem de continuação) e já traz os
+    dados do lançamento. As etapas vão da mais barata para a mais cara e param
+    assim que a linha é descartada:
+
+    1. uma alternância com todos os padrões de data (presença de data);
+    2. o padrão de valor, cujo primeiro match já é o valor do lançamento;
+    3. uma alternância com as palavras-chave e outra com os termos a ignorar;
+    4. só para transações: a ocorrência de data escolhida e o histórico.
+
+    O resultado é idêntico ao de aplicar cada padrão separadamente.
+    """
+
+    def __init__(self, padroes_data: Sequence[Pattern], padroes_valor: Sequence[Pattern],
+                 palavras_transacao: Sequence[str], termos_ignorar: Sequence[str]):
+        self.padroes_data = list(padroes_data)
+        self.padroes_valor = list(padroes_valor)
+
+        self._datas = alternancia(self.padroes_data)
+        self._valores = alternancia(self.padroes_valor)
+        # Para cada padrão de data, a alternância dos padrões que vêm depois dele
+        self._datas_restantes = [
+            alternancia(self.padroes_data[i + 1:]) for i in range(len(self.padroes_data))
+        ]
+
+        # Palavras maiores primeiro; a busca só precisa saber se alguma ocorre.
+        # Sem palavras, qualquer linha com data e valor é transação; sem termos, nada é ignorado.
+        self._palavras = re.compile('|'.join(
+            re.escape(p) for p in sorted(palavras_transacao, key=len, reverse=True)
+        )) if palavras_transacao else None
+        self._ignorar = re.compile('|'.join(re.escape(t) for t in termos_ignorar)) if termos_ignorar else None
+
+    def varrer(self, linha: str) -> VarreduraLinha:
+        """
+        Varre a linha uma única vez.
+
+        Args:
+            linha (str): Linha do extrato (já sem espaços nas pontas)
+
+        Returns:
+            VarreduraLinha: Resultado da varredura
+        """
+        if self._datas is None or not self._datas.search(linha):
+            return VarreduraLinha(False)
+
+        if self._valores is None or not self._valores.search(linha):
+            return VarreduraLinha(True)
+
+        linha_lower = linha.lower()
+        if self._palavras is not None and not self._palavras.search(linha_lower):
+            return VarreduraLinha(True)
+        if self._ignorar is not None and self._ignorar.search(linha_lower):
+            return VarreduraLinha(True)
+
+        # O primeiro padrão (na ordem configurada) que casa define a data; usa a última ocorrência
+        for indice, padrao in enumerate(self.padroes_data):
+            ocorrencias = list(padrao.finditer(linha))
+            if ocorrencias:
+                break
+
+        # Idem para o valor, mas usando a primeira ocorrência
+        for padrao in self.padroes_valor:
+            m_valor = padrao.search(linha)
+            if m_valor:
+                break
+
+        return VarreduraLinha(
+            True, True,
+            data=ocorrencias[-1].group(1),
+            valor=m_valor.group('valor'),
+            indicador=m_valor.group('ind'),
+            historico=self._historico(linha, indice, ocorrencias),
+        )
+
+    def ignorada(self, linha: str) -> bool:
+        """Se a linha tem algum dos termos a ignorar (cabeçalho ou totais), com ou sem data e valor."""
+        return self._ignorar is not None and self._ignorar.search(linha.lower()) is not None
+
+    def _historico(self, linha: str, indice: int, ocorrencias) -> str:
+        """
+        Monta o histórico a partir da data já localizada.
+
+        Os padrões anteriores ao da data não casam na linha, então a remoção
+        sequencial começa de fato pela própria data. Se ela é única e nenhum
+        padrão seguinte casa no que sobrou, basta cortá-la pela posição e
+        remover os valores; do contrário usa a remoção sequencial completa.
+        """
+        if len(ocorrencias) != 1:
+            return self.historico_sequencial(linha)
+
+        inicio, fim = ocorrencias[0].span()
+        historico = linha[:inicio] + linha[fim:]
+        restantes = self._datas_restantes[indice]
+        if restantes is not None and restantes.search(historico):
+            return self.historico_sequencial(linha)
+
+        for padrao in self.padroes_valor:
+            historico = padrao.sub('', historico)
+
+        historico = ' '.join(historico.split()).strip('- ')
+        return historico[:100]
+
+    def historico_sequencial(self, linha: str) -> str:
+        """Remove datas e valores aplicando cada padrão em sequência."""
+        historico = linha
+
+        # Remove a data
+        for padrao in self.padroes_data:
+            historico = padrao.sub('', historico)
+
+        # Remove informações de valor
+        for padrao in self.padroes_valor:
+            historico = padrao.sub('', historico)
+
+        # Limpa espaços extras e caracteres especiais
+        historico = re.sub(r'\s+', ' ', historico).strip()
+        historico = re.sub(r'^[-\s]+|[-\s]+$', '', historico)
+
+        return historico[:100]  # Limita tamanho
+
+
+class VarredorLayout(VarredorLinhas):
+    """
+    Varredor para extratos com layout fixo: a linha de lançamento é lida por um
+    único match ancorado (grupos data, historico, valor e ind).
+
+    Linhas que não casam com o layout não são transação; para elas só se
+    verifica a presença de data, usada na checagem de continuação.
+    """
+
+    def __init__(self, layout: Pattern, padroes_data: Sequence[Pattern], padroes_valor: Sequence[Pattern],
+                 palavras_transacao: Sequence[str], termos_ignorar: Sequence[str]):
+        super().__init__(padroes_data, padroes_valor, palavras_transacao, termos_ignorar)
+        self.layout = layout
+
+    def varrer(self, linha: str) -> VarreduraLinha:
+        m = self.layout.match(linha)
+        if m is None:
+            return VarreduraLinha(self._datas is not None and self._datas.search(linha) is not None)
+
+        historico = ' '.join(m.group('historico').split()).strip('- ')
+        historico_lower = historico.lower()
+        if not historico:
+            return VarreduraLinha(True)
+        if self._palavras is not None and not self._palavras.search(historico_lower):
+            return VarreduraLinha(True)
+        if self._ignorar is not None and self._ignorar.search(historico_lower):
+            return VarreduraLinha(True)
+
+        return VarreduraLinha(
+            True, True,
+            data=m.group('data'),
+            valor=m.group('valor'),
+            indicador=m.group('ind'),
+            historico=historico[:100],
+        )
@@ -1,13 +1,48 @@
 import os
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+import time
+import zipfile
+from contextlib import asynccontextmanager
+from typing import Iterator, List, Optional, Tuple, Union
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from app.core.config import settings
-from app.models.schemas import ExtractResponse, Lancamento
-from app.services.extractor_service import extract_from_pdf_path
-from app.utils.files import gen_filename, safe_paths, is_pdf
+from app.extrator.exportacao import formatos_disponiveis, media_type
+from app.extrator.extrator_extrato import MOTORES, OrigemPdf, encerrar_pools
+from app.extrator.medicao import ETAPA_ADMISSAO, Medicao, etapa
+from app.extrator.ocr import ErroOcr
+from app.extrator.tabela_lancamentos import TabelaLancamentos
+from app.models.schemas import (ExtractResponse, ExtractTimings, ExtractTrailer, StreamError, Lancamento, JobStatus,
+                                BatchItem, BatchResponse, IngestResponse, LedgerSummary)
+from app.services.admission_service import OverloadedError, admission, estimate_cost
+from app.services import batch_service, extractor_service
+from app.services.extractor_service import extract_in_process, ingest_pdf, stream_from_pdf_path
+from app.services.ledger_service import ledger_store
+from app.services.batch_service import extract_batch
+from app.services.job_service import job_queue, QueueFullError, DONE, ERROR
+from app.services.metrics_service import CONTENT_TYPE, extraction_metrics, new_measurement, record, record_rejection
+from app.utils.files import (is_pdf, is_zip, read_upload, store_upload_stream, UploadTooLargeError, export_store,
+                             storage_sweeper)
 
-app = FastAPI(title="Advanced Extrator", version="1.0.0")
+# Limite simples de tamanho por PDF (ex.: 20MB)
+MAX_PDF_BYTES = 20 * 1024 * 1024
+
+# Streaming NDJSON: linhas acumuladas por envio; o lote também sai se passar NDJSON_FLUSH_SECONDS
+NDJSON_BATCH = 500
+NDJSON_FLUSH_SECONDS = 0.1
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    storage_sweeper.start()
+    yield
+    storage_sweeper.stop()
+    # O uvicorn encerra o processo com o próprio sinal recebido, sem passar pelo atexit que
+    # fecharia os pools; os processos filhos ficariam órfãos
+    extractor_service.shutdown_pool()
+    batch_service.shutdown_pool()
+    encerrar_pools()
+
+app = FastAPI(title="Advanced Extrator", version="1.0.0", lifespan=lifespan)
 
 # CORS
 origins = [o.strip() for o in settings.CORS_ORIGINS.split(",") if o.strip()]
@@ -19,32 +54,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Assíncrono: responde no próprio event loop, mesmo com todas as threads ocupadas com extrações
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
-@app.post("/api/v1/extract", response_model=ExtractResponse)
-def extract_pdf(bank_code = Form(...), file: UploadFile = File(...), save_xlsx = Form(True)):
-    if not is_pdf(file.content_type, file.filename):
-        raise HTTPException(status_code=400, detail="Envie um arquivo PDF válido.")
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Histogramas das extrações deste processo no formato de texto do Prometheus."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desativadas (METRICS_ENABLED).")
+    return PlainTextResponse(extraction_metrics.render(), media_type=CONTENT_TYPE)
 
-    # Limite simples de tamanho (ex.: 20MB)
-    raw = file.file.read()
-    if len(raw) > 20 * 1024 * 1024:
-        raise HTTPException(status_code=413, detail="Arquivo muito grande (limite 20MB).")
+def extract_timings(medicao: Medicao) -> ExtractTimings:
+    return ExtractTimings(
+        total_seconds=medicao.segundos,
+        stages=medicao.etapas,
+        cached=medicao.em_cache,
+        pages=medicao.paginas,
+        lines=medicao.linhas,
+        lines_matched=medicao.linhas_aceitas,
+        lines_rejected=medicao.linhas_rejeitadas,
+        duplicates=medicao.duplicatas,
+        bytes_in=medicao.bytes_entrada,
+        bytes_out=medicao.bytes_saida,
+        pages_reused=medicao.paginas_reaproveitadas,
+        pages_ocr=medicao.paginas_ocr,
+    )
 
-    # Persiste upload
-    pdf_name = gen_filename(".pdf")
-    pdf_path = safe_paths(settings.STORAGE_UPLOADS, pdf_name)
-    with open(pdf_path, "wb") as f:
-        f.write(raw)
+def admit(pdf: Optional[OrigemPdf], engine: str, medicao: Optional[Medicao] = None, queued: bool = False,
+          cost: Optional[float] = None):
+    """
+    Espera a vez da extração no controle de admissão (custo estimado pelo PDF se
+    não for informado) ou responde 503 com Retry-After.
+    Retorna o ticket a devolver com admission.release.
+    """
+    try:
+        if cost is None:
+            if not queued:
+                admission.check()
+            cost = estimate_cost(pdf) if admission.enabled else 1.0
+        with etapa(medicao, ETAPA_ADMISSAO):
+            return admission.acquire(cost, queued)
+    except OverloadedError as e:
+        record_rejection(engine)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
-    lancamentos, xlsx_filename, totals = extract_from_pdf_path(bank_code, pdf_path, make_xlsx=save_xlsx)
+def run_extraction(bank_code, pdf_path: str, save_xlsx, pdf_sha256: str, export_format: str = "xlsx",
+                   engine: str = "texto", timings: bool = False, queued: bool = False) -> ExtractResponse:
+    """queued: chamada pela fila de jobs, espera a vez sem limite de tempo (ver AdmissionController.acquire)."""
+    medicao = new_measurement(engine, requested=timings)
+    ticket = admit(pdf_path, engine, medicao, queued)
+    try:
+        lancamentos, export_filename, totals = extract_in_process(bank_code, pdf_path, make_export=save_xlsx,
+                                                                  pdf_sha256=pdf_sha256, export_format=export_format,
+                                                                  engine=engine, medicao=medicao)
+    except ErroOcr as e:
+        # PDF digitalizado sem OCR disponível, ou OCR fora do prazo
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        admission.release(ticket)
+    record(medicao)
 
-    if xlsx_filename:
-        download_url = f"/api/v1/files/{xlsx_filename}"
-    else:
-        None
+    download_url = f"/api/v1/files/{export_filename}" if export_filename else None
 
     return ExtractResponse(
         total_lancamentos=len(lancamentos),
@@ -52,11 +124,318 @@ def extract_pdf(bank_code = Form(...), file: UploadFile = File(...), save_xlsx =
         total_creditos=totals["total_creditos"],
         saldo_liquido=totals["saldo_liquido"],
         download_url=download_url,
+        timings=extract_timings(medicao) if timings else None,
     )
 
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que devolve o ticket de admissão quando a resposta
+    termina, inclusive se o cliente desconectar antes de o corpo começar: aí o
+    gerador nunca roda e o finally dele não devolveria nada.
+    """
+
+    def __init__(self, content, ticket, **kwargs):
+        super().__init__(content, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission.release(self.ticket)
+
+def stream_ndjson(bank_code, pdf_path: str, pdf_sha256: str, engine: str = "texto",
+                  timings: bool = False, ticket=None) -> Iterator[str]:
+    """
+    Uma linha JSON por Lancamento, enviadas em lotes à medida que as páginas são lidas
+    (a primeira sai sozinha), e por último um ExtractTrailer com os totais ou um StreamError.
+
+    ticket: vez no controle de admissão, devolvida ao fim do envio (e também
+    por AdmittedStreamingResponse, para quando o gerador nem chega a rodar).
+    """
+    try:
+        yield from _stream_ndjson(bank_code, pdf_path, pdf_sha256, engine, timings)
+    finally:
+        admission.release(ticket)
+
+def _stream_ndjson(bank_code, pdf_path: str, pdf_sha256: str, engine: str, timings: bool) -> Iterator[str]:
+    medicao = new_measurement(engine, requested=timings)
+    rows = stream_from_pdf_path(bank_code, pdf_path, pdf_sha256, engine, medicao)
+    buffer = []
+    count = 0
+    last_flush = time.monotonic()
+    try:
+        while True:
+            try:
+                lancamento = next(rows)
+            except StopIteration as stop:
+                totals = stop.value
+                break
+            buffer.append(Lancamento.model_validate(lancamento).model_dump_json())
+            count += 1
+            if count == 1 or len(buffer) >= NDJSON_BATCH or time.monotonic() - last_flush >= NDJSON_FLUSH_SECONDS:
+                yield "\n".join(buffer) + "\n"
+                buffer = []
+                last_flush = time.monotonic()
+    except Exception as e:
+        # O status 200 já foi enviado; a falha vai como última linha
+        buffer.append(StreamError(error=str(e)).model_dump_json())
+        yield "\n".join(buffer) + "\n"
+        return
+
+    record(medicao)
+    trailer = ExtractTrailer(total_lancamentos=count, timings=extract_timings(medicao) if timings else None, **totals)
+    buffer.append(trailer.model_dump_json())
+    yield "\n".join(buffer) + "\n"
+
+def job_status(job) -> JobStatus:
+    return JobStatus(
+        job_id=job.id,
+        status=job.status,
+        error=job.error,
+        result_url=f"/api/v1/jobs/{job.id}/result" if job.status == DONE else None,
+    )
+
+def receive_pdf(file: UploadFile, persist: bool) -> Tuple[Union[str, bytes], str]:
+    """
+    Persiste o upload em blocos (hash e limite conferidos durante a cópia), ou o lê para a memória.
+    Retorna: (caminho do PDF ou o seu conteúdo, sha256)
+    """
+    try:
+        if file.size is not None and file.size > MAX_PDF_BYTES:
+            raise UploadTooLargeError()
+        if persist:
+            return store_upload_stream(file.file, settings.STORAGE_UPLOADS, MAX_PDF_BYTES)
+        return read_upload(file.file, MAX_PDF_BYTES)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="Arquivo muito grande (limite 20MB).")
+
+def check_export_format(export_format: str) -> str:
+    export_format = export_format.lower()
+    formatos = formatos_disponiveis()
+    if export_format not in formatos:
+        raise HTTPException(status_code=400, detail=f"export_format inválido; use um de: {', '.join(formatos)}.")
+    return export_format
+
+@app.post("/api/v1/extract", response_model=ExtractResponse,
+          responses={200: {"content": {"application/x-ndjson": {}}}, 202: {"model": JobStatus}})
+def extract_pdf(bank_code = Form(...), file: UploadFile = File(...), save_xlsx: bool = Form(True),
+                export_format: str = Form("xlsx"), engine: str = Form("texto"),
+                run_async: bool = Query(False, alias="async"), stream: bool = Query(False),
+                timings: bool = Query(False)):
+    if not is_pdf(file.content_type, file.filename):
+        raise HTTPException(status_code=400, detail="Envie um arquivo PDF válido.")
+    if stream and run_async:
+        raise HTTPException(status_code=400, detail="Use stream ou async, não os dois.")
+
+    export_format = check_export_format(export_format)
+    if engine not in MOTORES:
+        raise HTTPException(status_code=400, detail=f"engine inválido; use um de: {', '.join(MOTORES)}.")
+
+    # Sem persistência, a extração síncrona lê o PDF da memória; jobs assíncronos sempre precisam do arquivo
+    pdf_path, pdf_sha256 = receive_pdf(file, settings.PERSIST_UPLOADS or run_async)
+
+    # Modo streaming: lançamentos em NDJSON conforme as páginas são lidas, sem exportação.
+    # O gerador roda nas threads do servidor (não no pool de extração), mas passa pela admissão
+    if stream:
+        ticket = admit(pdf_path, engine)
+        return AdmittedStreamingResponse(stream_ndjson(bank_code, pdf_path, pdf_sha256, engine, timings, ticket),
+                                         ticket, media_type="application/x-ndjson")
+
+    # Modo assíncrono: enfileira e responde na hora com o id do job
+    if run_async:
+        try:
+            job = job_queue.submit(run_extraction, bank_code, pdf_path, save_xlsx, pdf_sha256, export_format, engine,
+                                   timings, queued=True, inputs=(pdf_path,))
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+        return JSONResponse(status_code=202, content=job_status(job).model_dump())
+
+    return run_extraction(bank_code, pdf_path, save_xlsx, pdf_sha256, export_format, engine, timings)
+
+def read_batch_uploads(files: List[UploadFile]) -> List[tuple]:
+    """
+    Grava os PDFs do lote em STORAGE_UPLOADS, expandindo arquivos .zip (entradas .pdf em ordem alfabética).
+    O limite de BATCH_MAX_FILES é conferido antes de gravar cada PDF ou zip, não depois.
+    Retorna: lista de (filename, pdf_path, pdf_sha256)
+    """
+    statements = []
+
+    def check_batch_size(count: int) -> None:
+        if count > settings.BATCH_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"Lote muito grande (limite {settings.BATCH_MAX_FILES} PDFs).")
+
+    # Os PDFs enviados soltos já contam antes de gravar o primeiro arquivo
+    check_batch_size(sum(1 for file in files if not is_zip(file.content_type, file.filename)))
+    for file in files:
+        if is_zip(file.content_type, file.filename):
+            try:
+                with zipfile.ZipFile(file.file) as zf:
+                    infos = sorted((i for i in zf.infolist() if not i.is_dir() and i.filename.lower().endswith(".pdf")),
+                                   key=lambda i: i.filename)
+                    check_batch_size(len(statements) + len(infos))
+                    for info in infos:
+                        if info.file_size > MAX_PDF_BYTES:
+                            raise HTTPException(status_code=413, detail=f"{info.filename}: arquivo muito grande (limite 20MB).")
+                        with zf.open(info) as entry:
+                            try:
+                                stored = store_upload_stream(entry, settings.STORAGE_UPLOADS, MAX_PDF_BYTES)
+                            except UploadTooLargeError:
+                                raise HTTPException(status_code=413, detail=f"{info.filename}: arquivo muito grande (limite 20MB).")
+                        statements.append((os.path.basename(info.filename),) + stored)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{file.filename}: arquivo zip inválido.")
+        elif is_pdf(file.content_type, file.filename):
+            check_batch_size(len(statements) + 1)
+            try:
+                stored = store_upload_stream(file.file, settings.STORAGE_UPLOADS, MAX_PDF_BYTES)
+            except UploadTooLargeError:
+                raise HTTPException(status_code=413, detail=f"{file.filename}: arquivo muito grande (limite 20MB).")
+            statements.append((file.filename,) + stored)
+        else:
+            raise HTTPException(status_code=400, detail=f"{file.filename}: envie arquivos PDF ou ZIP.")
+    return statements
+
+@app.post("/api/v1/extract/batch", response_model=BatchResponse)
+def extract_pdf_batch(files: List[UploadFile] = File(...), bank_code: List[str] = Form(...), save_xlsx: bool = Form(False)):
+    """
+    Extrai vários extratos de uma vez. Um único bank_code vale para todos os PDFs;
+    vários bank_code são associados aos PDFs na ordem (zips expandidos no lugar).
+    """
+    statements = read_batch_uploads(files)
+    if not statements:
+        raise HTTPException(status_code=400, detail="Nenhum PDF encontrado no lote.")
+    if len(bank_code) == 1:
+        bank_codes = bank_code * len(statements)
+    elif len(bank_code) == len(statements):
+        bank_codes = bank_code
+    else:
+        raise HTTPException(status_code=400, detail="Informe um bank_code para todos os PDFs ou um por PDF.")
+
+    items = [(filename, code, pdf_path, pdf_sha256)
+             for (filename, pdf_path, pdf_sha256), code in zip(statements, bank_codes)]
+
+    # O lote ocupa todos os processos do pool dele: entra sozinho no controle de admissão
+    ticket = admit(None, "batch", cost=admission.capacity)
+    try:
+        results, xlsx_filename = extract_batch(items, make_xlsx=save_xlsx)
+    finally:
+        admission.release(ticket)
+
+    batch_items = []
+    # Somados em centavos, como em TabelaLancamentos.totais
+    total_debitos = total_creditos = 0
+    total_lancamentos = 0
+    for result in results:
+        item = BatchItem(filename=result["filename"], bank_code=result["bank_code"], error=result["error"])
+        if result["totals"] is not None:
+            totals = result["totals"]
+            item.result = ExtractResponse(total_lancamentos=len(result["lancamentos"]), **totals)
+            total_lancamentos += item.result.total_lancamentos
+            total_debitos += round(totals["total_debitos"] * 100)
+            total_creditos += round(totals["total_creditos"] * 100)
+        batch_items.append(item)
+
+    return BatchResponse(
+        items=batch_items,
+        total_lancamentos=total_lancamentos,
+        total_debitos=total_debitos / 100,
+        total_creditos=total_creditos / 100,
+        saldo_liquido=(total_creditos - total_debitos) / 100,
+        download_url=f"/api/v1/files/{xlsx_filename}" if xlsx_filename else None,
+    )
+
+def ledger_summary(account: str, bank_code, ledger: TabelaLancamentos,
+                   download_url: Optional[str] = None) -> LedgerSummary:
+    return LedgerSummary(account=account, bank_code=bank_code, total_lancamentos=len(ledger),
+                         download_url=download_url, **ledger.totais())
+
+@app.post("/api/v1/ledgers/{account}/ingest", response_model=IngestResponse)
+def ingest_statement(account: str, bank_code = Form(...), file: UploadFile = File(...), save_xlsx: bool = Form(False),
+                     export_format: str = Form("xlsx"), timings: bool = Query(False)):
+    """
+    Ingestão incremental do extrato no razão da conta: as páginas já vistas na
+    ingestão anterior (o mesmo extrato reenviado com páginas novas) não são
+    lidas de novo, e o razão só recebe os lançamentos que ainda não tem.
+    Com save_xlsx, exporta o razão inteiro.
+    """
+    if not is_pdf(file.content_type, file.filename):
+        raise HTTPException(status_code=400, detail="Envie um arquivo PDF válido.")
+    export_format = check_export_format(export_format)
+    pdf_path, _ = receive_pdf(file, settings.PERSIST_UPLOADS)
+
+    # Extrai nas threads do servidor: as travas por conta do LedgerStore valem dentro do processo
+    medicao = new_measurement("incremental", requested=timings)
+    ticket = admit(pdf_path, "incremental", medicao)
+    try:
+        result, export_filename = ingest_pdf(account, bank_code, pdf_path, make_export=save_xlsx,
+                                             export_format=export_format, medicao=medicao)
+    except ErroOcr as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        admission.release(ticket)
+    record(medicao)
+
+    statement = ExtractResponse(total_lancamentos=len(result.statement), **result.statement.totais(),
+                                timings=extract_timings(medicao) if timings else None)
+    download_url = f"/api/v1/files/{export_filename}" if export_filename else None
+    return IngestResponse(
+        statement=statement,
+        pages=result.pages,
+        pages_reused=result.pages_reused,
+        new_lancamentos=result.new_rows,
+        ledger=ledger_summary(account, bank_code, result.ledger, download_url),
+    )
+
+@app.get("/api/v1/ledgers/{account}", response_model=LedgerSummary)
+def get_ledger(account: str, bank_code: str = Query(...)):
+    ledger = ledger_store.get(account, bank_code)
+    if ledger is None:
+        raise HTTPException(status_code=404, detail="Razão não encontrado.")
+    return ledger_summary(account, bank_code, ledger)
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return job_status(job)
+
+@app.get("/api/v1/jobs/{job_id}/result", response_model=ExtractResponse)
+def get_job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    if job.status == ERROR:
+        raise HTTPException(status_code=500, detail=f"Falha no processamento: {job.error}")
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail="Job ainda em processamento.")
+    return job.result
+
 @app.get("/api/v1/files/{filename}")
-def download_file(filename: str):
-    fullpath = os.path.join(settings.STORAGE_EXPORTS, os.path.basename(filename))
-    if not os.path.exists(fullpath):
+def download_file(filename: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Exportação gerada. Responde a Range (downloads retomados) e a If-None-Match
+    com o ETag do arquivo (304 sem corpo se o cliente já tem esta versão).
+    """
+    fullpath = export_store.find(os.path.basename(filename))
+    try:
+        stat_result = os.stat(fullpath) if fullpath else None
+    except FileNotFoundError:
+        # Removido pela limpeza entre a busca e o stat
+        stat_result = None
+    if stat_result is None:
         raise HTTPException(status_code=404, detail="Arquivo não encontrado.")
-    return FileResponse(fullpath, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", filename=filename)
\ No newline at end of file
+    response = FileResponse(fullpath, media_type=media_type(fullpath), filename=filename, stat_result=stat_result,
+                            headers={"Cache-Control": "no-cache"})
+    etag = response.headers["etag"]
+    if if_none_match and etag_matches(if_none_match, etag):
+        headers = {name: response.headers[name] for name in ("etag", "last-modified", "cache-control")}
+        return Response(status_code=304, headers=headers)
+    return response
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match casa com o ETag (comparação fraca, como pede a RFC 9110 para este cabeçalho)."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
\ No newline at end of file
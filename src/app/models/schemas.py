@@ -1,4 +1,4 @@
-from typing import List, Optional, Literal, Union
+from typing import Dict, List, Optional, Literal, Union
 from pydantic import BaseModel, Field
 
 MovType = Literal["DÉBITO", "CRÉDITO", "INDEFINIDO"]
@@ -11,9 +11,74 @@ class Lancamento(BaseModel):
     Debito: Union[int, str, None] = None
     Credito: Union[int, str, None] = None
 
+class ExtractTimings(BaseModel):
+    """Medição da extração (?timings=true): segundos por etapa e contagens de páginas, linhas e bytes."""
+    total_seconds: float
+    stages: Dict[str, float]
+    cached: bool
+    pages: int
+    lines: int
+    lines_matched: int
+    lines_rejected: int
+    duplicates: int
+    bytes_in: int
+    bytes_out: int
+    pages_reused: int = 0
+    pages_ocr: int = 0
+
 class ExtractResponse(BaseModel):
     total_lancamentos: int
     total_debitos: float
     total_creditos: float
     saldo_liquido: float
     download_url: Optional[str] = None
+    timings: Optional[ExtractTimings] = None
+
+class ExtractTrailer(ExtractResponse):
+    """Última linha do NDJSON de /api/v1/extract?stream=true, depois dos lançamentos."""
+    type: Literal["totals"] = "totals"
+
+class StreamError(BaseModel):
+    """Última linha do NDJSON quando a extração falha no meio do envio."""
+    type: Literal["error"] = "error"
+    error: str
+
+JobState = Literal["queued", "running", "done", "error"]
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: JobState
+    error: Optional[str] = None
+    result_url: Optional[str] = None
+
+class LedgerSummary(BaseModel):
+    """Razão de uma conta: todos os lançamentos já ingeridos, sem duplicatas."""
+    account: str
+    bank_code: Union[int, str]
+    total_lancamentos: int
+    total_debitos: float
+    total_creditos: float
+    saldo_liquido: float
+    download_url: Optional[str] = None
+
+class IngestResponse(BaseModel):
+    """Resultado de /api/v1/ledgers/{account}/ingest: o extrato enviado e o razão depois dele."""
+    statement: ExtractResponse
+    pages: int
+    pages_reused: int
+    new_lancamentos: int
+    ledger: LedgerSummary
+
+class BatchItem(BaseModel):
+    filename: str
+    bank_code: Union[int, str]
+    result: Optional[ExtractResponse] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    items: List[BatchItem]
+    total_lancamentos: int
+    total_debitos: float
+    total_creditos: float
+    saldo_liquido: float
+    download_url: Optional[str] = None
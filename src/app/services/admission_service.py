@@ -0,0 +1,176 @@
+import io
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+from app.core.config import settings
+from app.extrator.extrator_extrato import OrigemPdf
+
+
+class OverloadedError(Exception):
+    """
+    Extração recusada pelo controle de admissão (fila cheia ou espera longa
+    demais); retry_after é a estimativa, em segundos, de quando tentar de novo.
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def count_pages(pdf: OrigemPdf) -> Optional[int]:
+    """
+    Páginas do PDF pelo /Count da raiz da árvore de páginas (sem percorrer as
+    páginas), ou None se o PDF não abrir.
+    """
+    from PyPDF2 import PdfReader
+    try:
+        leitor = PdfReader(io.BytesIO(pdf) if isinstance(pdf, (bytes, bytearray)) else pdf)
+        count = leitor.trailer["/Root"]["/Pages"].get("/Count")
+        return int(count) if count is not None else len(leitor.pages)
+    except Exception:
+        return None
+
+
+def estimate_cost(pdf: OrigemPdf, pages: Optional[int] = None) -> float:
+    """
+    Custo estimado de uma extração, em unidades de ADMISSION_CAPACITY:
+    ADMISSION_PAGE_COST por página mais ADMISSION_MB_COST por MB do arquivo
+    (páginas com imagens e fontes embutidas pesam mais que o número de páginas diz).
+    Um PDF que não abre custa só pelo tamanho; a extração é que vai recusá-lo.
+    """
+    size = len(pdf) if isinstance(pdf, (bytes, bytearray)) else os.path.getsize(pdf)
+    if pages is None:
+        pages = count_pages(pdf) or 0
+    return max(1.0, pages * settings.ADMISSION_PAGE_COST + size / (1024 * 1024) * settings.ADMISSION_MB_COST)
+
+
+class _Ticket:
+    __slots__ = ("cost", "admitted_at", "released")
+
+    def __init__(self, cost: float):
+        self.cost = cost
+        self.admitted_at = 0.0
+        self.released = False
+
+
+class AdmissionController:
+    """
+    Limita as extrações em andamento no processo: no máximo max_running ao mesmo
+    tempo e, somadas, no máximo capacity unidades de custo (ver estimate_cost).
+
+    Quem não cabe espera numa fila FIFO (um PDF grande na frente não é passado
+    para trás pelos pequenos) por até max_wait segundos; com a fila em
+    max_queued, a recusa é imediata. As recusas levantam OverloadedError com um
+    Retry-After estimado pelo tempo médio por unidade de custo das extrações
+    recentes. Um PDF com custo maior que capacity entra sozinho.
+
+    Com max_running <= 0 o controle fica desligado.
+    """
+
+    # Peso da última extração na média do tempo por unidade de custo
+    SMOOTHING = 0.2
+
+    def __init__(self, max_running: int, capacity: float, max_wait: float, max_queued: int):
+        self.max_running = max_running
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.max_queued = max_queued
+        self._running = 0
+        self._running_cost = 0.0
+        self._waiting: Deque[_Ticket] = deque()
+        self._seconds_per_cost: Optional[float] = None
+        self._cond = threading.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_running > 0
+
+    def _fits(self, ticket: _Ticket) -> bool:
+        if self._running == 0:
+            return True
+        return self._running < self.max_running and self._running_cost + ticket.cost <= self.capacity
+
+    def check(self) -> None:
+        """
+        Recusa na hora se a fila já está cheia, antes de o chamador gastar
+        tempo estimando o custo da extração.
+        """
+        if not self.enabled:
+            return
+        with self._cond:
+            full = len(self._waiting) >= self.max_queued
+        if full:
+            raise OverloadedError("Servidor ocupado: fila de extração cheia.", self.retry_after())
+
+    def retry_after(self) -> int:
+        """Segundos estimados para a fila atual esvaziar (entre 1 e 60)."""
+        with self._cond:
+            backlog = self._running_cost + sum(ticket.cost for ticket in self._waiting)
+            per_cost = self._seconds_per_cost
+        if per_cost is None:
+            return 1
+        return min(60, max(1, math.ceil(backlog * per_cost / max(1, self.max_running))))
+
+    def acquire(self, cost: float, queued: bool = False) -> Optional[_Ticket]:
+        """
+        Espera a vez da extração.
+
+        queued: a extração já esperou na fila de jobs (?async=1); espera o quanto
+        for preciso, sem max_wait nem max_queued, já que não há cliente aguardando a resposta.
+        Retorna o ticket a devolver em release (None com o controle desligado).
+        """
+        if not self.enabled:
+            return None
+        ticket = _Ticket(cost)
+        with self._cond:
+            if not self._waiting and self._fits(ticket):
+                return self._admit(ticket)
+            if not queued and len(self._waiting) >= self.max_queued:
+                rejected = "Servidor ocupado: fila de extração cheia."
+            else:
+                self._waiting.append(ticket)
+                deadline = None if queued else time.monotonic() + self.max_wait
+                while not (self._waiting[0] is ticket and self._fits(ticket)):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                admitted = self._waiting[0] is ticket and self._fits(ticket)
+                self._waiting.remove(ticket)
+                # Com este fora da fila, o próximo pode caber
+                self._cond.notify_all()
+                if admitted:
+                    return self._admit(ticket)
+                rejected = "Servidor ocupado: tempo de espera na fila de extração esgotado."
+        raise OverloadedError(rejected, self.retry_after())
+
+    def _admit(self, ticket: _Ticket) -> _Ticket:
+        self._running += 1
+        self._running_cost += ticket.cost
+        ticket.admitted_at = time.monotonic()
+        return ticket
+
+    def release(self, ticket: Optional[_Ticket]) -> None:
+        """Devolve a vez; chamadas repetidas com o mesmo ticket não têm efeito."""
+        if ticket is None:
+            return
+        seconds = time.monotonic() - ticket.admitted_at
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._running -= 1
+            self._running_cost -= ticket.cost
+            per_cost = seconds / ticket.cost
+            if self._seconds_per_cost is None:
+                self._seconds_per_cost = per_cost
+            else:
+                self._seconds_per_cost += self.SMOOTHING * (per_cost - self._seconds_per_cost)
+            self._cond.notify_all()
+
+
+admission = AdmissionController(settings.ADMISSION_MAX_RUNNING, settings.ADMISSION_CAPACITY,
+                                settings.ADMISSION_MAX_WAIT_SECONDS, settings.ADMISSION_MAX_QUEUED)
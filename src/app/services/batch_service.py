@@ -0,0 +1,92 @@
+import os
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.extrator.extrator_extrato import extrator_compartilhado
+from app.extrator.medicao import Medicao
+from app.extrator.tabela_lancamentos import TabelaLancamentos
+from app.services.extractor_service import extract_from_pdf_path, init_worker
+from app.services.metrics_service import new_measurement, record
+from app.utils.files import export_store, gen_filename
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+_pool: Optional['ProcessPoolExecutor'] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> 'ProcessPoolExecutor':
+    from concurrent.futures import ProcessPoolExecutor
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(1, settings.BATCH_WORKERS), initializer=init_worker)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Encerra o pool do lote (na saída do servidor)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _extract_one(bank_code, pdf_path: str,
+                 pdf_sha256: str) -> Tuple[TabelaLancamentos, Dict[str, float], Optional[Medicao]]:
+    # A tabela em colunas volta do processo filho em poucos arrays, sem serializar um dict por linha.
+    # A medição volta junto para ser registrada nas métricas do processo pai.
+    medicao = new_measurement()
+    lancamentos, _, totals = extract_from_pdf_path(bank_code, pdf_path, make_export=False, pdf_sha256=pdf_sha256,
+                                                   medicao=medicao)
+    return lancamentos, totals, medicao
+
+
+def sheet_name(filename: str, index: int, used: set) -> str:
+    """
+    Nome de aba válido no Excel (até 31 caracteres, sem []:*?/\\) e único no arquivo.
+    """
+    base = re.sub(r'[\[\]:*?/\\]', '_', os.path.splitext(os.path.basename(filename))[0]).strip("'") or "Extrato"
+    name = base[:31]
+    if name in used:
+        suffix = f" ({index + 1})"
+        name = base[:31 - len(suffix)] + suffix
+    used.add(name)
+    return name
+
+
+def extract_batch(items: List[Tuple[str, Any, str, str]], make_xlsx: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Processa vários PDFs em paralelo no pool de processos.
+
+    items: lista de (filename, bank_code, pdf_path, pdf_sha256).
+    Retorna: (resultados na ordem de items, xlsx_filename consolidado ou None).
+    Cada resultado tem filename, bank_code, lancamentos e totals, ou error se o PDF falhou.
+    """
+    pool = _get_pool()
+    futures = [pool.submit(_extract_one, bank_code, pdf_path, pdf_sha256) for _, bank_code, pdf_path, pdf_sha256 in items]
+
+    results = []
+    for (filename, bank_code, _, _), future in zip(items, futures):
+        result = dict(filename=filename, bank_code=bank_code, lancamentos=[], totals=None, error=None)
+        try:
+            result["lancamentos"], result["totals"], medicao = future.result()
+            record(medicao)
+        except Exception as e:
+            result["error"] = str(e)
+        results.append(result)
+
+    xlsx_filename = None
+    sheets = {}
+    used = set()
+    for i, result in enumerate(results):
+        if result["lancamentos"]:
+            sheets[sheet_name(result["filename"], i, used)] = result["lancamentos"]
+    if make_xlsx and sheets:
+        xlsx_filename = gen_filename("_lote.xlsx")
+        extrator_compartilhado().salvar_planilhas(sheets, export_store.path(xlsx_filename))
+
+    return results, xlsx_filename
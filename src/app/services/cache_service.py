@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.extrator.extrator_extrato import VERSAO_EXTRATOR
+from app.extrator.tabela_lancamentos import TabelaLancamentos
+from app.utils.files import storage_sweeper
+
+RESULT_FILE = "resultado.json"
+# Exportações ficam como exportacao.<extensão>, uma por formato
+EXPORT_NAME = "exportacao"
+# Fração de max_bytes que o despejo deixa livre: a próxima varredura só vem depois de gravados outros tantos bytes
+EVICT_HEADROOM = 0.1
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcula o SHA-256 de um arquivo lendo em blocos.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(pdf_sha256: str, bank_code, engine: str = "texto", ocr: Optional[str] = None) -> str:
+    """
+    Chave do resultado: conteúdo do PDF + banco + versão do extrator (+ motor, se não for o de texto,
+    + motor de OCR, se houver um disponível: com ou sem ele, páginas digitalizadas dão outro resultado).
+    """
+    raw = f"{pdf_sha256}:{bank_code}:{VERSAO_EXTRATOR}"
+    if engine != "texto":
+        raw += f":{engine}"
+    if ocr:
+        raw += f":ocr={ocr}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def link_or_copy(src: str, dst: str) -> None:
+    """
+    Cria dst apontando para o mesmo conteúdo de src (hard link, ou cópia se não for possível).
+    """
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class ResultCache:
+    """
+    Cache em disco dos resultados de extração, com despejo LRU por tamanho.
+
+    Cada entrada é um diretório <base_dir>/<chave>/ com o resultado em JSON
+    (colunas da TabelaLancamentos e totais) e as exportações já geradas, uma por formato. O
+    mtime do JSON marca o último acesso e define a ordem de despejo.
+
+    O diretório não é varrido a cada gravação: o processo soma o tamanho do
+    que grava a partir da última varredura e só despeja quando a soma passa de
+    max_bytes; o despejo deixa EVICT_HEADROOM livre. A varredura periódica
+    (sweep, pelo StorageSweeper) conta também o que os outros processos gravaram.
+    """
+
+    def __init__(self, base_dir: str, max_bytes: int):
+        self.base_dir = base_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Tamanho do cache na última varredura mais o gravado depois dela; None antes da primeira
+        self._size: Optional[int] = None
+        if self.enabled:
+            os.makedirs(self.base_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.base_dir, key)
+
+    def _export_file(self, key: str, extension: str) -> str:
+        return os.path.join(self._entry_dir(key), EXPORT_NAME + extension)
+
+    def get(self, key: str) -> Optional[Tuple[TabelaLancamentos, Dict[str, float]]]:
+        """
+        Retorna: (tabela de lançamentos, totais), ou None se não houver entrada
+        (ou se ela não tiver a tabela em colunas).
+        """
+        result_path = os.path.join(self._entry_dir(key), RESULT_FILE)
+        try:
+            with open(result_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if "tabela" not in data:
+            return None
+        try:
+            os.utime(result_path)
+        except OSError:
+            return None
+        return TabelaLancamentos.de_colunas(data["tabela"]), data["totals"]
+
+    def get_export(self, key: str, extension: str) -> Optional[str]:
+        """
+        Retorna o caminho da exportação com a extensão dada, se a entrada já a tiver.
+        """
+        path = self._export_file(key, extension)
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, tabela: TabelaLancamentos, totals: Dict[str, float],
+            export_path: Optional[str] = None) -> None:
+        """
+        Grava uma entrada nova. A entrada é montada em um diretório temporário e
+        renomeada, então leitores concorrentes nunca veem uma entrada pela metade.
+        """
+        entry = self._entry_dir(key)
+        if os.path.exists(entry):
+            if export_path:
+                self.attach_export(key, export_path)
+            return
+
+        tmp = os.path.join(self.base_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        try:
+            with open(os.path.join(tmp, RESULT_FILE), "w", encoding="utf-8") as f:
+                json.dump(dict(tabela=tabela.para_colunas(), totals=totals), f, ensure_ascii=False, separators=(",", ":"))
+                size = f.tell()
+            if export_path:
+                link_or_copy(export_path, os.path.join(tmp, EXPORT_NAME + os.path.splitext(export_path)[1]))
+                size += os.path.getsize(export_path)
+            os.rename(tmp, entry)
+        except OSError:
+            # Outra requisição gravou a mesma entrada primeiro
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        self._added(size)
+
+    def attach_export(self, key: str, export_path: str) -> None:
+        """
+        Acrescenta uma exportação (formato dado pela extensão) a uma entrada gravada sem ela.
+        """
+        if os.path.isdir(self._entry_dir(key)):
+            link_or_copy(export_path, self._export_file(key, os.path.splitext(export_path)[1]))
+            self._added(os.path.getsize(export_path))
+
+    def _added(self, size: int) -> None:
+        """Soma size ao tamanho estimado e despeja só se ele passou de max_bytes (ou ainda não é conhecido)."""
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+                if self._size <= self.max_bytes:
+                    return
+        self.evict()
+
+    def sweep(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """Despejo periódico (interface de FileStore.sweep para o StorageSweeper)."""
+        return self.evict()
+
+    def evict(self) -> Tuple[int, int]:
+        """
+        Varre o diretório e, se ele passou de max_bytes, remove as entradas
+        acessadas há mais tempo até sobrar EVICT_HEADROOM de max_bytes livre.
+        Retorna: (entradas removidas, bytes liberados)
+        """
+        removed = freed = 0
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.base_dir):
+                if not entry.is_dir() or entry.name.startswith("."):
+                    continue
+                size = 0
+                last_access = 0.0
+                try:
+                    for item in os.scandir(entry.path):
+                        st = item.stat()
+                        size += st.st_size
+                        if item.name == RESULT_FILE:
+                            last_access = st.st_mtime
+                except OSError:
+                    # Entrada removida por outro processo durante a varredura
+                    continue
+                entries.append((last_access, size, entry.path))
+                total += size
+
+            if total > self.max_bytes:
+                target = self.max_bytes * (1 - EVICT_HEADROOM)
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= target:
+                        break
+                    shutil.rmtree(path, ignore_errors=True)
+                    total -= size
+                    removed += 1
+                    freed += size
+            self._size = total
+        return removed, freed
+
+
+result_cache = ResultCache(settings.STORAGE_CACHE, settings.CACHE_MAX_BYTES)
+if result_cache.enabled:
+    storage_sweeper.add(result_cache)
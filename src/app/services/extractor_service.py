@@ -1,31 +1,263 @@
+import hashlib
 import os
-from typing import Optional, Tuple, List, Dict, Any
-from app.extrator.extrator_extrato import ExtratorExtratoBancario
+import signal
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Tuple, Dict, Any, Generator
+from app.extrator.extrator_extrato import ExtratorExtratoBancario, OrigemPdf, MOTORES, extrator_compartilhado
+from app.extrator.exportacao import FORMATOS
+from app.extrator.medicao import ETAPA_CACHE, ETAPA_EXPORTACAO, Medicao, etapa
+from app.extrator.ocr import FonteOcr, MotorTesseract, configurar_ocr, encerrar_ocr, fonte_ocr, limitar_ocr
+from app.extrator.tabela_lancamentos import MontadorTabela, TabelaLancamentos
 from app.core.config import settings
+from app.services.cache_service import result_cache, cache_key, sha256_file, link_or_copy
+from app.services.ledger_service import IngestResult, ledger_key, ledger_store
+from app.utils.files import export_store, ocr_store
 
-def extract_from_pdf_path(bank_code, pdf_path: str, make_xlsx: bool = True) -> Tuple[List[Dict[str, Any]], Optional[str], Dict[str, float]]:
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+_pool: Optional['ProcessPoolExecutor'] = None
+_pool_lock = threading.Lock()
+
+# Configurado também nos processos dos pools de extração e de lote, que importam este módulo
+if settings.OCR_ENABLED:
+    configurar_ocr(FonteOcr(MotorTesseract(settings.OCR_LANG, settings.TESSERACT_CMD, settings.OCR_TIMEOUT_SECONDS),
+                            settings.OCR_PROCESSES, settings.OCR_TIMEOUT_SECONDS, ocr_store))
+
+def _result_key(bank_code, pdf: OrigemPdf, pdf_sha256: Optional[str], engine: str) -> str:
+    if engine not in MOTORES:
+        raise ValueError(f"Motor de extração desconhecido: {engine}")
+    if not pdf_sha256:
+        pdf_sha256 = sha256_file(pdf) if isinstance(pdf, str) else hashlib.sha256(pdf).hexdigest()
+    # O OCR só entra no motor de texto
+    ocr = fonte_ocr() if engine == "texto" else None
+    return cache_key(pdf_sha256, bank_code, engine, ocr.motor.identificacao if ocr else None)
+
+def _input_size(pdf: OrigemPdf) -> int:
+    return os.path.getsize(pdf) if isinstance(pdf, str) else len(pdf)
+
+def _export(key: str, lancamentos: TabelaLancamentos, export_format: str,
+            extrator: Optional[ExtratorExtratoBancario] = None, from_cache: bool = False,
+            medicao: Optional[Medicao] = None) -> str:
+    """
+    Gera a exportação em STORAGE_EXPORTS, reaproveitando a do cache se já existir.
+    Retorna o nome do arquivo.
+    """
+    extension = FORMATOS[export_format].extensao
+    export_filename = key + "_processado" + extension
+    export_fullpath = export_store.path(export_filename)
+
+    with etapa(medicao, ETAPA_EXPORTACAO):
+        cached_export = result_cache.get_export(key, extension) if from_cache else None
+        if cached_export:
+            if os.path.exists(export_fullpath):
+                # O TTL da limpeza volta a contar: o link é entregue de novo
+                os.utime(export_fullpath)
+            else:
+                link_or_copy(cached_export, export_fullpath)
+        else:
+            extrator = extrator or extrator_compartilhado(settings.PDF_WORKERS)
+            extrator.salvar_exportacao(lancamentos, export_fullpath, export_format)
+            if from_cache:
+                result_cache.attach_export(key, export_fullpath)
+    if medicao is not None and os.path.exists(export_fullpath):
+        medicao.bytes_saida = os.path.getsize(export_fullpath)
+    return export_filename
+
+def extract_from_pdf_path(bank_code, pdf_path: OrigemPdf, make_export: bool = True, pdf_sha256: Optional[str] = None,
+                          export_format: str = "xlsx", engine: str = "texto",
+                          medicao: Optional[Medicao] = None) -> Tuple[TabelaLancamentos, Optional[str], Dict[str, float]]:
+    """
+    Retorna: (lancamentos, export_filename, totais)
+
+    Os lançamentos vêm em uma TabelaLancamentos (colunas tipadas); itere ou use
+    para_dicts() para obter os dicts no formato de Lancamento.
+
+    pdf_path: caminho do PDF ou o seu conteúdo em memória (upload não persistido).
+    export_format: chave de exportacao.FORMATOS (xlsx, csv, jsonl ou parquet).
+    engine: motor de extração, "texto" (texto corrido) ou "colunas" (posição do texto).
+
+    A chave (SHA-256 do PDF, calculado se não for informado, + bank_code +
+    versão do extrator) nomeia a exportação e, com o cache ativo, localiza o
+    resultado já processado.
+
+    medicao: se informada, recebe os tempos por etapa e as contagens da extração.
+    """
+    if export_format not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {export_format}")
+
+    started = time.perf_counter()
+    if medicao is not None:
+        medicao.bytes_entrada = _input_size(pdf_path)
+    key = _result_key(bank_code, pdf_path, pdf_sha256, engine)
+    if result_cache.enabled:
+        with etapa(medicao, ETAPA_CACHE):
+            cached = result_cache.get(key)
+        if cached is not None:
+            lancamentos, totals = cached
+            export_filename = None
+            if make_export and lancamentos:
+                export_filename = _export(key, lancamentos, export_format, from_cache=True, medicao=medicao)
+            _finish(medicao, lancamentos, started, cached=True)
+            return lancamentos, export_filename, totals
+
+    extrator = extrator_compartilhado(settings.PDF_WORKERS)
+    if engine == "colunas":
+        lancamentos = extrator.extrair_tabela_colunas(bank_code, pdf_path, medicao)
+    else:
+        texto = extrator.extrair_texto_pdf(pdf_path, medicao)
+        if texto.strip():
+            lancamentos = extrator.extrair_tabela(bank_code, texto, medicao)
+        else:
+            lancamentos = TabelaLancamentos.de_lancamentos([], bank_code)
+    totals = lancamentos.totais()
+
+    export_filename = None
+    if make_export and lancamentos:
+        export_filename = _export(key, lancamentos, export_format, extrator, medicao=medicao)
+
+    if result_cache.enabled:
+        with etapa(medicao, ETAPA_CACHE):
+            result_cache.put(key, lancamentos, totals,
+                             export_store.path(export_filename) if export_filename else None)
+
+    _finish(medicao, lancamentos, started)
+    return lancamentos, export_filename, totals
+
+def init_worker() -> None:
+    """
+    Inicialização dos processos dos pools de extração e de lote, criados por
+    fork do servidor: cada processo já faz uma extração inteira, sem abrir outro
+    pool por página nem mais de um processo de OCR, e volta aos sinais padrão (os handlers do uvicorn herdados
+    só marcam o fim do servidor, e o processo sobreviveria ao SIGTERM). O Ctrl+C
+    fica para o servidor, que encerra o pool.
+
+    O pool de OCR que o processo abrir é encerrado na saída dele, antes de o
+    multiprocessing esperar pelos filhos e de fechar as filas (prioridade 10),
+    por onde os filhos recebem o aviso de saída; sem isso esperariam para sempre.
+    """
+    from multiprocessing.util import Finalize
+    settings.PDF_WORKERS = 1
+    limitar_ocr(1)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    Finalize(None, encerrar_ocr, exitpriority=100)
+
+def _get_pool() -> 'ProcessPoolExecutor':
+    from concurrent.futures import ProcessPoolExecutor
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.EXTRACT_PROCESSES, initializer=init_worker)
+        return _pool
+
+def shutdown_pool() -> None:
+    """Encerra o pool de extração (na saída do servidor)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+def _extract_in_worker(bank_code, pdf_path: OrigemPdf, make_export: bool, pdf_sha256: Optional[str],
+                       export_format: str, engine: str, medicao: Optional[Medicao]):
+    # A medição chega copiada no processo filho e volta com os tempos dele
+    lancamentos, export_filename, totals = extract_from_pdf_path(bank_code, pdf_path, make_export, pdf_sha256,
+                                                                 export_format, engine, medicao)
+    return lancamentos, export_filename, totals, medicao
+
+def extract_in_process(bank_code, pdf_path: OrigemPdf, make_export: bool = True, pdf_sha256: Optional[str] = None,
+                       export_format: str = "xlsx", engine: str = "texto",
+                       medicao: Optional[Medicao] = None) -> Tuple[TabelaLancamentos, Optional[str], Dict[str, float]]:
+    """
+    extract_from_pdf_path num processo do pool de extração (EXTRACT_PROCESSES).
+
+    O trabalho pesado (leitura das páginas, regex das linhas, exportação) fica
+    fora do processo do servidor, e o GIL dele fica livre para as outras
+    requisições; a thread da requisição só espera o resultado. Com
+    EXTRACT_PROCESSES=0 extrai na própria thread.
     """
-    Retorna: (lancamentos, xlsx_filename, totais)
+    if settings.EXTRACT_PROCESSES <= 0:
+        return extract_from_pdf_path(bank_code, pdf_path, make_export, pdf_sha256, export_format, engine, medicao)
+    future = _get_pool().submit(_extract_in_worker, bank_code, pdf_path, make_export, pdf_sha256, export_format,
+                                engine, medicao)
+    lancamentos, export_filename, totals, medicao_filho = future.result()
+    if medicao is not None:
+        medicao.copiar(medicao_filho)
+    return lancamentos, export_filename, totals
+
+def _finish(medicao: Optional[Medicao], lancamentos: TabelaLancamentos, started: float, cached: bool = False) -> None:
+    if medicao is not None:
+        medicao.em_cache = cached
+        medicao.lancamentos = len(lancamentos)
+        medicao.segundos = time.perf_counter() - started
+
+def ingest_pdf(account: str, bank_code, pdf_path: OrigemPdf, make_export: bool = False, export_format: str = "xlsx",
+               medicao: Optional[Medicao] = None) -> Tuple[IngestResult, Optional[str]]:
+    """
+    Ingestão incremental no razão da conta (ver ledger_service.LedgerStore).
+    Retorna: (resultado, export_filename do razão inteiro ou None)
+
+    Não usa o cache de resultados: o que é reaproveitado são as páginas da
+    ingestão anterior da mesma conta.
+    """
+    if export_format not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {export_format}")
+
+    started = time.perf_counter()
+    if medicao is not None:
+        medicao.bytes_entrada = _input_size(pdf_path)
+    result = ledger_store.ingest(account, bank_code, pdf_path, medicao)
+
+    export_filename = None
+    if make_export and result.ledger:
+        export_filename = ledger_key(account, bank_code) + "_razao" + FORMATOS[export_format].extensao
+        export_fullpath = export_store.path(export_filename)
+        with etapa(medicao, ETAPA_EXPORTACAO):
+            extrator_compartilhado().salvar_exportacao(result.ledger, export_fullpath, export_format)
+        if medicao is not None:
+            medicao.bytes_saida = os.path.getsize(export_fullpath)
+
+    _finish(medicao, result.statement, started)
+    return result, export_filename
+
+def stream_from_pdf_path(bank_code, pdf_path: OrigemPdf, pdf_sha256: Optional[str] = None, engine: str = "texto",
+                         medicao: Optional[Medicao] = None) -> Generator[Dict[str, Any], None, Dict[str, float]]:
     """
-    extrator = ExtratorExtratoBancario()
-    texto = extrator.extrair_texto_pdf(pdf_path)
-    if not texto.strip():
-        return [], None, dict(total_debitos=0.0, total_creditos=0.0, saldo_liquido=0.0)
+    Gera os lançamentos à medida que as páginas do PDF são lidas e retorna os
+    totais ao terminar (valor de retorno do gerador, via StopIteration/yield from).
 
-    lancamentos = extrator.extrair_lancamentos(bank_code, texto)
+    Não gera exportação. Com o cache ativo, um resultado já processado é
+    reenviado direto do cache, e um resultado novo é gravado nele ao final.
 
-    total_debitos = sum(l['Valor'] for l in lancamentos if l.get('Movimento') == 'DÉBITO')
-    total_creditos = sum(l['Valor'] for l in lancamentos if l.get('Movimento') == 'CRÉDITO')
-    saldo_liquido = (total_creditos - total_debitos)
+    Com medicao, o tempo total inclui o consumo dos lançamentos (o envio ao
+    cliente), e das etapas só a leitura das páginas é separada.
+    """
+    started = time.perf_counter()
+    if medicao is not None:
+        medicao.bytes_entrada = _input_size(pdf_path)
+    key = _result_key(bank_code, pdf_path, pdf_sha256, engine)
+    if result_cache.enabled:
+        with etapa(medicao, ETAPA_CACHE):
+            cached = result_cache.get(key)
+        if cached is not None:
+            lancamentos, totals = cached
+            yield from lancamentos
+            _finish(medicao, lancamentos, started, cached=True)
+            return totals
 
-    xlsx_filename = None
-    if make_xlsx and lancamentos:
-        xlsx_filename = os.path.basename(pdf_path).rsplit(".", 1)[0] + "_processado.xlsx"
-        xlsx_fullpath = os.path.join(settings.STORAGE_EXPORTS, xlsx_filename)
-        extrator.salvar_planilha(lancamentos, xlsx_fullpath)
+    extrator = extrator_compartilhado()
+    rows = extrator.iter_lancamentos_colunas if engine == "colunas" else extrator.iter_lancamentos
+    montador = MontadorTabela(bank_code)
+    for lancamento in rows(bank_code, pdf_path, medicao):
+        montador.acrescentar(lancamento)
+        yield lancamento
 
-    return lancamentos, xlsx_filename, dict(
-        total_debitos=total_debitos,
-        total_creditos=total_creditos,
-        saldo_liquido=saldo_liquido
-    )
\ No newline at end of file
+    tabela = montador.tabela()
+    totals = tabela.totais()
+    if result_cache.enabled:
+        with etapa(medicao, ETAPA_CACHE):
+            result_cache.put(key, tabela, totals)
+    _finish(medicao, tabela, started)
+    return totals
@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Sequence
+from app.core.config import settings
+from app.utils.files import upload_store
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+
+class QueueFullError(Exception):
+    """Fila de jobs cheia; o cliente deve tentar de novo mais tarde."""
+
+
+class Job:
+    __slots__ = ("id", "status", "result", "error", "created_at", "finished_at")
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+
+class JobQueue:
+    """
+    Fila de jobs em processo com um número fixo de threads consumidoras.
+
+    A fila tem tamanho máximo: quando cheia, submit levanta QueueFullError em
+    vez de acumular trabalho. Jobs concluídos ficam disponíveis por ttl_seconds.
+    Os uploads de entrada de cada job ficam fora da limpeza (upload_store.pin)
+    enquanto ele está na fila ou rodando.
+    """
+
+    def __init__(self, workers: int, max_queued: int, ttl_seconds: int):
+        self.workers = max(1, workers)
+        self.ttl_seconds = ttl_seconds
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max(1, max_queued))
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _start(self) -> None:
+        # Threads criadas sob demanda, para não existirem em processos que nunca usam a fila
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"extract-job-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _purge(self) -> None:
+        limit = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < limit]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def submit(self, fn: Callable[..., Any], *args, inputs: Sequence[str] = (), **kwargs) -> Job:
+        """
+        Enfileira fn(*args, **kwargs) e retorna o job criado.
+        inputs: uploads lidos pelo job, protegidos da limpeza até ele terminar.
+        """
+        self._start()
+        self._purge()
+
+        job = Job(uuid.uuid4().hex)
+        inputs = tuple(inputs)
+        for path in inputs:
+            upload_store.pin(path)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait((job, fn, args, kwargs, inputs))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            self._release(inputs)
+            raise QueueFullError("Fila de processamento cheia.")
+        return job
+
+    @staticmethod
+    def _release(inputs: Sequence[str]) -> None:
+        for path in inputs:
+            upload_store.unpin(path)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self) -> None:
+        while True:
+            job, fn, args, kwargs, inputs = self._queue.get()
+            job.status = RUNNING
+            # O TTL dos uploads volta a contar de agora, e não de quando o job entrou na fila
+            for path in inputs:
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+            try:
+                job.result = fn(*args, **kwargs)
+                job.status = DONE
+            except Exception as e:
+                job.error = str(e)
+                job.status = ERROR
+            finally:
+                job.finished_at = time.time()
+                self._release(inputs)
+                self._queue.task_done()
+
+
+job_queue = JobQueue(settings.JOB_WORKERS, settings.JOB_QUEUE_SIZE, settings.JOB_TTL_SECONDS)
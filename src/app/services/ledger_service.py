@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from app.core.config import settings
+from app.extrator.datas import PeriodoExtrato
+from app.extrator.extrator_extrato import VERSAO_EXTRATOR, OrigemPdf, extrator_compartilhado
+from app.extrator.incremental import PaginaExtraida
+from app.extrator.medicao import ETAPA_RAZAO, Medicao, etapa
+from app.extrator.perfis_bancos import PERFIL_GENERICO
+from app.extrator.tabela_lancamentos import TabelaLancamentos
+
+try:
+    import fcntl
+except ImportError:  # Windows: só a trava do processo
+    fcntl = None
+
+STATE_FILE = "razao.json"
+LEDGER_FILE = "razao.jsonl"
+# Páginas lidas por uma versão do extrator; as de outras versões são apagadas
+PAGES_FILE = "paginas-{version}.jsonl"
+LOCK_FILE = ".lock"
+
+# Contas cujo razão e páginas ficam em memória entre as ingestões
+CACHED_ACCOUNTS = 16
+
+
+class IngestResult(NamedTuple):
+    statement: TabelaLancamentos
+    ledger: TabelaLancamentos
+    new_rows: int
+    pages: int
+    pages_reused: int
+
+
+def ledger_key(account: str, bank_code) -> str:
+    """Nome do diretório da conta: não depende de o identificador da conta ser um nome de arquivo válido."""
+    return hashlib.sha256(f"{account}:{bank_code}".encode("utf-8")).hexdigest()
+
+
+def _page_to_json(page: PaginaExtraida, generic: bool) -> Dict[str, Any]:
+    return dict(content=page.conteudo, text=page.texto, table=page.tabela.para_colunas(),
+                continuation=page.continuacao, open=page.aberta, generic=generic)
+
+
+def _page_from_json(data: Dict[str, Any]) -> PaginaExtraida:
+    return PaginaExtraida(data["content"], data["text"], TabelaLancamentos.de_colunas(data["table"]),
+                          data.get("continuation"), data.get("open", False))
+
+
+class _JsonlTail:
+    """
+    Um JSONL só de acréscimos e até onde ele já foi lido: cada leitura traz só
+    as linhas acrescentadas desde a anterior (por este ou por outro processo).
+    """
+
+    __slots__ = ("path", "inode", "offset")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inode: Optional[int] = None
+        self.offset = 0
+
+    def read(self) -> Tuple[bool, List[Any]]:
+        """
+        (restarted, objects): os objetos das linhas completas ainda não lidas.
+        Se o arquivo sumiu, foi trocado ou ficou menor, a leitura recomeça do
+        início e restarted é True: o que foi lido antes não vale mais.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            restarted = self.inode is not None
+            self.inode, self.offset = None, 0
+            return restarted, []
+        with f:
+            info = os.fstat(f.fileno())
+            restarted = info.st_ino != self.inode or info.st_size < self.offset
+            if restarted:
+                self.inode, self.offset = info.st_ino, 0
+            f.seek(self.offset)
+            data = f.read()
+        # Uma linha sem \n no fim é uma escrita em andamento ou interrompida
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        return restarted, [json.loads(line) for line in data[:end].decode("utf-8").splitlines() if line]
+
+    def append(self, objects: List[Any]) -> None:
+        """Acrescenta uma linha por objeto, depois de descartar o resto de uma escrita interrompida."""
+        if not objects:
+            return
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        with open(self.path, "ab") as f:
+            if f.tell() > self.offset:
+                f.truncate(self.offset)
+            f.write("".join(encode(o) + "\n" for o in objects).encode("utf-8"))
+            f.flush()
+            self.inode, self.offset = os.fstat(f.fileno()).st_ino, f.tell()
+
+
+class _Account:
+    """Razão e páginas conhecidas de uma conta, lidos dos JSONL e atualizados pelo que foi acrescentado."""
+
+    __slots__ = ("bank_code", "ledger_file", "pages_file", "ledger", "pages")
+
+    def __init__(self, directory: str, bank_code):
+        self.bank_code = bank_code
+        self.ledger_file = _JsonlTail(os.path.join(directory, LEDGER_FILE))
+        self.pages_file = _JsonlTail(os.path.join(directory, PAGES_FILE.format(version=VERSAO_EXTRATOR)))
+        self.ledger = TabelaLancamentos.de_lancamentos([], bank_code)
+        # (página, lida pelo perfil genérico)
+        self.pages: List[Tuple[PaginaExtraida, bool]] = []
+
+    def refresh(self) -> None:
+        restarted, rows = self.ledger_file.read()
+        if restarted or rows:
+            added = TabelaLancamentos.de_lancamentos(rows, self.bank_code)
+            self.ledger = added if restarted else TabelaLancamentos.concatenar([self.ledger, added], self.bank_code)
+        restarted, pages = self.pages_file.read()
+        if restarted:
+            self.pages = []
+        self.pages.extend((_page_from_json(page), page.get("generic", False)) for page in pages)
+
+
+class LedgerStore:
+    """
+    Razão por conta (account + bank_code) alimentado por ingestões incrementais de extratos.
+
+    Cada conta tem um diretório <base_dir>/<ledger_key>/ com:
+    - razao.jsonl: todos os lançamentos já ingeridos, um por linha, sem
+      duplicatas pela mesma chave da extração (data, valor e início do
+      histórico). Cada ingestão só acrescenta as linhas novas;
+    - paginas-<VERSAO_EXTRATOR>.jsonl: o índice das páginas já lidas, pelas
+      impressões do conteúdo e do texto, com os seus lançamentos. Também só
+      recebe as páginas novas; o próximo envio do extrato (o do mês até
+      hoje, com páginas novas) só lê as que mudaram, ver
+      ExtratorExtratoBancario.extrair_tabela_incremental;
+    - razao.json: versão do extrator, período e perfil do último extrato.
+
+    As páginas de outra VERSAO_EXTRATOR são apagadas na ingestão; o razão não.
+    Ingestões da mesma conta são serializadas entre processos por flock em
+    .lock (leituras com a trava compartilhada), e o processo guarda o que já
+    leu das CACHED_ACCOUNTS contas mais recentes, então uma ingestão custa o
+    que ela acrescenta, não o tamanho do razão. Uma linha cortada por uma
+    falha no meio da escrita é ignorada e descartada na ingestão seguinte.
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._accounts: "OrderedDict[str, _Account]" = OrderedDict()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _state_path(self, key: str) -> str:
+        return os.path.join(self.base_dir, key, STATE_FILE)
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @contextmanager
+    def _file_lock(self, key: str, exclusive: bool) -> Iterator[None]:
+        # flock vale entre processos (workers do uvicorn); sem fcntl fica só a trava do processo
+        path = os.path.join(self.base_dir, key, LOCK_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _account(self, key: str, bank_code) -> _Account:
+        """A conta em memória, atualizada pelo que outros processos acrescentaram (com a trava da conta)."""
+        with self._locks_lock:
+            account = self._accounts.pop(key, None)
+            if account is None:
+                account = _Account(os.path.join(self.base_dir, key), bank_code)
+            self._accounts[key] = account
+            while len(self._accounts) > CACHED_ACCOUNTS:
+                self._accounts.popitem(last=False)
+        account.refresh()
+        return account
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._state_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, key: str, state: Dict[str, Any]) -> None:
+        path = self._state_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _remove_old_pages(self, key: str) -> None:
+        current = PAGES_FILE.format(version=VERSAO_EXTRATOR)
+        prefix, suffix = PAGES_FILE.split("{version}")
+        directory = os.path.join(self.base_dir, key)
+        for name in os.listdir(directory):
+            if name != current and name.startswith(prefix) and name.endswith(suffix):
+                os.remove(os.path.join(directory, name))
+
+    def get(self, account: str, bank_code) -> Optional[TabelaLancamentos]:
+        """Razão da conta, ou None se ela nunca teve um extrato ingerido."""
+        key = ledger_key(account, bank_code)
+        if not os.path.isdir(os.path.join(self.base_dir, key)):
+            return None
+        with self._lock(key), self._file_lock(key, exclusive=False):
+            state = self._load(key)
+            if state is None:
+                return None
+            return self._account(key, bank_code).ledger
+
+    def ingest(self, account: str, bank_code, pdf: OrigemPdf, medicao: Optional[Medicao] = None) -> IngestResult:
+        """
+        Extrai o extrato reaproveitando as páginas já lidas da conta e acrescenta
+        ao razão os lançamentos que ele ainda não tem.
+        """
+        key = ledger_key(account, bank_code)
+        with self._lock(key), self._file_lock(key, exclusive=True):
+            with etapa(medicao, ETAPA_RAZAO):
+                state = self._load(key)
+                stored = self._account(key, bank_code)
+            pages, period, profile = [], None, None
+            if state is not None and state.get("version") == VERSAO_EXTRATOR:
+                # Só as páginas lidas pelo mesmo perfil do último extrato
+                pages = [page for page, generic in stored.pages if generic == state["generic"]]
+                if state["period"]:
+                    period = PeriodoExtrato(*(date.fromisoformat(d) for d in state["period"]))
+                profile = PERFIL_GENERICO if state["generic"] else None
+
+            extrator = extrator_compartilhado()
+            result = extrator.extrair_tabela_incremental(bank_code, pdf, pages, period, profile, medicao)
+
+            before = stored.ledger
+            if len(before):
+                # A primeira ocorrência fica: o que já está no razão vem antes, na mesma ordem
+                ledger = TabelaLancamentos.concatenar([before, result.tabela], bank_code).sem_duplicatas()
+            else:
+                ledger = result.tabela
+            new_rows = len(ledger) - len(before)
+
+            with etapa(medicao, ETAPA_RAZAO):
+                stored.ledger_file.append(ledger.fatia(len(before)).para_dicts())
+                stored.ledger = ledger
+                generic = result.perfil.generico
+                known = {(page.conteudo, page.texto, page_generic) for page, page_generic in stored.pages}
+                new_pages = [page for page in result.paginas if (page.conteudo, page.texto, generic) not in known]
+                stored.pages_file.append([_page_to_json(page, generic) for page in new_pages])
+                stored.pages.extend((page, generic) for page in new_pages)
+                self._remove_old_pages(key)
+                self._save(key, dict(
+                    version=VERSAO_EXTRATOR,
+                    account=account,
+                    bank_code=bank_code,
+                    period=[d.isoformat() for d in result.periodo] if result.periodo else None,
+                    generic=generic,
+                ))
+
+        return IngestResult(result.tabela, ledger, new_rows, len(result.paginas), result.reaproveitadas)
+
+
+ledger_store = LedgerStore(settings.STORAGE_LEDGERS)
@@ -0,0 +1,168 @@
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.extrator.medicao import Medicao
+
+# Formato de texto do Prometheus (exposition format 0.0.4)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PAGES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+LINES_BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(10))  # 1 KiB a 256 MiB
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Histogram:
+    """
+    Histograma com buckets fixos, uma série por combinação de valores dos rótulos.
+
+    Cada série guarda as contagens por bucket (não acumuladas), a soma e o
+    total; render() acumula os buckets como o Prometheus espera.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: esperados os rótulos {', '.join(self.labelnames)}")
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _labels(self, labels: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items())
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    """Contador, uma série por combinação de valores dos rótulos."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: esperados os rótulos {', '.join(self.labelnames)}")
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, count in series:
+            pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            lines.append(f"{self.name}{{{pairs}}} {count}" if pairs else f"{self.name} {count}")
+        return lines
+
+
+class ExtractionMetrics:
+    """
+    Histogramas das extrações do processo, alimentados pelas Medicao de cada
+    requisição e expostos em /metrics.
+
+    Cada processo do servidor (worker do uvicorn) tem os seus; extrações do
+    lote, feitas em processos filhos, são registradas aqui pelo processo pai.
+    """
+
+    def __init__(self):
+        self.duration = Histogram("extrator_extraction_seconds", "Tempo total de uma extração.",
+                                  SECONDS_BUCKETS, ("engine", "cache"))
+        self.stages = Histogram("extrator_stage_seconds", "Tempo de cada etapa da extração.",
+                                SECONDS_BUCKETS, ("stage",))
+        self.pages = Histogram("extrator_pages", "Páginas lidas por extração.", PAGES_BUCKETS)
+        self.ocr_pages = Histogram("extrator_ocr_pages", "Páginas digitalizadas lidas por OCR, nas extrações que têm alguma.",
+                                   PAGES_BUCKETS)
+        self.lines = Histogram("extrator_lines", "Linhas por extração: lidas, aceitas, rejeitadas e duplicadas.",
+                               LINES_BUCKETS, ("kind",))
+        self.bytes = Histogram("extrator_bytes", "Bytes do PDF recebido (in) e da exportação gerada (out).",
+                               BYTES_BUCKETS, ("direction",))
+        self.rejected = Counter("extrator_admission_rejected_total",
+                                "Extrações recusadas com 503 pelo controle de admissão.", ("engine",))
+
+    def observe(self, medicao: Medicao) -> None:
+        self.duration.observe(medicao.segundos, medicao.motor, "hit" if medicao.em_cache else "miss")
+        for stage, seconds in medicao.etapas.items():
+            self.stages.observe(seconds, stage)
+        self.bytes.observe(medicao.bytes_entrada, "in")
+        if medicao.bytes_saida:
+            self.bytes.observe(medicao.bytes_saida, "out")
+        # Resultados do cache não passam pela leitura do PDF
+        if not medicao.em_cache:
+            self.pages.observe(medicao.paginas)
+            if medicao.paginas_ocr:
+                self.ocr_pages.observe(medicao.paginas_ocr)
+            self.lines.observe(medicao.linhas, "read")
+            self.lines.observe(medicao.linhas_aceitas, "matched")
+            self.lines.observe(medicao.linhas_rejeitadas, "rejected")
+            self.lines.observe(medicao.duplicatas, "duplicate")
+
+    def render(self) -> str:
+        series = (self.duration, self.stages, self.pages, self.ocr_pages, self.lines, self.bytes, self.rejected)
+        return "\n".join(line for metric in series for line in metric.render()) + "\n"
+
+
+def new_measurement(engine: str = "texto", requested: bool = False) -> Optional[Medicao]:
+    """
+    Medicao para uma extração, ou None (sem nenhum custo de medição) quando as
+    métricas estão desligadas e a requisição não pediu timings.
+    """
+    if settings.METRICS_ENABLED or requested:
+        return Medicao(engine)
+    return None
+
+
+def record(medicao: Optional[Medicao]) -> None:
+    if medicao is not None and settings.METRICS_ENABLED:
+        extraction_metrics.observe(medicao)
+
+
+def record_rejection(engine: str) -> None:
+    if settings.METRICS_ENABLED:
+        extraction_metrics.rejected.inc(engine)
+
+
+extraction_metrics = ExtractionMetrics()
@@ -1,6 +1,25 @@
 import os
 import uuid
-from typing import Tuple
+import hashlib
+import logging
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+from app.core.config import settings
+
+# Tamanho dos blocos lidos do upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Subdiretório de cada arquivo: os primeiros caracteres do nome, que começa por um hash em hexadecimal
+SHARD_CHARS = 2
+
+# Arquivos mais novos que isso nunca são removidos pela cota (uploads e exportações em uso)
+SWEEP_GRACE_SECONDS = 300
+
+logger = logging.getLogger(__name__)
+
+class UploadTooLargeError(Exception):
+    """Upload maior que o limite; detectado durante a leitura, antes de terminar de recebê-lo."""
 
 def gen_filename(suffix: str) -> str:
     return f"{uuid.uuid4().hex}{suffix}"
@@ -10,4 +29,208 @@ def safe_paths(base_dir: str, filename: str) -> str:
     return os.path.join(base_dir, filename)
 
 def is_pdf(content_type: str, filename: str) -> bool:
-    return (content_type in ("application/pdf", "application/octet-stream")) and filename.lower().endswith(".pdf")
\ No newline at end of file
+    return (content_type in ("application/pdf", "application/octet-stream")) and filename.lower().endswith(".pdf")
+
+def is_zip(content_type: str, filename: str) -> bool:
+    return (content_type in ("application/zip", "application/x-zip-compressed", "application/octet-stream")) and filename.lower().endswith(".zip")
+
+def _iter_upload(fileobj: BinaryIO, max_bytes: int, digest) -> Iterator[bytes]:
+    size = 0
+    for chunk in iter(lambda: fileobj.read(UPLOAD_CHUNK_SIZE), b""):
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLargeError(f"Arquivo maior que {max_bytes} bytes.")
+        digest.update(chunk)
+        yield chunk
+
+def shard_path(base_dir: str, filename: str) -> str:
+    """<base_dir>/<início do nome>/<nome>: nenhum diretório acumula milhões de arquivos."""
+    filename = os.path.basename(filename)
+    return os.path.join(base_dir, filename[:SHARD_CHARS], filename)
+
+def store_upload_stream(fileobj: BinaryIO, base_dir: str, max_bytes: int) -> Tuple[str, str]:
+    """
+    Copia o upload em blocos para o disco, calculando o SHA-256 e conferindo o limite
+    de tamanho no caminho (levanta UploadTooLargeError). O arquivo é nomeado pelo
+    hash, no subdiretório do início do hash; o mesmo PDF enviado de novo não gera
+    outra cópia, só renova a data do arquivo (o TTL da limpeza conta a partir dela).
+    Retorna: (caminho, sha256)
+    """
+    digest = hashlib.sha256()
+    tmp = safe_paths(base_dir, gen_filename(".part"))
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in _iter_upload(fileobj, max_bytes, digest):
+                f.write(chunk)
+        path = shard_path(base_dir, digest.hexdigest() + ".pdf")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path, digest.hexdigest()
+
+def read_upload(fileobj: BinaryIO, max_bytes: int) -> Tuple[bytes, str]:
+    """
+    Lê o upload em blocos para a memória, sem gravá-lo, com o mesmo hash e limite de store_upload_stream.
+    Retorna: (conteúdo, sha256)
+    """
+    digest = hashlib.sha256()
+    raw = b"".join(_iter_upload(fileobj, max_bytes, digest))
+    return raw, digest.hexdigest()
+
+class FileStore:
+    """
+    Diretório de arquivos nomeados por hash (uploads, exportações), dividido em
+    subdiretórios pelo início do nome (ver shard_path) e limpo por sweep():
+
+    - ttl_seconds: remove os arquivos gravados há mais tempo que isso;
+    - max_bytes: acima disso, remove os gravados há mais tempo até caber
+      (sem tocar nos mais novos que SWEEP_GRACE_SECONDS).
+
+    0 desliga cada limite. Arquivos gravados direto em base_dir, de antes dos
+    subdiretórios, continuam sendo encontrados e entram na limpeza. Arquivos
+    presos por pin() (entrada de um job na fila) ficam fora dela até unpin().
+    """
+
+    def __init__(self, base_dir: str, ttl_seconds: int, max_bytes: int):
+        self.base_dir = base_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Caminho -> quantos pins (o mesmo PDF pode ser entrada de mais de um job)
+        self._pinned: Dict[str, int] = {}
+        self._pins_lock = threading.Lock()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def path(self, filename: str) -> str:
+        """Caminho onde gravar o arquivo (o subdiretório é criado)."""
+        path = shard_path(self.base_dir, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def find(self, filename: str) -> Optional[str]:
+        """Caminho do arquivo existente, ou None."""
+        for path in (shard_path(self.base_dir, filename), safe_paths(self.base_dir, filename)):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def pin(self, path: str) -> None:
+        """Protege o arquivo da limpeza até o unpin() correspondente."""
+        path = os.path.normpath(path)
+        with self._pins_lock:
+            self._pinned[path] = self._pinned.get(path, 0) + 1
+
+    def unpin(self, path: str) -> None:
+        path = os.path.normpath(path)
+        with self._pins_lock:
+            count = self._pinned.get(path, 0) - 1
+            if count > 0:
+                self._pinned[path] = count
+            else:
+                self._pinned.pop(path, None)
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        files = []
+        for entry in os.scandir(self.base_dir):
+            try:
+                if entry.is_dir():
+                    entries = list(os.scandir(entry.path))
+                elif entry.is_file():
+                    entries = [entry]
+                else:
+                    continue
+                for item in entries:
+                    if item.is_file():
+                        st = item.stat()
+                        files.append((st.st_mtime, st.st_size, item.path))
+            except OSError:
+                # Removido por outra limpeza (outro processo do servidor) durante a varredura
+                continue
+        return files
+
+    def sweep(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Aplica o TTL e a cota.
+        Retorna: (arquivos removidos, bytes liberados)
+        """
+        if not self.ttl_seconds and not self.max_bytes:
+            return 0, 0
+        now = time.time() if now is None else now
+        removed = freed = 0
+        with self._lock:
+            files = sorted(self._files())
+            total = sum(size for _, size, _ in files)
+            for mtime, size, path in files:
+                age = now - mtime
+                expired = self.ttl_seconds and age > self.ttl_seconds
+                over_quota = self.max_bytes and total > self.max_bytes and age > SWEEP_GRACE_SECONDS
+                if not (expired or over_quota):
+                    continue
+                # Conferido e removido sob o mesmo lock que pin(): um arquivo preso nunca some
+                with self._pins_lock:
+                    if os.path.normpath(path) in self._pinned:
+                        continue
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError:
+                        continue
+                removed += 1
+                freed += size
+                total -= size
+        return removed, freed
+
+
+class StorageSweeper:
+    """
+    Thread que chama sweep() das FileStore a cada interval segundos, até stop().
+    Outros armazenamentos com base_dir e sweep() (o cache de resultados) entram por add().
+    """
+
+    def __init__(self, stores: Sequence[FileStore], interval: float):
+        self.stores = list(stores)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, store) -> None:
+        """Inclui o armazenamento nas próximas rodadas de limpeza."""
+        self.stores.append(store)
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            for store in self.stores:
+                try:
+                    removed, freed = store.sweep()
+                except OSError:
+                    logger.exception("Falha na limpeza de %s", store.base_dir)
+                    continue
+                if removed:
+                    logger.info("Limpeza de %s: %d arquivo(s), %d bytes", store.base_dir, removed, freed)
+            if self._stop.wait(self.interval):
+                return
+
+
+upload_store = FileStore(settings.STORAGE_UPLOADS, settings.UPLOADS_TTL_SECONDS, settings.UPLOADS_MAX_BYTES)
+export_store = FileStore(settings.STORAGE_EXPORTS, settings.EXPORTS_TTL_SECONDS, settings.EXPORTS_MAX_BYTES)
+ocr_store = FileStore(settings.STORAGE_OCR, settings.OCR_CACHE_TTL_SECONDS, settings.OCR_CACHE_MAX_BYTES)
+storage_sweeper = StorageSweeper((upload_store, export_store, ocr_store), settings.STORAGE_SWEEP_SECONDS)
@@ -0,0 +1,24 @@
+"""
+Configuração comum dos testes (pytest, a partir da raiz do repositório).
+
+O app lê o ambiente ao ser importado (app.core.config) e cria os diretórios de
+storage; por isso o ambiente é montado aqui, antes de qualquer import de app:
+storage num diretório temporário, cache de resultados desligado e extrações
+na própria thread, sem pools de processos.
+"""
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+# sintetico: o gerador de extratos dos benchmarks
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+_ARMAZENAMENTO = tempfile.mkdtemp(prefix="extrator-testes-")
+for _nome in ("UPLOADS", "EXPORTS", "CACHE", "LEDGERS", "OCR"):
+    os.environ.setdefault(f"STORAGE_{_nome}", os.path.join(_ARMAZENAMENTO, _nome.lower()))
+os.environ.setdefault("CACHE_MAX_BYTES", "0")
+os.environ.setdefault("EXTRACT_PROCESSES", "0")
+os.environ.setdefault("PDF_WORKERS", "1")
+os.environ.setdefault("STORAGE_SWEEP_SECONDS", "0")
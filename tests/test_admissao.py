@@ -0,0 +1,95 @@
+"""
+Controle de admissão: vez por custo e ordem de chegada, recusas com
+Retry-After e devolução do ticket quando o cliente do fluxo desconecta.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+import sintetico
+from app import main
+from app.services.admission_service import AdmissionController, OverloadedError
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    """Controle próprio do teste no lugar do de app.main (duas extrações de até 100 unidades)."""
+    controle = AdmissionController(2, 100.0, 0.2, 1)
+    monkeypatch.setattr(main, "admission", controle)
+    return controle
+
+
+def test_desligado():
+    assert AdmissionController(0, 100.0, 1.0, 1).acquire(1.0) is None
+
+
+def test_capacidade_e_fila(admission):
+    primeiro = admission.acquire(60.0)
+    # Não cabe na capacidade: espera max_wait e é recusado
+    with pytest.raises(OverloadedError) as recusa:
+        admission.acquire(60.0)
+    assert recusa.value.retry_after >= 1
+    segundo = admission.acquire(40.0)
+    assert admission._running == 2
+
+    admitidos = []
+    espera = threading.Thread(target=lambda: admitidos.append(admission.acquire(10.0, queued=True)))
+    espera.start()
+    while not admission._waiting:
+        time.sleep(0.001)
+    # Fila cheia (max_queued = 1): recusa imediata
+    with pytest.raises(OverloadedError):
+        admission.check()
+    admission.release(primeiro)
+    espera.join(5)
+    assert admitidos and admission._running == 2
+
+    for ticket in (segundo, admitidos[0], segundo):
+        admission.release(ticket)
+    assert admission._running == 0 and admission._running_cost == 0
+
+
+def test_maior_que_a_capacidade_entra_sozinho(admission):
+    ticket = admission.acquire(1000.0)
+    with pytest.raises(OverloadedError):
+        admission.acquire(1.0)
+    admission.release(ticket)
+    admission.release(admission.acquire(1.0))
+
+
+def _desconectado(spec: str, resposta) -> None:
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(mensagem):
+        raise OSError("cliente desconectado")
+
+    async def executar():
+        try:
+            await resposta({"type": "http", "asgi": {"spec_version": spec}}, receive, send)
+        except (OSError, ClientDisconnect):
+            pass
+
+    asyncio.run(executar())
+
+
+@pytest.mark.parametrize("spec", ["2.0", "2.4"])
+def test_desconexao_antes_do_corpo_devolve_o_ticket(admission, spec):
+    ticket = admission.acquire(1.0)
+    gerador = main.stream_ndjson("999", "/nao/existe.pdf", "0" * 64, ticket=ticket)
+    _desconectado(spec, main.AdmittedStreamingResponse(gerador, ticket, media_type="application/x-ndjson"))
+    assert admission._running == 0
+
+
+def test_fluxo_completo_devolve_o_ticket(admission):
+    pdf = sintetico.pdf(sintetico.gerar(100))
+    with TestClient(main.app) as cliente:
+        resposta = cliente.post("/api/v1/extract", params={"stream": "true"}, data={"bank_code": "999"},
+                                files={"file": ("extrato.pdf", pdf, "application/pdf")})
+    assert resposta.status_code == 200
+    assert '"type":"totals"' in resposta.text.splitlines()[-1].replace(" ", "")
+    assert admission._running == 0
@@ -0,0 +1,119 @@
+"""
+Limpeza do storage (FileStore.sweep) e os uploads de entrada dos jobs, presos
+enquanto o job está na fila ou rodando.
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from app.services import job_service
+from app.services.job_service import DONE, ERROR, JobQueue, QueueFullError
+from app.utils.files import SWEEP_GRACE_SECONDS, FileStore
+
+TTL = 60
+
+
+def gravar(store: FileStore, nome: str, tamanho: int = 10, idade: float = 0) -> str:
+    caminho = store.path(nome)
+    with open(caminho, "wb") as f:
+        f.write(b"x" * tamanho)
+    if idade:
+        momento = time.time() - idade
+        os.utime(caminho, (momento, momento))
+    return caminho
+
+
+def nome(i: int) -> str:
+    return f"{i:02x}" + "0" * 62 + ".pdf"
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    """FileStore do teste no lugar do upload_store que a fila de jobs prende."""
+    store = FileStore(str(tmp_path), TTL, 0)
+    monkeypatch.setattr(job_service, "upload_store", store)
+    return store
+
+
+def esperar(job, status=(DONE, ERROR)):
+    limite = time.monotonic() + 5
+    while job.status not in status and time.monotonic() < limite:
+        time.sleep(0.005)
+    assert job.status in status
+
+
+def test_ttl(uploads):
+    velho, novo = gravar(uploads, nome(1), idade=TTL + 10), gravar(uploads, nome(2))
+    assert uploads.find(nome(1)) == velho
+    assert uploads.sweep() == (1, 10)
+    assert not os.path.exists(velho) and os.path.exists(novo)
+
+
+def test_cota_remove_os_mais_antigos_fora_da_carencia(tmp_path):
+    store = FileStore(str(tmp_path), 0, 25)
+    antigo = gravar(store, nome(1), idade=SWEEP_GRACE_SECONDS + 20)
+    medio = gravar(store, nome(2), idade=SWEEP_GRACE_SECONDS + 10)
+    recente = gravar(store, nome(3))
+    assert store.sweep() == (1, 10)
+    assert [os.path.exists(c) for c in (antigo, medio, recente)] == [False, True, True]
+
+
+def test_pin_protege_da_limpeza(uploads):
+    caminho = gravar(uploads, nome(1), idade=TTL + 10)
+    uploads.pin(caminho)
+    uploads.pin(caminho)
+    uploads.unpin(caminho)
+    assert uploads.sweep() == (0, 0) and os.path.exists(caminho)
+    uploads.unpin(caminho)
+    assert uploads.sweep() == (1, 10) and not os.path.exists(caminho)
+
+
+def test_upload_do_job_na_fila_nao_e_removido(uploads):
+    fila = JobQueue(1, 4, 60)
+    liberar, ocupado = threading.Event(), threading.Event()
+
+    def bloquear():
+        ocupado.set()
+        liberar.wait(5)
+
+    fila.submit(bloquear)
+    ocupado.wait(5)
+    caminho = gravar(uploads, nome(1), idade=TTL + 10)
+    job = fila.submit(os.path.getsize, caminho, inputs=(caminho,))
+
+    # Na fila, atrás do job que está rodando: preso mesmo com o TTL vencido
+    assert uploads.sweep() == (0, 0) and os.path.exists(caminho)
+    liberar.set()
+    esperar(job)
+    assert job.status == DONE and job.result == 10
+    # Ao começar, o TTL do upload voltou a contar; ao terminar, foi solto
+    assert uploads._pinned == {}
+    assert time.time() - os.path.getmtime(caminho) < TTL
+    assert uploads.sweep(now=time.time() + TTL + 10) == (1, 10)
+
+
+def test_job_com_erro_solta_o_upload(uploads):
+    caminho = gravar(uploads, nome(1))
+    job = JobQueue(1, 4, 60).submit(os.remove, caminho + ".nao-existe", inputs=(caminho,))
+    esperar(job)
+    assert job.status == ERROR and uploads._pinned == {}
+
+
+def test_fila_cheia_solta_o_upload(uploads):
+    fila = JobQueue(1, 1, 60)
+    liberar, ocupado = threading.Event(), threading.Event()
+
+    def bloquear():
+        ocupado.set()
+        liberar.wait(5)
+
+    fila.submit(bloquear)
+    ocupado.wait(5)
+    fila.submit(time.sleep, 0)
+    caminho = gravar(uploads, nome(1))
+    with pytest.raises(QueueFullError):
+        fila.submit(os.path.getsize, caminho, inputs=(caminho,))
+    assert uploads._pinned == {}
+    liberar.set()
@@ -0,0 +1,86 @@
+"""
+Histórico que continua na linha seguinte, inclusive no topo da página
+seguinte: texto inteiro, fluxo e incremental leem igual (BordasPagina).
+"""
+import pytest
+
+import sintetico
+from app.extrator.extrator_extrato import ExtratorExtratoBancario
+from app.extrator.incremental import PaginaExtraida, continuacoes_entre_paginas
+from app.extrator.tabela_lancamentos import TabelaLancamentos
+
+BANCO = "999"
+
+
+@pytest.fixture(scope="module")
+def extrator():
+    return ExtratorExtratoBancario()
+
+
+@pytest.fixture(scope="module")
+def extrato():
+    return sintetico.gerar(600, linhas_por_pagina=30, continuacoes=0.5)
+
+
+def historicos(lancamentos):
+    return [lancamento["Historico"] for lancamento in lancamentos]
+
+
+def test_continuacao_no_topo_da_pagina_seguinte(extrator, extrato):
+    assert extrato.continuacoes
+    pdf = sintetico.pdf(extrato)
+    esperado = extrator.extrair_tabela(BANCO, extrator.extrair_texto_pdf(pdf)).para_dicts()
+    assert any(h.endswith("PARCELA UNICA") for h in historicos(esperado))
+
+    # O mesmo resultado de quando a continuação está logo abaixo, na mesma página
+    paginas = [list(pagina) for pagina in extrato.paginas]
+    for anterior, pagina in zip(paginas, paginas[1:]):
+        if pagina[0].endswith("PARCELA UNICA"):
+            anterior.append(pagina.pop(0))
+    mesma_pagina = sintetico.pdf(extrato._replace(paginas=paginas))
+    assert extrator.extrair_tabela(BANCO, extrator.extrair_texto_pdf(mesma_pagina)).para_dicts() == esperado
+
+    assert list(extrator.iter_lancamentos(BANCO, pdf)) == esperado
+    assert extrator.extrair_tabela_incremental(BANCO, pdf).tabela.para_dicts() == esperado
+
+
+def test_incremental_reaproveita_paginas_com_continuacao(extrator, extrato):
+    # O extrato de ontem termina antes; o de hoje traz as mesmas páginas e mais algumas
+    ontem = extrato._replace(paginas=extrato.paginas[:len(extrato.paginas) // 2])
+    anterior = extrator.extrair_tabela_incremental(BANCO, sintetico.pdf(ontem))
+    pdf = sintetico.pdf(extrato)
+    resultado = extrator.extrair_tabela_incremental(BANCO, pdf, anterior.paginas, anterior.periodo, anterior.perfil)
+    assert resultado.reaproveitadas == len(ontem.paginas)
+    assert resultado.tabela.para_dicts() == extrator.extrair_tabela(BANCO, extrator.extrair_texto_pdf(pdf)).para_dicts()
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("01/02/2024 PIX FULANO 10,00 D\nNF 123 PARCELA UNICA\n", ["PIX FULANO NF 123 PARCELA UNICA"]),
+    # Na mesma página, uma linha em branco encerra o histórico
+    ("01/02/2024 PIX FULANO 10,00 D\n\nNF 123 PARCELA UNICA\n", ["PIX FULANO"]),
+    # Entre páginas, as linhas em branco até o marcador não encerram
+    ("01/02/2024 PIX FULANO 10,00 D\n\n--- PÁGINA 2 ---\nNF 123 PARCELA UNICA\n", ["PIX FULANO NF 123 PARCELA UNICA"]),
+    # Cabeçalho no topo da página seguinte: nada a continuar
+    ("01/02/2024 PIX FULANO 10,00 D\n\n--- PÁGINA 2 ---\nAgência 1234 Conta Corrente 56789-0\n", ["PIX FULANO"]),
+    ("01/02/2024 PIX FULANO 10,00 D\n02/02/2024 TED BELTRANO 5,00 C\n", ["PIX FULANO", "TED BELTRANO"]),
+])
+def test_linha_seguinte(extrator, texto, esperado):
+    assert historicos(extrator.extrair_lancamentos(BANCO, texto)) == esperado
+
+
+def _pagina(historicos_, continuacao, aberta):
+    lancamentos = [dict(Data="01/02/2024", Movimento="DÉBITO", Historico=h, Valor=1.0, Centavos=100)
+                   for h in historicos_]
+    return PaginaExtraida("", "", TabelaLancamentos.de_lancamentos(lancamentos, BANCO), continuacao, aberta)
+
+
+def test_continuacoes_entre_paginas():
+    paginas = [
+        _pagina(["A", "B"], "", True),
+        # Página sem texto (digitalizada sem OCR) não interrompe a continuação
+        _pagina([], None, False),
+        _pagina(["C"], "NF 1", True),
+        _pagina(["D"], "", False),
+        _pagina([], "NF 2", False),
+    ]
+    assert continuacoes_entre_paginas(paginas) == {1: "NF 1"}
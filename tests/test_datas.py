@@ -0,0 +1,80 @@
+"""Período do cabeçalho e ano das datas sem ano (datas.py)."""
+from datetime import date
+
+import pytest
+
+from app.extrator import datas
+from app.extrator.datas import NormalizadorDatas, PeriodoExtrato, detectar_periodo
+
+
+@pytest.fixture
+def hoje(monkeypatch):
+    """Fixa o dia de hoje (10/01/2025) para as datas sem período."""
+
+    class Data(date):
+        @classmethod
+        def today(cls):
+            return cls(2025, 1, 10)
+
+    monkeypatch.setattr(datas, "date", Data)
+
+
+@pytest.mark.parametrize("linha, esperado", [
+    ("Período: 01/12/2023 a 31/01/2024", (date(2023, 12, 1), date(2024, 1, 31))),
+    ("de 01/12/2023 até 17/12/2023", (date(2023, 12, 1), date(2023, 12, 17))),
+    ("Mês de referência: 01/2024", (date(2024, 1, 1), date(2024, 1, 31))),
+    ("Período: janeiro/2024", (date(2024, 1, 1), date(2024, 1, 31))),
+    ("Referência: FEV de 2024", (date(2024, 2, 1), date(2024, 2, 29))),
+    ("MES 12/2023", (date(2023, 12, 1), date(2023, 12, 31))),
+])
+def test_detectar_periodo(linha, esperado):
+    assert detectar_periodo([linha]) == PeriodoExtrato(*esperado)
+
+
+@pytest.mark.parametrize("linha", [
+    "REMESSA 03/2024",
+    "Semestre 1 de 2024",
+    "Períodos 01/2024",
+    "Período: 31/01/2024 a 01/12/2023",
+])
+def test_linha_sem_periodo(linha):
+    assert detectar_periodo([linha]) is None
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("28/12", "28/12/2023"),
+    ("05/01", "05/01/2024"),
+    ("05/jan", "05/01/2024"),
+    ("31 - DEZ", "31/12/2023"),
+    # Fora do período: o ano que deixa a data mais perto dele
+    ("15/02", "15/02/2024"),
+    ("15/11", "15/11/2023"),
+    ("05/01/24", "05/01/2024"),
+    ("32/01", "32/01"),
+    ("05-01", "05-01"),
+])
+def test_ano_pelo_periodo(texto, esperado):
+    normalizador = NormalizadorDatas(PeriodoExtrato(date(2023, 12, 1), date(2024, 1, 31)))
+    assert normalizador.normalizar(texto) == esperado
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    # Dezembro lido em janeiro é do ano anterior, não do corrente
+    ("15/12", "15/12/2024"),
+    ("10/01", "10/01/2025"),
+    ("11/01", "11/01/2024"),
+    ("05/jan", "05/01/2025"),
+])
+def test_sem_periodo_vale_o_ultimo_ano_ate_hoje(hoje, texto, esperado):
+    assert NormalizadorDatas().normalizar(texto) == esperado
+
+
+def test_periodo_lido_do_cabecalho(hoje):
+    normalizador = NormalizadorDatas()
+    normalizador.ler_cabecalho(["BANCO", "Período 01/12/2023 a 31/01/2024", "Data Histórico Valor"])
+    assert normalizador.normalizar("15/12") == "15/12/2023"
+
+    linhas = ["Mês de referência: 12/2020", "15/12 PIX 1,00"]
+    normalizador = NormalizadorDatas()
+    assert list(normalizador.observar_cabecalho(linhas)) == linhas
+    assert normalizador.normalizar("15/12") == "15/12/2020"
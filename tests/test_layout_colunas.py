@@ -0,0 +1,142 @@
+"""
+Motor de colunas (layout_colunas) num extrato montado como os de banco: uma
+célula ou palavra por Tj, TJ com ajustes entre palavras, fonte proporcional
+com /Widths, tamanho vindo da matriz de texto e página em pixels (cm).
+"""
+import builtins
+
+import pytest
+
+from app.extrator.extrator_extrato import ExtratorExtratoBancario
+
+# Larguras da Helvetica (milésimos) de ' ' a 'Z'
+_LARGURAS = (
+    [278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278]
+    + [556] * 10
+    + [278, 278, 584, 584, 584, 556, 1015]
+    + [667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833,
+       722, 778, 667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611]
+)
+
+# Página em pixels (96 dpi); o cm da página converte para pontos
+_ALTURA = 1123
+_TAMANHO = 10
+_X_DATA, _X_HISTORICO, _FIM_VALOR, _FIM_SALDO = 50, 130, 560, 690
+
+
+def _largura(texto: str) -> float:
+    return sum(_LARGURAS[ord(c) - 32] for c in texto) / 1000 * _TAMANHO
+
+
+def _literal(texto: str) -> str:
+    return "(" + texto.replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _celula(x: float, y: float, operador: str) -> str:
+    # Tamanho 1 na fonte e o real na matriz, como em PDFs gerados por impressoras virtuais
+    return f"BT /F2 1 Tf {_TAMANHO} 0 0 {_TAMANHO} {x:.2f} {y} Tm {operador} ET"
+
+
+def _pagina() -> str:
+    comandos = ["0.75 0 0 0.75 0 0 cm", "q 0.2 0.2 0.2 rg",
+                f"BT /F1 12 Tf 50 {_ALTURA - 60} Td (EXTRATO CONTA CORRENTE) Tj ET",
+                f"BT /F1 9 Tf 50 {_ALTURA - 80} Td (Per\\355odo 01/01/2024 a 31/01/2024) Tj ET",
+                f"BT /F1 9 Tf 50 {_ALTURA - 100} Td (data) Tj 80 0 Td (lan\\347amentos) Tj "
+                f"350 0 Td (valor \\(R$\\)) Tj 130 0 Td (saldo \\(R$\\)) Tj ET", "Q"]
+    y = _ALTURA - 130
+    linhas = [
+        ("02/01", ["PIX", "TRANSF"], "[(FULANO) -280 (DE) -300 (TAL)] TJ", "-1.234,56", "8.765,44"),
+        ("02/01", ["TED"], "[(237.0001) -600 (BELTRANO)] TJ", "5.000,00", "13.765,44"),
+        (None, [], "[(REF) -280 (NF) -280 (4471)] TJ", None, None),
+        ("03/01", ["TAR"], "[(PACO) -40 (TE) -300 (ITAU)] TJ", "-49,90", None),
+        ("03/01", ["REND", "PAGO"], "[(APLIC) -280 (AUT) -280 (MAIS)] TJ", "0,12", "13.715,66"),
+    ]
+    for data, palavras, resto, valor, saldo in linhas:
+        if data is not None:
+            comandos.append(_celula(_X_DATA, y, _literal(data) + " Tj"))
+        # Cada palavra num Tj próprio, seguidas sem reposicionar; o resto num TJ com ajustes
+        x = _X_HISTORICO
+        for palavra in palavras:
+            comandos.append(_celula(x, y, _literal(palavra) + " Tj"))
+            x += _largura(palavra + " ")
+        comandos.append(_celula(x, y, resto))
+        if valor is not None:
+            comandos.append(_celula(_FIM_VALOR - _largura(valor), y, _literal(valor) + " Tj"))
+        if saldo is not None:
+            comandos.append(_celula(_FIM_SALDO - _largura(saldo), y, _literal(saldo) + " Tj"))
+        y -= 18
+    comandos.append(f"BT /F2 1 Tf 9 0 0 9 {_X_DATA} {y} Tm (SALDO DO DIA) Tj "
+                    f"{(_FIM_SALDO - 9 * _largura('13.715,66') / _TAMANHO - _X_DATA) / 9:.3f} 0 Td (13.715,66) Tj ET")
+    comandos.append("BT /F1 7 Tf 50 40 Td (Central de atendimento 4004 4828) Tj ET")
+    return "\n".join(comandos)
+
+
+def extrato_pdf() -> bytes:
+    corpo = _pagina().encode("cp1252")
+    objetos = [
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding "
+        b"/FirstChar 32 /LastChar 90 /Widths [%s] >>" % " ".join(map(str, _LARGURAS)).encode(),
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(corpo), corpo),
+        b"<< /Type /Page /Parent 5 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 1 0 R /F2 2 0 R >> >> /Contents 3 0 R >>",
+        b"<< /Type /Pages /Kids [4 0 R] /Count 1 >>",
+        b"<< /Type /Catalog /Pages 5 0 R >>",
+    ]
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for i, objeto in enumerate(objetos, 1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n%s\nendobj\n" % (i, objeto)
+    xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    saida += b"".join(b"%010d 00000 n \n" % p for p in posicoes)
+    saida += b"trailer\n<< /Size %d /Root 6 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    return bytes(saida)
+
+
+ESPERADO = [
+    # Ajustes de TJ de meio espaço ou mais separam palavras; os menores (kerning) não
+    ("02/01/2024", "DÉBITO", "PIX TRANSF FULANO DE TAL", 123456),
+    ("02/01/2024", "CRÉDITO", "TED 237.0001 BELTRANO REF NF 4471", 500000),
+    ("03/01/2024", "DÉBITO", "TAR PACOTE ITAU", 4990),
+    ("03/01/2024", "CRÉDITO", "REND PAGO APLIC AUT MAIS", 12),
+]
+
+
+def resumo(lancamentos):
+    return [(l["Data"], l["Movimento"], l["Historico"], l["Centavos"]) for l in lancamentos]
+
+
+@pytest.fixture(scope="module")
+def extrator():
+    return ExtratorExtratoBancario()
+
+
+def test_extrato_de_banco_em_colunas(extrator):
+    assert resumo(extrator.extrair_lancamentos_colunas("341", extrato_pdf())) == ESPERADO
+
+
+def test_extrato_de_banco_em_colunas_em_fluxo(extrator):
+    assert resumo(extrator.iter_lancamentos_colunas("341", extrato_pdf())) == ESPERADO
+
+
+@pytest.fixture
+def sem_build_char_map(monkeypatch):
+    """Simula um PyPDF2 sem o build_char_map (interno, pode sumir numa atualização)."""
+    importar = builtins.__import__
+
+    def importar_sem_cmap(nome, *args, **kwargs):
+        if nome == "PyPDF2._cmap":
+            raise ImportError("cannot import name 'build_char_map'")
+        return importar(nome, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", importar_sem_cmap)
+
+
+def test_sem_build_char_map_usa_o_motor_de_texto(extrator, sem_build_char_map):
+    pdf = extrato_pdf()
+    texto = extrator.extrair_lancamentos("341", extrator.extrair_texto_pdf(pdf))
+    assert texto
+    assert extrator.extrair_lancamentos_colunas("341", pdf) == texto
+    assert list(extrator.iter_lancamentos_colunas("341", pdf)) == texto
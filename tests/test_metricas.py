@@ -0,0 +1,103 @@
+"""Medição por etapa (?timings=true) e os histogramas de /metrics."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import sintetico
+from app.extrator.medicao import ETAPA_DUPLICATAS, ETAPA_LINHAS, ETAPA_TEXTO, Medicao, etapa
+from app.main import app
+from app.services.metrics_service import Counter, Histogram, extraction_metrics
+
+EXTRATO = sintetico.gerar(300)
+PDF = sintetico.pdf(EXTRATO)
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def extrair(cliente, pdf=PDF, **parametros):
+    return cliente.post("/api/v1/extract", params=parametros, data={"bank_code": "999", "save_xlsx": "false"},
+                        files={"file": ("extrato.pdf", pdf, "application/pdf")})
+
+
+def serie(texto: str, nome: str) -> float:
+    """Valor da série (nome com rótulos) no texto de /metrics; 0 se ela ainda não existe."""
+    for linha in texto.splitlines():
+        if linha.startswith(nome + " "):
+            return float(linha.rsplit(" ", 1)[1])
+    return 0
+
+
+def test_histograma():
+    histograma = Histogram("h", "Ajuda.", (1, 5), ("tipo",))
+    for valor in (0.5, 1, 3, 10):
+        histograma.observe(valor, 'a"b')
+    assert histograma.render() == [
+        "# HELP h Ajuda.", "# TYPE h histogram",
+        'h_bucket{tipo="a\\"b",le="1"} 2', 'h_bucket{tipo="a\\"b",le="5"} 3', 'h_bucket{tipo="a\\"b",le="+Inf"} 4',
+        'h_sum{tipo="a\\"b"} 14.5', 'h_count{tipo="a\\"b"} 4',
+    ]
+    with pytest.raises(ValueError):
+        histograma.observe(1)
+
+
+def test_contador():
+    contador = Counter("c_total", "Ajuda.", ("motor",))
+    contador.inc("texto")
+    contador.inc("texto")
+    assert contador.render()[-1] == 'c_total{motor="texto"} 2'
+
+
+def test_medicao_acumula_etapas():
+    medicao = Medicao()
+    with etapa(medicao, ETAPA_TEXTO):
+        pass
+    primeira = medicao.etapas[ETAPA_TEXTO]
+    with etapa(medicao, ETAPA_TEXTO):
+        pass
+    assert medicao.etapas[ETAPA_TEXTO] >= primeira > 0
+    assert list(medicao.contar_linhas("abc")) == ["a", "b", "c"] and medicao.linhas == 3
+    with etapa(None, ETAPA_TEXTO):
+        pass
+
+
+def test_timings_da_extracao(cliente):
+    resposta = extrair(cliente, timings="true")
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    timings = corpo["timings"]
+    assert {ETAPA_TEXTO, ETAPA_LINHAS, ETAPA_DUPLICATAS} <= set(timings["stages"])
+    assert timings["pages"] == len(EXTRATO.paginas)
+    assert timings["lines"] >= EXTRATO.linhas
+    assert timings["lines_matched"] == timings["duplicates"] + corpo["total_lancamentos"]
+    assert timings["bytes_in"] == len(PDF)
+    assert not timings["cached"]
+    assert timings["total_seconds"] >= sum(timings["stages"].values()) - 1e-6
+
+    assert extrair(cliente).json()["timings"] is None
+
+
+def test_timings_no_fluxo(cliente):
+    resposta = extrair(cliente, stream="true", timings="true")
+    trailer = json.loads(resposta.text.splitlines()[-1])
+    assert trailer["type"] == "totals"
+    assert trailer["timings"]["pages"] == len(EXTRATO.paginas)
+    assert trailer["timings"]["lines_matched"] >= trailer["total_lancamentos"]
+
+
+def test_metrics(cliente):
+    contagem = 'extrator_extraction_seconds_count{engine="texto",cache="miss"}'
+    paginas = "extrator_pages_count"
+    antes = cliente.get("/metrics").text
+    extrair(cliente)
+    resposta = cliente.get("/metrics")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert serie(resposta.text, contagem) == serie(antes, contagem) + 1
+    assert serie(resposta.text, paginas) == serie(antes, paginas) + 1
+    assert f'extrator_stage_seconds_count{{stage="{ETAPA_TEXTO}"}}' in resposta.text
+    assert resposta.text == extraction_metrics.render()
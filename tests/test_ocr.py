@@ -0,0 +1,72 @@
+"""
+OCR das páginas digitalizadas quando o PyPDF2 instalado não tem as partes
+privadas que ocr.py usa: a página fica sem OCR, o documento não falha.
+"""
+import io
+import time
+
+import PyPDF2
+import PyPDF2.filters
+import pytest
+from PyPDF2.generic import StreamObject
+
+import sintetico
+from app.extrator import ocr
+from app.extrator.incremental import impressao_conteudo
+from bench_ocr import MotorSintetico
+
+EXTRATO = sintetico.gerar(60, linhas_por_pagina=20)
+
+
+def paginas(**opcoes):
+    return PyPDF2.PdfReader(io.BytesIO(sintetico.pdf(EXTRATO, range(len(EXTRATO.paginas)), **opcoes))).pages
+
+
+@pytest.fixture
+def fonte():
+    fonte = ocr.FonteOcr(MotorSintetico(0), 1, 60)
+    yield fonte
+    fonte.encerrar()
+
+
+@pytest.fixture
+def sem_xobj_to_image(monkeypatch):
+    monkeypatch.delattr(PyPDF2.filters, "_xobj_to_image")
+
+
+@pytest.fixture
+def sem_dados_de_imagem(monkeypatch):
+    """Simula um PyPDF2 em que as imagens não têm mais o atributo _data."""
+    original = StreamObject._data
+
+    def dados(stream):
+        if stream.get("/Subtype") == "/Image":
+            raise AttributeError("_data")
+        return original.fget(stream)
+
+    monkeypatch.setattr(StreamObject, "_data", property(dados, original.fset))
+
+
+def test_reconhece_as_paginas(fonte):
+    textos = fonte.reconhecer(dict(enumerate(paginas())))
+    assert [textos[i].split("\n") for i in sorted(textos)] == EXTRATO.paginas
+
+
+def test_sem_conversao_do_pypdf2_a_pagina_fica_sem_ocr(fonte, sem_xobj_to_image):
+    # /Indexed não tem modo do Pillow e passa pela conversão do PyPDF2
+    paleta, tons_de_cinza = paginas(paleta=True), paginas()
+    imagem = ocr.imagens_pagina(paleta[0])[0]
+    assert ocr.arquivo_imagem(imagem) is None
+    assert ocr._reconhecer_pagina(fonte.motor, ocr.pdf_pagina(paleta[0]), time.time() + 60) is None
+
+    textos = fonte.reconhecer({0: paleta[0], 1: tons_de_cinza[1]})
+    assert list(textos) == [1]
+    assert textos[1].split("\n") == EXTRATO.paginas[1]
+
+
+def test_sem_dados_codificados_a_pagina_fica_sem_ocr(fonte, sem_dados_de_imagem):
+    digitalizadas = paginas()
+    assert ocr.impressao_imagens(ocr.imagens_pagina(digitalizadas[0])) is None
+    assert fonte.reconhecer(dict(enumerate(digitalizadas))) == {}
+    # Sem a impressão das imagens, a página nunca é tida como igual à de outra leitura
+    assert impressao_conteudo(digitalizadas[0]) != impressao_conteudo(digitalizadas[0])
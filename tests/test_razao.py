@@ -0,0 +1,103 @@
+"""
+Razão por conta (ledger_service): ingestões incrementais, trava entre
+processos e recuperação de uma linha cortada no meio da escrita.
+"""
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import sintetico
+from app.extrator.extrator_extrato import ExtratorExtratoBancario
+from app.services.ledger_service import LEDGER_FILE, PAGES_FILE, LedgerStore, ledger_key
+
+BANCO = "999"
+
+
+def ingerir(base_dir: str, conta: str, lancamentos: int, seed: int) -> int:
+    """Uma ingestão com o seu próprio LedgerStore, como a de outro worker do servidor."""
+    pdf = sintetico.pdf(sintetico.gerar(lancamentos, linhas_por_pagina=30, seed=seed))
+    return LedgerStore(base_dir).ingest(conta, BANCO, pdf).new_rows
+
+
+def linhas(tabela):
+    return [tuple(lancamento.values()) for lancamento in tabela.para_dicts()]
+
+
+def test_ingestao_incremental(tmp_path):
+    store = LedgerStore(str(tmp_path))
+    assert store.get("conta", BANCO) is None
+
+    extrato = sintetico.gerar(400, linhas_por_pagina=30, continuacoes=0.5)
+    ontem = sintetico.pdf(extrato._replace(paginas=extrato.paginas[:8]))
+    primeira = store.ingest("conta", BANCO, ontem)
+    assert primeira.new_rows == len(primeira.ledger) == len(primeira.statement)
+    assert primeira.pages_reused == 0
+
+    hoje = sintetico.pdf(extrato)
+    segunda = store.ingest("conta", BANCO, hoje)
+    assert segunda.pages_reused > 0
+    extrator = ExtratorExtratoBancario()
+    completo = extrator.extrair_tabela(BANCO, extrator.extrair_texto_pdf(hoje))
+    assert linhas(segunda.statement) == linhas(completo)
+    assert segunda.new_rows == len(segunda.ledger) - len(primeira.ledger)
+
+    repetida = store.ingest("conta", BANCO, hoje)
+    assert repetida.new_rows == 0 and repetida.pages_reused == repetida.pages
+    assert linhas(LedgerStore(str(tmp_path)).get("conta", BANCO)) == linhas(segunda.ledger)
+
+
+def test_outro_processo_acrescenta(tmp_path):
+    leitor, escritor = LedgerStore(str(tmp_path)), LedgerStore(str(tmp_path))
+    ingerir(str(tmp_path), "conta", 200, 1)
+    antes = len(leitor.get("conta", BANCO))
+    novas = escritor.ingest("conta", BANCO, sintetico.pdf(sintetico.gerar(200, seed=2))).new_rows
+    assert novas and len(leitor.get("conta", BANCO)) == antes + novas
+
+
+def test_ingestoes_concorrentes_como_em_sequencia(tmp_path):
+    concorrente, sequencial = str(tmp_path / "concorrente"), str(tmp_path / "sequencial")
+    ingestoes = [(concorrente, "conta", 150, seed) for seed in range(4)] * 2
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        novas = pool.starmap(ingerir, ingestoes)
+    razao = LedgerStore(concorrente).get("conta", BANCO)
+    assert sum(novas) == len(razao)
+
+    for _, conta, lancamentos, seed in ingestoes:
+        ingerir(sequencial, conta, lancamentos, seed)
+    assert sorted(linhas(razao)) == sorted(linhas(LedgerStore(sequencial).get("conta", BANCO)))
+
+    caminho = os.path.join(concorrente, ledger_key("conta", BANCO), LEDGER_FILE)
+    with open(caminho, encoding="utf-8") as f:
+        assert len([json.loads(linha) for linha in f]) == len(razao)
+
+
+def test_linha_cortada(tmp_path):
+    ingerir(str(tmp_path), "conta", 200, 1)
+    caminho = os.path.join(str(tmp_path), ledger_key("conta", BANCO), LEDGER_FILE)
+    with open(caminho, "ab") as f:
+        f.write(b'{"Data":"01/01/2024","Movim')
+
+    store = LedgerStore(str(tmp_path))
+    antes = len(store.get("conta", BANCO))
+    resultado = store.ingest("conta", BANCO, sintetico.pdf(sintetico.gerar(200, seed=2)))
+    assert len(resultado.ledger) == antes + resultado.new_rows
+    with open(caminho, encoding="utf-8") as f:
+        assert [json.loads(linha) for linha in f] == resultado.ledger.para_dicts()
+
+
+def test_paginas_de_outra_versao_sao_apagadas(tmp_path):
+    ingerir(str(tmp_path), "conta", 100, 1)
+    diretorio = os.path.join(str(tmp_path), ledger_key("conta", BANCO))
+    antiga = os.path.join(diretorio, PAGES_FILE.format(version="0.0"))
+    open(antiga, "w").close()
+    ingerir(str(tmp_path), "conta", 100, 2)
+    assert not os.path.exists(antiga)
+    assert os.path.exists(os.path.join(diretorio, LEDGER_FILE))
+
+
+@pytest.mark.parametrize("conta", ["a/b", "../fora", ""])
+def test_conta_vira_nome_de_diretorio(tmp_path, conta):
+    ingerir(str(tmp_path), conta, 50, 1)
+    assert os.listdir(str(tmp_path)) == [ledger_key(conta, BANCO)]
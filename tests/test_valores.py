@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from app.extrator.extrator_extrato import ExtratorExtratoBancario
+from app.extrator.perfis_bancos import PERFIL_GENERICO
+from app.extrator.tabela_lancamentos import TabelaLancamentos
+from app.extrator.valores import centavos, centavos_formatado, tipo_movimento, valor_texto_livre
+
+SINAIS = ("", "-", "+")
+_ALFABETO = "0123456789.,+- ()DC"
+
+
+def formatado(centavos_: int) -> str:
+    """Valor no formato dos padrões de valor: 1.234,56."""
+    return f"{centavos_ // 100:,}".replace(",", ".") + f",{centavos_ % 100:02d}"
+
+
+def amostra(seed: int, quantidade: int = 2000):
+    r = random.Random(seed)
+    return [r.randint(0, 10 ** r.randint(1, 12)) for _ in range(quantidade)]
+
+
+@pytest.fixture(scope="module")
+def extrator():
+    return ExtratorExtratoBancario()
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("0,01", 1), ("1,00", 100), ("12,34", 1234), ("1.234,56", 123456), ("1.000.000,00", 100000000),
+    ("-1.234,56", 123456), ("+0,50", 50), ("0,00", 0),
+])
+def test_centavos_formatado(texto, esperado):
+    assert centavos_formatado(texto) == esperado
+
+
+@pytest.mark.parametrize("texto", ["1234", "12,3", "12,345", "1.234", "", "1,2a", "R$ 1,00", "1,00 D"])
+def test_centavos_formatado_fora_do_formato(texto):
+    assert centavos_formatado(texto) is None
+
+
+@pytest.mark.parametrize("sinal", SINAIS)
+@pytest.mark.parametrize("seed", range(3))
+def test_caminho_rapido_igual_a_limpeza_generica(extrator, sinal, seed):
+    for valor in amostra(seed):
+        texto = sinal + formatado(valor)
+        assert centavos_formatado(texto) == valor == round(valor_texto_livre(texto) * 100), texto
+        assert extrator.normalizar_valor(texto) == valor_texto_livre(texto), texto
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_textos_arbitrarios(seed):
+    """
+    O que o caminho rápido aceita coincide com a limpeza genérica sempre que o
+    padrão de valor casa com o texto; fora do formato, centavos usa a limpeza genérica.
+    """
+    r = random.Random(seed)
+    padrao = PERFIL_GENERICO.padroes_valor[0]
+    for _ in range(20000):
+        texto = "".join(r.choice(_ALFABETO) for _ in range(r.randint(1, 14)))
+        m = padrao.fullmatch(texto)
+        if m is not None and m.group("ind") is None:
+            assert centavos_formatado(texto) == round(valor_texto_livre(texto) * 100), texto
+        if centavos_formatado(texto) is None:
+            assert centavos(texto) == round(valor_texto_livre(texto) * 100), texto
+
+
+@pytest.mark.parametrize("texto, indicador, movimento", [
+    ("1,00", "D", "DÉBITO"), ("1,00", "C", "CRÉDITO"), ("1,00", "d", "DÉBITO"), ("1,00", " C ", "CRÉDITO"),
+    ("1,00", "(-)", "DÉBITO"), ("1,00", "(+)", "CRÉDITO"), ("1,00", "-", "DÉBITO"), ("1,00", "+", "CRÉDITO"),
+    ("-1,00", None, "DÉBITO"), ("1,00", None, "CRÉDITO"), ("+1,00", None, "CRÉDITO"), ("1,00", "X", "INDEFINIDO"),
+])
+def test_tipo_movimento(texto, indicador, movimento):
+    assert tipo_movimento(texto, indicador) == movimento
+
+
+@pytest.mark.parametrize("linha, valor, movimento", [
+    ("01/02/2024 PIX 1.234,56 D", 1234.56, "DÉBITO"),
+    ("01/02/2024 PIX -0,10", 0.1, "DÉBITO"),
+    ("01/02/2024 PIX 10,00 (+)", 10.0, "CRÉDITO"),
+    ("01/02/2024 PIX SEM VALOR", None, None),
+])
+def test_detectar_valor_e_tipo(extrator, linha, valor, movimento):
+    assert extrator.detectar_valor_e_tipo(linha) == (valor, movimento)
+
+
+@pytest.mark.parametrize("sinal", SINAIS)
+def test_lancamento_em_centavos(extrator, sinal):
+    for valor in amostra(7, 500):
+        lancamento = extrator._montar_lancamento('001', '01/01/2024', sinal + formatado(valor), None, 'X')
+        if not valor:
+            assert lancamento is None
+            continue
+        assert type(lancamento['Centavos']) is int and lancamento['Centavos'] == valor
+        assert lancamento['Valor'] == valor / 100
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_totais_exatos(extrator, seed):
+    """Os totais da tabela são a soma exata, em centavos, dos valores lidos (sem erro de float)."""
+    r = random.Random(seed)
+    textos = [r.choice(SINAIS) + formatado(valor) for valor in amostra(seed)]
+    indicadores = [r.choice((None, 'C', 'D')) for _ in textos]
+    lancamentos = [extrator._montar_lancamento('001', '01/01/2024', texto, indicador, 'X')
+                   for texto, indicador in zip(textos, indicadores)]
+    tabela = TabelaLancamentos.de_lancamentos(filter(None, lancamentos), '001')
+    debitos = sum(centavos(t) for t, i in zip(textos, indicadores) if tipo_movimento(t, i) == 'DÉBITO')
+    creditos = sum(centavos(t) for t, i in zip(textos, indicadores) if tipo_movimento(t, i) == 'CRÉDITO')
+    assert tabela.totais_centavos() == dict(total_debitos=debitos, total_creditos=creditos,
+                                            saldo_liquido=creditos - debitos)
+    assert tabela.totais() == dict(total_debitos=debitos / 100, total_creditos=creditos / 100,
+                                   saldo_liquido=(creditos - debitos) / 100)
@@ -0,0 +1,104 @@
+"""
+VarredorLinhas: a varredura única dá o mesmo resultado de aplicar cada
+padrão do perfil em sequência; VarredorLayout lê a linha pelo layout do banco.
+"""
+import pytest
+
+import sintetico
+from app.extrator.perfis_bancos import PERFIL_GENERICO, obter_perfil
+from app.extrator.varredor_linhas import VarredorLinhas
+
+DIFICEIS = [
+    "01/02/2024 PIX 03/04 REF 1.234,56 D",
+    "05/01/2024 TED 06/01/2024 10,00 C",
+    "05/01 DEB AUTOMATICO 05/01/2024 -10,00",
+    "PIX RECEBIDO 10,00",
+    "01/02/2024 PIX RECEBIDO",
+    "01/02/2024 SALDO ANTERIOR PIX 10,00",
+    "01/02/2024 - PIX - 10,00 -",
+    "15/jan TARIFA BANCARIA 5,00 D",
+    "15 - JAN tarifa 5,00",
+    "01/02/2024 COMPRA CARTAO 1.234,56 (-) 10,00",
+    "01/02/2024 compra cartao 1.234,56 (+)",
+    "31/12/23 IOF 0,38 D",
+    "8.095,03-8.095 JUROS 12,00",
+    "Total PIX 01/02/2024 10,00",
+    "",
+]
+
+
+def sequencial(perfil, linha: str):
+    """Cada padrão aplicado à parte, como na classificação anterior ao varredor."""
+    linha_lower = linha.lower()
+    transacao = (
+        any(padrao.search(linha) for padrao in perfil.padroes_data)
+        and any(padrao.search(linha) for padrao in perfil.padroes_valor)
+        and any(palavra in linha_lower for palavra in perfil.palavras_transacao)
+        and not any(termo in linha_lower for termo in perfil.termos_ignorar)
+    )
+    if not transacao:
+        return False, None, None, None, None
+    data = next(list(p.finditer(linha))[-1].group(1) for p in perfil.padroes_data if p.search(linha))
+    valor = next(p.search(linha) for p in perfil.padroes_valor if p.search(linha))
+    return True, data, valor.group('valor'), valor.group('ind'), perfil.varredor.historico_sequencial(linha)
+
+
+def linhas_sinteticas():
+    for formato in sintetico.FORMATOS_DATA:
+        for indicador in sintetico.INDICADORES:
+            extrato = sintetico.gerar(300, formato_data=formato, indicador=indicador, seed=len(formato))
+            yield from (linha.strip() for linha in sintetico.texto(extrato).split("\n"))
+
+
+@pytest.mark.parametrize("linha", DIFICEIS)
+def test_linhas_dificeis_como_em_sequencia(linha):
+    varredura = PERFIL_GENERICO.varredor.varrer(linha)
+    resultado = (varredura.eh_transacao, varredura.data, varredura.valor, varredura.indicador, varredura.historico)
+    assert resultado == sequencial(PERFIL_GENERICO, linha)
+
+
+def test_extratos_sinteticos_como_em_sequencia():
+    varredor = PERFIL_GENERICO.varredor
+    for linha in linhas_sinteticas():
+        varredura = varredor.varrer(linha)
+        resultado = (varredura.eh_transacao, varredura.data, varredura.valor, varredura.indicador,
+                     varredura.historico)
+        assert resultado == sequencial(PERFIL_GENERICO, linha), linha
+
+
+def test_tem_data_sem_ser_transacao():
+    varredor = PERFIL_GENERICO.varredor
+    assert varredor.varrer("01/02/2024 PIX RECEBIDO").tem_data
+    assert varredor.varrer("Período 01/01/2024 a 31/01/2024 PIX 10,00").tem_data
+    assert not varredor.varrer("NF 12345 PARCELA UNICA").tem_data
+
+
+def test_sem_palavras_nem_termos():
+    varredor = VarredorLinhas(PERFIL_GENERICO.padroes_data, PERFIL_GENERICO.padroes_valor, [], [])
+    varredura = varredor.varrer("01/02/2024 QUALQUER COISA 10,00")
+    assert varredura.eh_transacao and varredura.historico == "QUALQUER COISA"
+    assert not varredor.ignorada("Total 10,00")
+
+
+@pytest.mark.parametrize("codigo, linha, esperado", [
+    ("341", "02/01 PIX TRANSF FULANO -1.234,56 8.765,44", ("02/01", "PIX TRANSF FULANO", "-1.234,56", None)),
+    ("341", "02/01/2024 TED RECEBIDA 500,00 C", ("02/01/2024", "TED RECEBIDA", "500,00", "C")),
+    ("001", "02/01/2024 0000 13105 870 Pix - Enviado 1.234,56 (-) 10,00 C",
+     ("02/01/2024", "Pix - Enviado", "1.234,56", "(-)")),
+    ("104", "02/01/2024 000123 PIX RECEBIDO 1.234,56 C 5.000,00 C",
+     ("02/01/2024", "PIX RECEBIDO", "1.234,56", "C")),
+])
+def test_layout_do_banco(codigo, linha, esperado):
+    varredura = obter_perfil(codigo).varredor.varrer(linha)
+    assert varredura.eh_transacao
+    assert (varredura.data, varredura.historico, varredura.valor, varredura.indicador) == esperado
+
+
+@pytest.mark.parametrize("codigo, linha", [
+    ("341", "SALDO DO DIA 8.765,44"),
+    ("341", "02/01 SALDO 8.765,44"),
+    ("104", "02/01/2024 000123 PIX RECEBIDO 1.234,56"),
+    ("001", "02/01/2024 TOTAL 1.234,56 (+)"),
+])
+def test_layout_do_banco_fora_do_layout(codigo, linha):
+    assert not obter_perfil(codigo).varredor.varrer(linha).eh_transacao